@@ -8,11 +8,14 @@ import sys
 import subprocess
 from typing import List, Dict, Optional
 from pathlib import Path
-from aider.coders import EditBlockCoder
-from aider.io import InputOutput
-from aider.models import Model
-from aider import models
-import winreg
+try:
+    import winreg
+except ImportError:
+    winreg = None  # Not on Windows; keys come from the process environment
+from providers import PROVIDERS
+from model_catalog import shared_catalog
+from scheduler import shared_scheduler
+from cassette import cassette_from_env
 
 class AiderManager:
     # List of API keys to try in order of preference
@@ -31,6 +34,10 @@ class AiderManager:
         self.weak_model = None
         self.active_provider = None
         self.cmd_process = None
+        # Streams replaced by the Aider console, as (name, console stream, original stream)
+        self._redirected_streams = []
+        # Record or replay model calls when LLM_GUI_CASSETTE is set
+        self.cassette = cassette_from_env()
         
         # Try to set an API key from available providers
         self.set_api_key_from_registry()
@@ -62,9 +69,14 @@ class AiderManager:
         # Try each API key in order
         for api_key_name in self.API_KEYS:
             try:
-                key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Environment", 0, winreg.KEY_READ)
-                api_key = winreg.QueryValueEx(key, api_key_name)[0]
-                winreg.CloseKey(key)
+                if winreg is None:
+                    api_key = os.environ.get(api_key_name)
+                    if not api_key:
+                        raise KeyError("not set")
+                else:
+                    key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Environment", 0, winreg.KEY_READ)
+                    api_key = winreg.QueryValueEx(key, api_key_name)[0]
+                    winreg.CloseKey(key)
                 
                 if api_key:
                     # Set the provider's key in environment
@@ -90,18 +102,18 @@ class AiderManager:
     
     def _set_model_for_provider(self):
         """Set appropriate model based on active provider"""
-        if self.active_provider == 'anthropic':
-            self.main_model = 'claude-3-opus-20240229'
-        elif self.active_provider == 'google':
-            self.main_model = 'gemini-pro'
-        elif self.active_provider == 'mistral':
-            self.main_model = 'mistral-large'
-        elif self.active_provider == 'openrouter':
-            self.main_model = 'openrouter/auto'  # Let OpenRouter choose best model
         # OpenAI models remain as set in __init__
+        if self.active_provider == 'openai' or self.active_provider not in PROVIDERS:
+            return
+        self.main_model = shared_catalog.aider_models(self.active_provider)[0]
     
     def initialize_aider(self, main_model=None, weak_model=None):
         """Initialize Aider with the specified models"""
+        # Aider is slow to import; load it only when a manager is actually built
+        from aider.coders import EditBlockCoder
+        from aider.io import InputOutput
+        from aider.models import Model
+
         try:
             # Check for required API keys
             if not os.environ.get('ANTHROPIC_API_KEY'):
@@ -139,8 +151,10 @@ class AiderManager:
                 if kernel32.AttachConsole(self.cmd_process.pid):
                     # Redirect stdout and stderr
                     import sys
-                    sys.stdout = open('CONOUT$', 'w')
-                    sys.stderr = open('CONOUT$', 'w')
+                    for name in ('stdout', 'stderr'):
+                        console_stream = open('CONOUT$', 'w')
+                        self._redirected_streams.append((name, console_stream, getattr(sys, name)))
+                        setattr(sys, name, console_stream)
                     
                     # Write welcome message
                     print("\nAider Console Ready\n")
@@ -206,7 +220,13 @@ class AiderManager:
             self.io.console = CaptureConsole(self.cmd_process)
             
             # Initialize coder with Anthropic model
-            model_instance = Model(main_model or 'claude-3-opus-20240229')
+            model_instance = Model(main_model or shared_catalog.aider_models('anthropic')[0])
+            if self.cassette:
+                self.cassette.wrap_model(model_instance)
+                # Commit messages and chat summaries go to the weak model, which has its own instance
+                weak_instance = getattr(model_instance, 'weak_model', None)
+                if weak_instance is not None and weak_instance is not model_instance:
+                    self.cassette.wrap_model(weak_instance)
             
             self.coder = EditBlockCoder(
                 fnames=[],
@@ -229,14 +249,15 @@ class AiderManager:
     
     def __del__(self):
         """Cleanup when the object is destroyed"""
+        # Only the console streams opened here are closed, never the interpreter's own stdio
+        for name, console_stream, original in reversed(getattr(self, '_redirected_streams', [])):
+            if getattr(sys, name) is console_stream:
+                setattr(sys, name, original)
+            try:
+                console_stream.close()
+            except Exception:
+                pass
         try:
-            # Clean up stdout/stderr if we redirected them
-            import sys
-            if hasattr(sys.stdout, 'close'):
-                sys.stdout.close()
-            if hasattr(sys.stderr, 'close'):
-                sys.stderr.close()
-            
             # Detach from console if we were attached
             import ctypes
             kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
@@ -330,8 +351,10 @@ Please make the changes needed while following these guidelines:
 """
             
             try:
-                # Process the edit request using run_one which handles the chat and edits
-                self.coder.run_one(full_prompt, preproc=True)
+                # Process the edit request using run_one which handles the chat and edits;
+                # hold a scheduler slot so Aider and the chat window share the API quota
+                with shared_scheduler.slot(self.active_provider):
+                    self.coder.run_one(full_prompt, preproc=True)
             except Exception as edit_error:
                 if "git" in str(edit_error).lower():
                     return {
@@ -431,16 +454,10 @@ Please make the changes needed while following these guidelines:
         Returns:
             List[str]: List of model names
         """
-        # Return models based on active provider
-        if self.active_provider == 'anthropic':
-            return ['claude-3-opus-20240229', 'claude-3-sonnet-20240229']
-        elif self.active_provider == 'openai':
+        # Aider ships its own list of OpenAI models
+        if self.active_provider == 'openai':
+            from aider import models
             return models.OPENAI_MODELS
-        elif self.active_provider == 'google':
-            return ['gemini-pro']
-        elif self.active_provider == 'mistral':
-            return ['mistral-large']
-        elif self.active_provider == 'openrouter':
-            return ['openrouter/auto']
-        else:
-            return []
+        if self.active_provider in PROVIDERS:
+            return shared_catalog.aider_models(self.active_provider)
+        return []
@@ -0,0 +1,236 @@
+"""
+Batch prompt runner for the LLM GUI application.
+Runs prompts from a JSONL or CSV file against one model with bounded
+concurrency and streams the results to an output JSONL file. Results that
+are already in the output file are skipped, so an interrupted run resumes
+where it stopped.
+
+Usage:
+    python batch_runner.py --provider openai --model gpt-4.1 \\
+        --input prompts.jsonl --output results.jsonl --concurrency 8 --rpm 120
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from queue import Queue
+from typing import Callable, Dict, Iterator, Optional
+
+from http_pool import SessionPool
+from providers import PROVIDERS, get_provider
+from request_executor import CancelToken
+from scheduler import shared_scheduler
+
+
+def iter_batch_items(input_path: str) -> Iterator[Dict]:
+    """
+    Read batch items from a JSONL or CSV file without loading it into memory.
+
+    Each item needs a "prompt" (or, in JSONL, a "messages" list) and may have an "id";
+    items without an id are numbered by their position in the file.
+    """
+    with open(input_path, 'r', encoding='utf-8', newline='') as f:
+        if input_path.lower().endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for number, row in enumerate(rows, start=1):
+            item = dict(row)
+            item["id"] = str(item.get("id") or number)
+            yield item
+
+
+def load_completed_ids(output_path: str) -> set:
+    """Ids of the items that already have a successful result in the output file"""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partial line from an interrupted run
+            if record.get("error") is None and "id" in record:
+                completed.add(str(record["id"]))
+    return completed
+
+
+class BatchRunner:
+    """Runs a prompt file against one provider model"""
+
+    def __init__(self, provider: str, model: str, api_key: str, concurrency: int = 4,
+                 requests_per_minute: float = None, session_pool: SessionPool = None,
+                 on_progress: Callable[[Dict], None] = None, scheduler=None):
+        """
+        Args:
+            provider (str): Provider name
+            model (str): Model name
+            api_key (str): Provider API key
+            concurrency (int): Maximum number of requests in flight
+            requests_per_minute (float, optional): Rate limit for the provider during the run; it also
+                applies to the provider's other requests, e.g. from the chat window
+            session_pool (SessionPool, optional): Shared HTTP sessions
+            on_progress (Callable, optional): Called with the counters after each item
+            scheduler (RequestScheduler, optional): Scheduler for limits and retries
+        """
+        self.adapter = get_provider(provider)
+        self.model = model
+        self.api_key = api_key
+        self.concurrency = max(1, concurrency)
+        self.requests_per_minute = requests_per_minute
+        self.session_pool = session_pool or SessionPool(pool_maxsize=self.concurrency)
+        self.on_progress = on_progress
+        self.scheduler = scheduler or shared_scheduler
+        self.counts = {'completed': 0, 'failed': 0, 'skipped': 0}
+        self._cancelled = threading.Event()
+        self._tokens = set()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """Stop the run and abort the requests in flight"""
+        self._cancelled.set()
+        with self._lock:
+            tokens = list(self._tokens)
+        for token in tokens:
+            token.cancel()
+
+    def run(self, input_path: str, output_path: str) -> Dict:
+        """
+        Run all pending items of the input file.
+
+        Returns:
+            Dict: Number of completed, failed and skipped items
+        """
+        completed_ids = load_completed_ids(output_path)
+        queue = Queue(maxsize=self.concurrency * 2)
+
+        # The rate limit is applied by the scheduler, so it also counts requests from elsewhere
+        with self.scheduler.rate_limit(self.adapter.name, self.requests_per_minute), \
+                open(output_path, 'a', encoding='utf-8') as output:
+            workers = [threading.Thread(target=self._worker, args=(queue, output), daemon=True)
+                       for _ in range(self.concurrency)]
+            for worker in workers:
+                worker.start()
+
+            try:
+                # The bounded queue keeps only a few items in memory at a time
+                for item in iter_batch_items(input_path):
+                    if self._cancelled.is_set():
+                        break
+                    if item["id"] in completed_ids:
+                        self._count('skipped')
+                        continue
+                    queue.put(item)
+            except KeyboardInterrupt:
+                self.cancel()
+                raise
+            finally:
+                # Workers stop even if reading the input fails, e.g. on a malformed line
+                for _ in workers:
+                    queue.put(None)
+                for worker in workers:
+                    worker.join()
+
+        return dict(self.counts)
+
+    def _worker(self, queue: Queue, output):
+        session = self.session_pool.get(self.adapter.name)
+        while True:
+            item = queue.get()
+            if item is None:
+                break
+            if self._cancelled.is_set():
+                continue
+            record = self._process(session, item)
+            if record is None:
+                continue
+            line = json.dumps(record, ensure_ascii=False) + "\n"
+            with self._lock:
+                output.write(line)
+                output.flush()
+            self._count('failed' if record["error"] else 'completed')
+
+    def _process(self, session, item: Dict) -> Optional[Dict]:
+        """Send one item and build its result record; None if the run was cancelled"""
+        token = CancelToken(self.adapter.deadline)
+        with self._lock:
+            self._tokens.add(token)
+        start = time.perf_counter()
+        record = {"id": item["id"], "provider": self.adapter.name, "model": self.model}
+        metrics = {}
+        try:
+            messages = item.get("messages") or [{"role": "user", "content": item["prompt"]}]
+            record["response"] = self.scheduler.send_chat(session, self.adapter, self.api_key,
+                                                          self.model, messages, token=token,
+                                                          metrics=metrics)
+            record["error"] = None
+        except Exception as e:
+            if self._cancelled.is_set():
+                return None
+            record["response"] = None
+            record["error"] = str(e) or type(e).__name__
+        finally:
+            with self._lock:
+                self._tokens.discard(token)
+            token.finish()
+        record["latency"] = round(time.perf_counter() - start, 3)
+        record["metrics"] = metrics or None
+        return record
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counts[key] += 1
+            counts = dict(self.counts)
+        if self.on_progress:
+            self.on_progress(counts)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Add the batch options to a parser (shared with the llm-gui CLI)"""
+    parser.add_argument("--provider", required=True)
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--input", required=True, help="JSONL or CSV file with prompts")
+    parser.add_argument("--output", required=True, help="JSONL file for the results")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rpm", type=float, default=None, help="Requests per minute limit")
+
+
+def main(argv=None):
+    """Headless entry point"""
+    parser = argparse.ArgumentParser(description="Run a batch of prompts against one model")
+    add_arguments(parser)
+    return run_from_args(parser.parse_args(argv), parser)
+
+
+def run_from_args(args, parser: argparse.ArgumentParser) -> int:
+    """Run a batch from parsed command line options; returns the exit code"""
+    if args.provider not in PROVIDERS:
+        parser.error(f"Unknown provider: {args.provider}")
+    adapter = get_provider(args.provider)
+    api_key = os.environ.get(adapter.env_var)
+    if not api_key:
+        parser.error(f"{adapter.env_var} is not set")
+
+    def report(counts):
+        print(f"\rcompleted {counts['completed']}  failed {counts['failed']}  "
+              f"skipped {counts['skipped']}", end="", file=sys.stderr)
+
+    runner = BatchRunner(args.provider, args.model, api_key, args.concurrency, args.rpm,
+                         on_progress=report)
+    try:
+        counts = runner.run(args.input, args.output)
+    except KeyboardInterrupt:
+        runner.cancel()
+        print("\nInterrupted; run again to resume.", file=sys.stderr)
+        return 1
+    print(file=sys.stderr)
+    return 0 if counts['failed'] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Load benchmark for the LLM GUI request path.
+Drives providers.send_chat through the session pool and request scheduler
+against the local mock provider server and reports throughput, time to
+first token and latency percentiles per provider and concurrency level.
+Runs offline without API keys.
+
+Usage:
+    python benchmark.py --concurrency 1,8,32 --requests 200 --latency 0.05 --token-delay 0.002
+    python benchmark.py --json results.json   # keep results to compare against later runs
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from typing import Dict, List
+
+from http_pool import SessionPool
+from metrics import percentile
+from mock_provider import MockConfig, MockProviderServer
+from providers import PROVIDERS, get_provider
+from request_executor import CancelToken
+from scheduler import RequestScheduler
+
+DEFAULT_CONCURRENCY = (1, 4, 16)
+DEFAULT_REQUESTS = 100
+PROMPT = [{"role": "user", "content": "Benchmark prompt"}]
+
+
+def run_benchmark(base_url: str, provider: str, concurrency: int, requests_count: int,
+                  stream: bool = True, max_retries: int = 4) -> Dict:
+    """
+    Send a number of requests to one provider with a fixed number of workers.
+
+    Args:
+        base_url (str): Base URL of the mock provider server
+        provider (str): Provider whose wire format is used
+        concurrency (int): Number of concurrent workers
+        requests_count (int): Total number of requests
+        stream (bool): Stream the responses
+        max_retries (int): Scheduler retries after 429 and 5xx responses
+
+    Returns:
+        Dict: Request counts, throughput and latency percentiles in milliseconds
+    """
+    adapter = type(get_provider(provider))(base_url)
+    model = adapter.models[0]
+    pool = SessionPool(pool_maxsize=concurrency)
+    scheduler = RequestScheduler(max_in_flight=concurrency, max_retries=max_retries,
+                                 base_delay=0.05, max_delay=2.0)
+    remaining = [requests_count]
+    samples = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker():
+        session = pool.get(provider)
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            metrics = {}
+            token = CancelToken(adapter.deadline)
+            start = time.perf_counter()
+            try:
+                scheduler.send_chat(session, adapter, 'mock-key', model, PROMPT, stream,
+                                    token, metrics=metrics)
+            except Exception as e:
+                with lock:
+                    errors.append(type(e).__name__)
+                continue
+            finally:
+                # Stops the deadline timer thread, which would otherwise outlive the request
+                token.finish()
+            metrics["latency"] = time.perf_counter() - start
+            with lock:
+                samples.append(metrics)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    pool.close()
+
+    latencies = [sample["latency"] for sample in samples]
+    ttfts = [sample["ttft"] for sample in samples]
+    output_tokens = sum(sample.get("output_tokens") or 0 for sample in samples)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 1)
+
+    return {
+        "provider": provider,
+        "concurrency": concurrency,
+        "requests": requests_count,
+        "errors": len(errors),
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(len(samples) / elapsed, 1) if elapsed else None,
+        "tokens_per_sec": round(output_tokens / elapsed, 1) if elapsed else None,
+        "ttft_p50_ms": ms(percentile(ttfts, 0.5)),
+        "ttft_p99_ms": ms(percentile(ttfts, 0.99)),
+        "latency_p50_ms": ms(percentile(latencies, 0.5)),
+        "latency_p95_ms": ms(percentile(latencies, 0.95)),
+        "latency_p99_ms": ms(percentile(latencies, 0.99)),
+    }
+
+
+def format_table(rows: List[Dict]) -> str:
+    """Render benchmark rows as a fixed-width text table"""
+    columns = ["provider", "concurrency", "requests", "errors", "requests_per_sec", "tokens_per_sec",
+               "ttft_p50_ms", "ttft_p99_ms", "latency_p50_ms", "latency_p95_ms", "latency_p99_ms"]
+    cells = [columns] + [["-" if row[column] is None else str(row[column]) for column in columns]
+                         for row in rows]
+    widths = [max(len(line[i]) for line in cells) for i in range(len(columns))]
+    return "\n".join("  ".join(cell.rjust(width) for cell, width in zip(line, widths)) for line in cells)
+
+
+def main(argv=None):
+    """Start a mock server, run the benchmark matrix and print the results"""
+    parser = argparse.ArgumentParser(description="Benchmark the chat request path against a mock provider")
+    parser.add_argument("--providers", default=",".join(PROVIDERS),
+                        help="Comma separated providers (default: all)")
+    parser.add_argument("--concurrency", default=",".join(map(str, DEFAULT_CONCURRENCY)),
+                        help="Comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS, help="Requests per run")
+    parser.add_argument("--no-stream", action="store_true", help="Use buffered instead of streamed responses")
+    parser.add_argument("--latency", type=float, default=0.02, help="Server seconds before headers")
+    parser.add_argument("--token-delay", type=float, default=0.001, help="Server seconds between chunks")
+    parser.add_argument("--chunks", type=int, default=50, help="Words per answer")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    providers = [name.strip() for name in args.providers.split(",") if name.strip()]
+    for name in providers:
+        if name not in PROVIDERS:
+            parser.error(f"Unknown provider: {name}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    config = MockConfig(args.latency, args.token_delay, args.chunks, args.error_rate,
+                        args.rate_limit_rate, args.retry_after, args.seed)
+    rows = []
+    with MockProviderServer(config) as server:
+        for provider in providers:
+            for level in levels:
+                rows.append(run_benchmark(server.url, provider, level, args.requests,
+                                          stream=not args.no_stream))
+                print(f"{provider} x{level} done", file=sys.stderr)
+
+    print(format_table(rows))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+    return 0 if all(row["errors"] == 0 for row in rows) else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
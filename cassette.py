@@ -0,0 +1,335 @@
+"""
+Record/replay cassettes for the LLM GUI application.
+Records provider HTTP exchanges and Aider model completions into a compact
+gzip-compressed JSONL file and replays them deterministically, either with
+the recorded timing or as fast as possible. API keys and credential headers
+are scrubbed before anything is written.
+
+Enable with environment variables:
+    LLM_GUI_CASSETTE=path/to/session.jsonl.gz
+    LLM_GUI_CASSETTE_MODE=record | replay      (default: replay)
+    LLM_GUI_CASSETTE_TIMING=1                   (replay timing factor, 0 = as fast as possible)
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Dict, Iterator, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from streaming import DONE_MARKER
+
+SCRUBBED = "<scrubbed>"
+# Request headers that carry credentials; their values are scrubbed wherever they appear
+SECRET_HEADERS = {"authorization", "x-api-key", "x-goog-api-key", "api-key"}
+# Response headers that are never written to a cassette
+DROPPED_HEADERS = {"set-cookie", "cookie", "authorization"}
+SECRET_PARAMS = {"key", "api_key", "apikey", "access_token"}
+
+
+class CassetteMiss(RuntimeError):
+    """Raised when a replayed request was never recorded"""
+
+
+def request_key(method: str, url: str, body) -> str:
+    """Hash of a request that ignores the host and credentials, so replays work behind base URL overrides"""
+    parts = urlsplit(url)
+    query = [(name, value) for name, value in parse_qsl(parts.query) if name.lower() not in SECRET_PARAMS]
+    payload = json.dumps([method.upper(), parts.path, sorted(query), body],
+                         sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def scrub_url(url: str) -> str:
+    """Path and query of a URL without the host and credential parameters"""
+    parts = urlsplit(url)
+    query = [(name, SCRUBBED if name.lower() in SECRET_PARAMS else value)
+             for name, value in parse_qsl(parts.query)]
+    return parts.path + ("?" + urlencode(query) if query else "")
+
+
+class Cassette:
+    """A file of recorded interactions"""
+
+    def __init__(self, path: str, mode: str = 'replay', timing: float = 0.0):
+        """
+        Args:
+            path (str): Cassette file (gzip-compressed JSONL)
+            mode (str): 'record' appends new interactions, 'replay' serves recorded ones
+            timing (float): Replay delay factor; 1.0 keeps the recorded timing, 0 replays instantly
+        """
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.timing = timing
+        self.secrets = set()
+        self.interactions: Dict[str, deque] = defaultdict(deque)
+        self._lock = threading.Lock()
+        if mode == 'replay':
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+
+    def add_secret(self, value: str):
+        """Remember a credential so it is scrubbed from everything recorded"""
+        if value and len(value) >= 4:
+            self.secrets.add(value)
+
+    def scrub(self, text: str) -> str:
+        """Replace known credentials in a text"""
+        for secret in self.secrets:
+            text = text.replace(secret, SCRUBBED)
+        return text
+
+    def record(self, interaction: Dict):
+        """Append one interaction to the cassette file"""
+        line = self.scrub(json.dumps(interaction, ensure_ascii=False, separators=(',', ':'))) + "\n"
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Every record is its own gzip member; concatenated members read back as one stream
+            with open(self.path, 'ab') as f:
+                f.write(gzip.compress(line.encode('utf-8')))
+
+    def take(self, key: str, description: str) -> Dict:
+        """Next recorded interaction for a request key; repeated requests replay in recorded order"""
+        with self._lock:
+            recorded = self.interactions.get(key)
+            if not recorded:
+                raise CassetteMiss(f"No recorded response for {description} in {self.path}")
+            interaction = recorded.popleft()
+            # Keep the last answer available for further identical requests
+            if not recorded:
+                recorded.append(interaction)
+            return interaction
+
+    def sleep_until(self, start: float, offset: float, stopped: threading.Event = None):
+        """Wait until the scaled recorded offset has passed since start"""
+        if not self.timing:
+            return
+        delay = start + offset * self.timing - time.monotonic()
+        if delay > 0:
+            if stopped:
+                stopped.wait(delay)
+            else:
+                time.sleep(delay)
+
+    def wrap_model(self, model):
+        """
+        Record or replay the completions of an Aider model.
+
+        Replaces ``model.send_completion`` on the instance; Aider calls it with the
+        messages first and expects ``(hash_object, completion)`` back.
+        """
+        send_completion = model.send_completion
+        name = model.name
+
+        def wrapped(messages, *args, **kwargs):
+            key = request_key("AIDER", name, messages)
+            if self.replaying:
+                interaction = self.take(key, f"Aider completion of {name}")
+                from litellm import ModelResponse
+                return hashlib.sha1(key.encode('utf-8')), ModelResponse(**interaction["completion"])
+
+            start = time.monotonic()
+            hash_object, completion = send_completion(messages, *args, **kwargs)
+            data = completion.model_dump() if hasattr(completion, "model_dump") else dict(completion)
+            self.record({"key": key, "kind": "aider", "model": name,
+                         "elapsed": round(time.monotonic() - start, 3), "completion": data})
+            return hash_object, completion
+
+        model.send_completion = wrapped
+        return model
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Cassette {self.path} not found")
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    interaction = json.loads(line)
+                    self.interactions[interaction["key"]].append(interaction)
+
+
+class RecordingResponse:
+    """Passes a real response through and records what was read from it"""
+
+    def __init__(self, cassette: Cassette, response, interaction: Dict, start: float):
+        self._cassette = cassette
+        self._response = response
+        self._interaction = interaction
+        self._start = start
+        self._complete = False
+        self.status_code = response.status_code
+        self.headers = response.headers
+        interaction["status"] = response.status_code
+        interaction["headers"] = {name: value for name, value in response.headers.items()
+                                  if name.lower() not in DROPPED_HEADERS}
+        interaction["connect"] = round(time.monotonic() - start, 4)
+
+    @property
+    def text(self) -> str:
+        text = self._response.text
+        self._interaction["body"] = text
+        self._complete = True
+        return text
+
+    def json(self):
+        return json.loads(self.text)
+
+    def iter_lines(self) -> Iterator:
+        lines = self._interaction.setdefault("lines", [])
+        for line in self._response.iter_lines():
+            decoded = line.decode('utf-8') if isinstance(line, bytes) else line
+            lines.append([round(time.monotonic() - self._start, 4), decoded])
+            # Readers stop at the [DONE] marker without exhausting the stream
+            if decoded.strip() == f"data: {DONE_MARKER}":
+                self._complete = True
+            yield line
+        self._complete = True
+
+    def close(self):
+        self._response.close()
+        # Cancelled or failed reads are not recorded; a replay must see complete answers
+        if self._complete:
+            self._complete = False
+            self._cassette.record(self._interaction)
+
+
+class ReplayResponse:
+    """Serves a recorded response with the requests API used by providers.send_chat"""
+
+    def __init__(self, cassette: Cassette, interaction: Dict, start: float):
+        self._cassette = cassette
+        self._interaction = interaction
+        self._start = start
+        self._closed = threading.Event()
+        self.status_code = interaction["status"]
+        self.headers = CaseInsensitiveHeaders(interaction.get("headers", {}))
+
+    @property
+    def text(self) -> str:
+        return self._interaction.get("body", "")
+
+    def json(self):
+        return json.loads(self.text)
+
+    def iter_lines(self) -> Iterator[str]:
+        for offset, line in self._interaction.get("lines", []):
+            self._cassette.sleep_until(self._start, offset, self._closed)
+            if self._closed.is_set():
+                return
+            yield line
+
+    def close(self):
+        self._closed.set()
+
+
+class CaseInsensitiveHeaders(dict):
+    """Minimal case-insensitive header mapping for replayed responses"""
+
+    def __init__(self, headers: Dict):
+        super().__init__({name.lower(): value for name, value in headers.items()})
+
+    def get(self, name, default=None):
+        return super().get(name.lower(), default)
+
+    def __getitem__(self, name):
+        return super().__getitem__(name.lower())
+
+    def __contains__(self, name):
+        return super().__contains__(name.lower())
+
+
+class CassetteSession:
+    """Session wrapper that records or replays provider requests"""
+
+    def __init__(self, cassette: Cassette, session=None):
+        self.cassette = cassette
+        self.session = session
+
+    def post(self, url, headers=None, json=None, timeout=None, stream=False, **kwargs):
+        for name, value in (headers or {}).items():
+            if name.lower() in SECRET_HEADERS:
+                self.cassette.add_secret(value.split(" ", 1)[-1])
+        key = request_key("POST", url, json)
+        start = time.monotonic()
+
+        if self.cassette.replaying:
+            interaction = self.cassette.take(key, f"POST {scrub_url(url)}")
+            self.cassette.sleep_until(start, interaction.get("connect", 0))
+            return ReplayResponse(self.cassette, interaction, start)
+
+        response = self.session.post(url, headers=headers, json=json, timeout=timeout, stream=stream, **kwargs)
+        interaction = {"key": key, "kind": "http", "method": "POST", "url": scrub_url(url)}
+        return RecordingResponse(self.cassette, response, interaction, start)
+
+    def head(self, url, **kwargs):
+        if self.session is not None and not self.cassette.replaying:
+            return self.session.head(url, **kwargs)
+        return None
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+
+
+class CassettePool:
+    """SessionPool wrapper that hands out cassette sessions"""
+
+    def __init__(self, pool, cassette: Cassette):
+        """
+        Args:
+            pool (SessionPool): Pool of the real sessions used while recording
+            cassette (Cassette): Cassette to record to or replay from
+        """
+        self.pool = pool
+        self.cassette = cassette
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def configure(self, provider: str, *args, **kwargs):
+        self.pool.configure(provider, *args, **kwargs)
+
+    def get(self, provider: str) -> CassetteSession:
+        with self._lock:
+            session = self._sessions.get(provider)
+            if session is None:
+                real = None if self.cassette.replaying else self.pool.get(provider)
+                session = self._sessions[provider] = CassetteSession(self.cassette, real)
+            return session
+
+    def prewarm(self, provider: str, url: str):
+        # Replays never touch the network
+        if not self.cassette.replaying:
+            return self.pool.prewarm(provider, url)
+        return None
+
+    def close(self):
+        self.pool.close()
+
+
+_env_cassette = None
+_env_lock = threading.Lock()
+
+
+def cassette_from_env() -> Optional[Cassette]:
+    """The cassette configured by LLM_GUI_CASSETTE, shared by the whole process; None if unset"""
+    global _env_cassette
+    path = os.environ.get("LLM_GUI_CASSETTE")
+    if not path:
+        return None
+    with _env_lock:
+        if _env_cassette is None or _env_cassette.path != path:
+            mode = os.environ.get("LLM_GUI_CASSETTE_MODE", "replay")
+            timing = float(os.environ.get("LLM_GUI_CASSETTE_TIMING", "0") or 0)
+            _env_cassette = Cassette(path, mode, timing)
+        return _env_cassette
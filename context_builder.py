@@ -0,0 +1,99 @@
+"""
+Context window management for the LLM GUI application.
+Builds the message history sent with each request so that follow-up
+questions keep their context while staying inside the model's token budget.
+The window start only moves in larger steps, so the prefix of the history
+stays identical between turns and providers can serve it from their prompt cache.
+"""
+
+from bisect import bisect_left
+from typing import Callable, Dict, List
+
+# Rough per-message overhead for role markers and separators
+MESSAGE_OVERHEAD_TOKENS = 4
+# Share of the budget freed when the window has to slide, so its start stays put for the next turns
+CACHE_HEADROOM = 0.25
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+class ContextBuilder:
+    """
+    Sliding-window history builder with cached per-message token counts.
+
+    Messages are only ever appended to a conversation, so the builder keeps
+    the counts of the messages it has seen together with their prefix sums
+    and only counts new messages on each turn. The window keeps its start
+    until the budget is exceeded and then drops enough old turns to leave
+    headroom, because every move of the start invalidates the provider's
+    cached prompt prefix.
+    """
+
+    def __init__(self, token_counter: Callable[[str], int] = estimate_tokens,
+                 cache_headroom: float = CACHE_HEADROOM):
+        """
+        Args:
+            token_counter (Callable): Returns the token count of a text
+            cache_headroom (float): Share of the budget freed when the window slides; 0 slides turn by turn
+        """
+        self.token_counter = token_counter
+        self.cache_headroom = cache_headroom
+        self._conversation = None
+        self._prefix_sums = [0]
+        self._start = 0
+        self._budget = None
+
+    def count(self, message: Dict) -> int:
+        """Token count of a single message including its overhead"""
+        return self.token_counter(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+    def build(self, conversation, budget: int) -> List[Dict]:
+        """
+        Build the messages to send for a conversation.
+
+        Args:
+            conversation (Conversation): Conversation whose history is sent
+            budget (int): Maximum number of prompt tokens
+
+        Returns:
+            List[Dict]: The newest messages that fit into the budget, oldest first
+        """
+        messages = conversation.messages
+        prefix_sums = self._sync(conversation)
+        total = prefix_sums[-1]
+
+        start = self._start
+        if budget != self._budget:
+            self._budget = budget
+            start = bisect_left(prefix_sums, total - budget)
+        elif total - prefix_sums[start] > budget:
+            # Oldest message that leaves the headroom free: smallest start with
+            # total - prefix_sums[start] <= budget * (1 - headroom)
+            start = bisect_left(prefix_sums, total - budget * (1 - self.cache_headroom))
+
+        # Always send the latest message, even if it alone exceeds the budget
+        start = min(start, len(messages) - 1)
+
+        # The window must open with a user turn
+        while start < len(messages) - 1 and messages[start]["role"] != "user":
+            start += 1
+        self._start = start = max(start, 0)
+
+        return [{"role": m["role"], "content": m["content"]} for m in messages[start:]]
+
+    def _sync(self, conversation) -> List[int]:
+        """Count the messages added since the last call and return the prefix sums"""
+        messages = conversation.messages
+        if conversation is not self._conversation or len(messages) < len(self._prefix_sums) - 1:
+            self._conversation = conversation
+            self._prefix_sums = [0]
+            self._start = 0
+            self._budget = None
+
+        prefix_sums = self._prefix_sums
+        for message in messages[len(prefix_sums) - 1:]:
+            prefix_sums.append(prefix_sums[-1] + self.count(message))
+        return prefix_sums
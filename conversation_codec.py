@@ -0,0 +1,209 @@
+"""
+Binary conversation snapshots for the LLM GUI application.
+A snapshot starts with a magic number and format version, followed by a JSON
+header with the conversation's metadata, a table of message offsets and the
+messages themselves, optionally zlib-compressed. The header is readable
+without touching the messages, and messages are only decoded when accessed.
+JSON is encoded with orjson when it is installed; legacy JSON conversation
+files stay readable.
+"""
+
+import json
+import struct
+import sys
+import zlib
+from array import array
+from collections.abc import MutableSequence
+from typing import Dict, Iterable, Union
+
+from conversation_index import make_preview
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MAGIC = b"LLMCONV"
+FORMAT_VERSION = 1
+FLAG_ZLIB = 1
+# Magic, version, flags and header length
+PREAMBLE = struct.Struct("<7sBBI")
+
+
+def dumps(value) -> bytes:
+    """Compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data: Union[bytes, memoryview]):
+    """Parse UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(bytes(data))
+
+
+class LazyMessages(MutableSequence):
+    """Message list that decodes each message on first access"""
+
+    def __init__(self, items: list):
+        # Decoded messages are dicts, the others still the encoded bytes
+        self._items = items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._items)))]
+        item = self._items[index]
+        if not isinstance(item, dict):
+            item = self._items[index] = loads(item)
+        return item
+
+    def __iter__(self):
+        items = self._items
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                item = items[index] = loads(item)
+            yield item
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = list(value)
+        self._items[index] = value
+
+    def __delitem__(self, index):
+        del self._items[index]
+
+    def insert(self, index, value):
+        self._items.insert(index, value)
+
+    def __copy__(self):
+        return LazyMessages(list(self._items))
+
+    def __eq__(self, other):
+        if isinstance(other, (list, LazyMessages)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"LazyMessages({len(self._items)} messages)"
+
+    def encoded(self) -> Iterable[bytes]:
+        """Encoded messages; undecoded ones are passed through without decoding"""
+        for item in self._items:
+            yield dumps(item) if isinstance(item, dict) else bytes(item)
+
+
+def encode_conversation(data: Dict, header: Dict = None, compress: bool = False) -> bytes:
+    """
+    Encode a conversation as a snapshot.
+
+    Args:
+        data (Dict): Conversation in the format of Conversation.to_dict
+        header (Dict, optional): Extra header fields, e.g. the journal sequence number
+        compress (bool): zlib-compress the messages
+
+    Returns:
+        bytes: The snapshot
+    """
+    messages = data["messages"]
+    encoded = list(messages.encoded()) if isinstance(messages, LazyMessages) else \
+        [dumps(message) for message in messages]
+    offsets = array('Q')
+    end = 0
+    for message in encoded:
+        end += len(message)
+        offsets.append(end)
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+    body = b"".join(encoded)
+    if compress:
+        body = zlib.compress(body, 6)
+
+    fields = {
+        "id": data["id"],
+        "provider": data["provider"],
+        "model": data["model"],
+        "timestamp": data["timestamp"],
+        "metadata": data.get("metadata", {}),
+        "message_count": len(encoded),
+        # Lazy messages are only decoded up to the first prompt
+        "preview": make_preview(next((message["content"] for message in messages
+                                      if message["role"] == "user"), "")),
+    }
+    fields.update(header or {})
+    head = dumps(fields)
+    flags = FLAG_ZLIB if compress else 0
+    return PREAMBLE.pack(MAGIC, FORMAT_VERSION, flags, len(head)) + head + offsets.tobytes() + body
+
+
+def decode_conversation(raw: bytes) -> Dict:
+    """
+    Decode a snapshot or a legacy JSON conversation.
+
+    Returns:
+        Dict: The conversation in the format of Conversation.to_dict, messages decoded lazily,
+        plus the extra header fields
+    """
+    if not raw.startswith(MAGIC):
+        return json.loads(raw.decode('utf-8'))
+    fields, offset = _read_header(raw)
+    count = fields.pop("message_count")
+    fields.pop("preview")
+    offsets = array('Q')
+    offsets.frombytes(raw[offset:offset + 8 * count])
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+    body = memoryview(raw)[offset + 8 * count:]
+    if fields.pop("flags") & FLAG_ZLIB:
+        body = memoryview(zlib.decompress(body))
+
+    items = []
+    start = 0
+    for end in offsets:
+        items.append(body[start:end])
+        start = end
+    fields["messages"] = LazyMessages(items)
+    return fields
+
+
+def read_header(path: str) -> Dict:
+    """
+    Read the metadata of a snapshot without its messages.
+
+    Returns:
+        Dict: id, provider, model, timestamp, metadata, message_count, preview and the extra fields
+    """
+    with open(path, 'rb') as f:
+        preamble = f.read(PREAMBLE.size)
+        if not preamble.startswith(MAGIC):
+            # Legacy JSON has no separate header
+            data = json.loads((preamble + f.read()).decode('utf-8'))
+            messages = data.pop("messages")
+            data["message_count"] = len(messages)
+            data["preview"] = make_preview(next((m["content"] for m in messages if m["role"] == "user"), ""))
+            return data
+        fields, _ = _read_header(preamble + f.read(_unpack_preamble(preamble)[2]))
+    fields.pop("flags")
+    return fields
+
+
+def _unpack_preamble(raw: bytes):
+    """Format version, flags and header length"""
+    if len(raw) < PREAMBLE.size:
+        raise ValueError("Truncated conversation file")
+    _, version, flags, length = PREAMBLE.unpack_from(raw)
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Conversation format {version} is newer than this version supports")
+    return version, flags, length
+
+
+def _read_header(raw: bytes):
+    """Header fields and the offset after the header"""
+    _, flags, length = _unpack_preamble(raw)
+    fields = loads(raw[PREAMBLE.size:PREAMBLE.size + length])
+    fields["flags"] = flags
+    return fields, PREAMBLE.size + length
@@ -0,0 +1,285 @@
+"""
+SQLite conversation storage for the LLM GUI application.
+Stores conversations and their messages in one database in WAL mode, with
+an FTS5 index over the message texts for ranked full-text search across all
+conversations. It offers the same store interface as the JSON journal, so
+ConversationManager can use either; existing JSON conversations are imported
+once when the database is created.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+
+from conversation_index import SORT_KEYS, make_entry, make_preview
+
+DEFAULT_FILENAME = "conversations.db"
+SCHEMA_VERSION = 1
+SEARCH_LIMIT = 50
+# Tokens of context around a search hit
+SNIPPET_TOKENS = 12
+# Message fields with their own columns; other fields such as metrics are kept as JSON
+MESSAGE_COLUMNS = ("role", "content", "timestamp")
+
+# The prefix indexes keep search-as-you-type fast; the last word of a search is a prefix query
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    message_count INTEGER NOT NULL DEFAULT 0,
+    preview TEXT NOT NULL DEFAULT '',
+    bytes INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS conversations_timestamp ON conversations (timestamp);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    conversation_id TEXT NOT NULL REFERENCES conversations (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT,
+    extra TEXT,
+    UNIQUE (conversation_id, position)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5 (
+    content, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS messages_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_update AFTER UPDATE OF content ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+
+def fts_query(text: str) -> str:
+    """FTS5 query matching all words of a search text; the last word also matches as a prefix"""
+    words = ['"' + word.replace('"', '""') + '"' for word in text.split()]
+    if words:
+        words[-1] += "*"
+    return " ".join(words)
+
+
+def _message_row(conversation_id: str, position: int, message: Dict):
+    extra = {key: value for key, value in message.items() if key not in MESSAGE_COLUMNS}
+    return (conversation_id, position, message["role"], message["content"], message.get("timestamp"),
+            json.dumps(extra, ensure_ascii=False) if extra else None)
+
+
+class SqliteConversationStore:
+    """Conversations in a SQLite database with full-text search"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Database file; created with its schema if missing
+        """
+        self.path = path
+        # One connection shared by the Tk thread and background savers, serialized by the lock
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self.connection:
+            # WAL lets searches read while a save writes; NORMAL sync is durable across application crashes
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute("PRAGMA foreign_keys=ON")
+            self.connection.executescript(SCHEMA)
+            self.connection.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('schema_version', ?)",
+                                    (str(SCHEMA_VERSION),))
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self.connection.close()
+
+    def sync(self):
+        """Checkpoint the write-ahead log; commits are only forced to disk at checkpoints"""
+        with self._lock:
+            self.connection.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def save(self, conversation):
+        """
+        Insert the messages added since the last save in one transaction.
+
+        Args:
+            conversation (Conversation): Conversation to save
+        """
+        data = conversation.to_dict()
+        with self._lock, self.connection:
+            self._write(data)
+
+    def load(self, conversation_id: str) -> Dict:
+        """
+        Read a conversation.
+
+        Args:
+            conversation_id (str): Conversation to read
+
+        Returns:
+            Dict: The conversation in the format of Conversation.to_dict
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT id, provider, model, timestamp, metadata FROM conversations WHERE id = ?",
+                (conversation_id,)).fetchone()
+            if row is None:
+                raise FileNotFoundError(f"Conversation {conversation_id} not found")
+            rows = self.connection.execute(
+                "SELECT role, content, timestamp, extra FROM messages WHERE conversation_id = ? ORDER BY position",
+                (conversation_id,)).fetchall()
+
+        messages = []
+        for role, content, timestamp, extra in rows:
+            message = {"role": role, "content": content, "timestamp": timestamp}
+            if extra:
+                message.update(json.loads(extra))
+            messages.append(message)
+        return {"id": row[0], "provider": row[1], "model": row[2], "timestamp": row[3],
+                "messages": messages, "metadata": json.loads(row[4])}
+
+    def conversation_ids(self) -> List[str]:
+        """Ids of all stored conversations"""
+        with self._lock:
+            return [row[0] for row in self.connection.execute("SELECT id FROM conversations")]
+
+    def list(self, offset: int = 0, limit: int = None, sort_by: str = "timestamp",
+             reverse: bool = True) -> List[Dict]:
+        """
+        Metadata of the stored conversations, without reading their messages.
+
+        Args:
+            offset (int): Number of entries to skip
+            limit (int, optional): Maximum number of entries, defaults to all
+            sort_by (str): Field to sort by
+            reverse (bool): Sort descending, e.g. newest first
+
+        Returns:
+            List[Dict]: Entries with id, timestamp, provider, model, message_count, preview and bytes
+        """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"Cannot sort conversations by {sort_by}")
+        order = "DESC" if reverse else "ASC"
+        with self._lock:
+            cursor = self.connection.execute(
+                "SELECT id, timestamp, provider, model, message_count, preview, bytes FROM conversations "
+                f"ORDER BY {sort_by} {order}, id {order} LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset))
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor]
+
+    def search(self, text: str, limit: int = SEARCH_LIMIT) -> List[Dict]:
+        """
+        Find messages containing all words of a text, best matches first.
+
+        Args:
+            text (str): Words to search for; the last one also matches as a prefix
+            limit (int): Maximum number of hits
+
+        Returns:
+            List[Dict]: Hits with id, timestamp, provider and model of the conversation and the
+            position, role and a snippet of the message, the matched words in [brackets]
+        """
+        query = fts_query(text)
+        if not query:
+            return []
+        with self._lock:
+            cursor = self.connection.execute(
+                "SELECT c.id, c.timestamp, c.provider, c.model, m.position, m.role, "
+                f"snippet(messages_fts, 0, '[', ']', '...', {SNIPPET_TOKENS}) AS snippet "
+                "FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid "
+                "JOIN conversations c ON c.id = m.conversation_id "
+                "WHERE messages_fts MATCH ? ORDER BY rank LIMIT ?",
+                (query, limit))
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor]
+
+    def rebuild_index(self):
+        """Recompute the conversation metadata and the full-text index from the messages"""
+        with self._lock, self.connection:
+            self.connection.execute(
+                "UPDATE conversations SET "
+                "message_count = (SELECT COUNT(*) FROM messages m WHERE m.conversation_id = conversations.id), "
+                "bytes = (SELECT COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0) FROM messages m "
+                "WHERE m.conversation_id = conversations.id), "
+                "preview = COALESCE((SELECT content FROM messages m WHERE m.conversation_id = conversations.id "
+                "AND role = 'user' ORDER BY position LIMIT 1), '')")
+            rows = self.connection.execute("SELECT id, preview FROM conversations").fetchall()
+            # Previews are shortened and whitespace-normalized like the JSON index
+            self.connection.executemany("UPDATE conversations SET preview = ? WHERE id = ?",
+                                        [(make_preview(preview), conversation_id) for conversation_id, preview in rows])
+            self.connection.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+
+    def is_migrated(self) -> bool:
+        """True once the JSON conversations were imported"""
+        with self._lock:
+            return self.connection.execute(
+                "SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone() is not None
+
+    def migrate(self, source) -> int:
+        """
+        Import all conversations of another store in one transaction.
+
+        Conversations that already exist in the database are skipped, so an
+        interrupted migration can simply be run again.
+
+        Args:
+            source (ConversationJournal): Store to import from
+
+        Returns:
+            int: Number of imported conversations
+        """
+        imported = 0
+        with self._lock, self.connection:
+            existing = {row[0] for row in self.connection.execute("SELECT id FROM conversations")}
+            for conversation_id in source.conversation_ids():
+                if conversation_id in existing:
+                    continue
+                try:
+                    data = source.load(conversation_id)
+                except (OSError, ValueError, KeyError):
+                    continue  # Unreadable files stay where they are
+                self._write(data)
+                imported += 1
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)",
+                                    (str(time.time()),))
+        return imported
+
+    def _write(self, data: Dict):
+        """Insert or extend a conversation; callers hold the lock and a transaction"""
+        conversation_id = data["id"]
+        messages = data["messages"]
+        row = self.connection.execute("SELECT message_count, bytes FROM conversations WHERE id = ?",
+                                      (conversation_id,)).fetchone()
+        stored, size = row if row else (0, 0)
+        if stored > len(messages):
+            # The history was edited rather than extended; store it again
+            self.connection.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+            stored, size = 0, 0
+
+        new = messages[stored:]
+        size += sum(len(message["content"].encode('utf-8')) for message in new)
+        preview = make_entry(data, size)["preview"]
+        self.connection.execute(
+            "INSERT INTO conversations (id, timestamp, provider, model, metadata, message_count, preview, bytes) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET metadata = excluded.metadata, "
+            "message_count = excluded.message_count, preview = excluded.preview, bytes = excluded.bytes",
+            (conversation_id, data["timestamp"], data["provider"], data["model"],
+             json.dumps(data.get("metadata", {}), ensure_ascii=False), len(messages), preview, size))
+        self.connection.executemany(
+            "INSERT INTO messages (conversation_id, position, role, content, timestamp, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [_message_row(conversation_id, position, message) for position, message in enumerate(new, stored)])
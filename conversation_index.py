@@ -0,0 +1,188 @@
+"""
+Conversation metadata index for the LLM GUI application.
+Keeps one small entry per conversation (id, timestamp, provider, model,
+message count, first prompt preview, size on disk) in an append-only JSONL
+file, so listing, sorting and paging conversations never reads their messages.
+"""
+
+import json
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+INDEX_FILENAME = "index.jsonl"
+INDEX_VERSION = 1
+PREVIEW_CHARS = 80
+# Rewrite the index once it holds this many superseded lines per entry
+COMPACT_RATIO = 2
+SORT_KEYS = ("timestamp", "provider", "model", "message_count", "bytes")
+
+
+def make_preview(text: str) -> str:
+    """One-line preview of a prompt"""
+    preview = " ".join(text.split())
+    if len(preview) > PREVIEW_CHARS:
+        preview = preview[:PREVIEW_CHARS - 3] + "..."
+    return preview
+
+
+def make_entry(data: Dict, size: int) -> Dict:
+    """
+    Index entry of a conversation.
+
+    Args:
+        data (Dict): Conversation in the format of Conversation.to_dict, or a snapshot header
+            with message_count and preview instead of the messages
+        size (int): Bytes the conversation takes on disk
+
+    Returns:
+        Dict: The entry
+    """
+    if "messages" in data:
+        message_count = len(data["messages"])
+        preview = make_preview(next((message["content"] for message in data["messages"]
+                                     if message["role"] == "user"), ""))
+    else:
+        message_count, preview = data["message_count"], data["preview"]
+    return {
+        "id": data["id"],
+        "timestamp": data["timestamp"],
+        "provider": data["provider"],
+        "model": data["model"],
+        "message_count": message_count,
+        "preview": preview,
+        "bytes": size,
+    }
+
+
+class ConversationIndex:
+    """Metadata entries of all conversations in a directory"""
+
+    def __init__(self, save_dir: str):
+        """
+        Args:
+            save_dir (str): Directory of the conversations and the index file
+        """
+        self.path = os.path.join(save_dir, INDEX_FILENAME)
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._lines = 0
+        self._lock = threading.Lock()
+
+    def update(self, entry: Dict):
+        """Add or replace the entry of a conversation"""
+        with self._lock:
+            entries = self._load()
+            if entries.get(entry["id"]) == entry:
+                return
+            entries[entry["id"]] = entry
+            self._append([entry])
+
+    def remove(self, conversation_ids: Iterable[str]):
+        """Drop the entries of conversations that no longer exist"""
+        with self._lock:
+            entries = self._load()
+            removed = [{"id": conversation_id, "deleted": True}
+                       for conversation_id in conversation_ids if entries.pop(conversation_id, None)]
+            if removed:
+                self._append(removed)
+
+    def ids(self) -> List[str]:
+        """Ids of the indexed conversations"""
+        with self._lock:
+            return list(self._load())
+
+    def page(self, offset: int = 0, limit: int = None, sort_by: str = "timestamp",
+             reverse: bool = True) -> List[Dict]:
+        """
+        Sorted slice of the entries.
+
+        Args:
+            offset (int): Number of entries to skip
+            limit (int, optional): Maximum number of entries, defaults to all
+            sort_by (str): Entry field to sort by, one of SORT_KEYS
+            reverse (bool): Sort descending, e.g. newest first
+
+        Returns:
+            List[Dict]: Copies of the entries
+        """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"Cannot sort conversations by {sort_by}")
+        with self._lock:
+            entries = sorted(self._load().values(), key=lambda entry: (entry[sort_by], entry["id"]),
+                             reverse=reverse)
+        end = None if limit is None else offset + limit
+        return [dict(entry) for entry in entries[offset:end]]
+
+    def rebuild(self, conversation_ids: Iterable[str], read_entry: Callable[[str], Optional[Dict]]):
+        """
+        Replace the index with freshly read entries.
+
+        Args:
+            conversation_ids (Iterable[str]): Conversations to index
+            read_entry (Callable): Returns the entry of a conversation, None if it cannot be read
+        """
+        entries = {}
+        for conversation_id in conversation_ids:
+            entry = read_entry(conversation_id)
+            if entry is not None:
+                entries[entry["id"]] = entry
+        with self._lock:
+            self._entries = entries
+            self._rewrite()
+
+    def _append(self, records: List[Dict]):
+        """Append records; callers hold the lock"""
+        if not os.path.exists(self.path):
+            self._rewrite()  # A new index starts with its version line
+            return
+        data = ''.join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(data)
+        self._lines += len(records)
+        if self._lines > COMPACT_RATIO * len(self._entries) + 100:
+            self._rewrite()
+
+    def _rewrite(self):
+        """Write one line per entry atomically; callers hold the lock"""
+        lines = [json.dumps({"version": INDEX_VERSION}) + "\n"]
+        lines.extend(json.dumps(entry, ensure_ascii=False) + "\n" for entry in self._entries.values())
+        temp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+        os.replace(temp_path, self.path)
+        self._lines = len(self._entries)
+
+    def _load(self) -> Dict[str, Dict]:
+        """Read the index file on first use; callers hold the lock"""
+        if self._entries is not None:
+            return self._entries
+        self._entries = {}
+        self._lines = 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return self._entries
+
+        valid = True
+        for line in lines:
+            try:
+                record = json.loads(line) if line.endswith("\n") else None
+            except ValueError:
+                record = None
+            if record is None:
+                valid = False  # Torn by a crash
+                break
+            if "version" in record:
+                if record["version"] != INDEX_VERSION:
+                    self._entries = {}
+                    valid = False
+                    break
+            elif record.get("deleted"):
+                self._entries.pop(record["id"], None)
+            else:
+                self._entries[record["id"]] = record
+            self._lines += 1
+        if not valid:
+            self._rewrite()
+        return self._entries
@@ -0,0 +1,314 @@
+"""
+Append-only conversation storage for the LLM GUI application.
+Every conversation has a binary snapshot and a JSONL journal next to it.
+Saving appends one record per new message or metadata change to the journal,
+so each turn costs O(1) disk work, and the journal is compacted into a new
+snapshot once it outgrows the snapshot. Loading replays the journal on top of
+the snapshot and drops a record torn by a crash. Every save also updates the
+metadata index, which lists conversations without reading them. Snapshots use
+the format of conversation_codec; JSON snapshots of older versions are still
+read and replaced by the new format on their next compaction.
+"""
+
+import copy
+import os
+import threading
+from typing import Dict, List, Optional
+
+from conversation_codec import decode_conversation, dumps, encode_conversation, loads, read_header
+from conversation_index import ConversationIndex, make_entry, make_preview
+
+SNAPSHOT_PREFIX = "conversation_"
+SNAPSHOT_SUFFIX = ".conv"
+LEGACY_SUFFIX = ".json"
+JOURNAL_SUFFIX = ".jsonl"
+# Compress the messages of snapshots; smaller files for slightly slower saves and loads
+COMPRESS_SNAPSHOTS = os.environ.get("LLM_GUI_COMPRESS_SNAPSHOTS", "") == "1"
+# Journals smaller than this are never compacted
+COMPACT_MIN_BYTES = 64 * 1024
+
+
+class _Persisted:
+    """What the files of a conversation hold, so a save only appends the difference"""
+
+    def __init__(self, messages: int, metadata: Dict, seq: int, snapshot_bytes: int, journal_bytes: int):
+        self.messages = messages
+        self.metadata = metadata
+        self.seq = seq
+        self.snapshot_bytes = snapshot_bytes
+        self.journal_bytes = journal_bytes
+
+
+class ConversationJournal:
+    """Snapshot plus append-only journal per conversation"""
+
+    def __init__(self, save_dir: str, compact_min_bytes: int = COMPACT_MIN_BYTES,
+                 compress: bool = COMPRESS_SNAPSHOTS):
+        """
+        Args:
+            save_dir (str): Directory of the conversation files
+            compact_min_bytes (int): Journal size below which it is never compacted
+            compress (bool): zlib-compress the messages of snapshots
+        """
+        self.save_dir = save_dir
+        self.compact_min_bytes = compact_min_bytes
+        self.compress = compress
+        self.index = ConversationIndex(save_dir)
+        self._persisted: Dict[str, _Persisted] = {}
+        self._unsynced = set()
+        self._lock = threading.Lock()
+
+    def snapshot_path(self, conversation_id: str) -> str:
+        """Path of a conversation's snapshot"""
+        return os.path.join(self.save_dir, f"{SNAPSHOT_PREFIX}{conversation_id}{SNAPSHOT_SUFFIX}")
+
+    def legacy_path(self, conversation_id: str) -> str:
+        """Path of a conversation's JSON snapshot from an older version"""
+        return os.path.join(self.save_dir, f"{SNAPSHOT_PREFIX}{conversation_id}{LEGACY_SUFFIX}")
+
+    def journal_path(self, conversation_id: str) -> str:
+        """Path of a conversation's journal"""
+        return os.path.join(self.save_dir, f"{SNAPSHOT_PREFIX}{conversation_id}{JOURNAL_SUFFIX}")
+
+    def save(self, conversation):
+        """
+        Persist the changes of a conversation since its last save or load.
+
+        Messages are append-only; if the stored history is not a prefix of the
+        conversation any more, a full snapshot is written instead. A stored
+        conversation must be loaded before it is saved, so a new conversation
+        that happens to get the same id never replaces it.
+
+        Args:
+            conversation (Conversation): Conversation to save
+        """
+        with self._lock:
+            persisted = self._persisted.get(conversation.id)
+            if persisted is None and self._snapshot_exists(conversation.id):
+                # Another conversation with the same id; replacing its snapshot would lose it
+                raise FileExistsError(f"Conversation {conversation.id} exists but was not loaded")
+            if persisted is None or persisted.messages > len(conversation.messages):
+                persisted = self._write_snapshot(conversation, persisted.seq if persisted else 0)
+                self._update_index(conversation, persisted)
+                return
+
+            records = [{"type": "message", "message": message}
+                       for message in conversation.messages[persisted.messages:]]
+            records.extend(self._metadata_records(persisted.metadata, conversation.metadata))
+            if not records:
+                return
+            for record in records:
+                persisted.seq += 1
+                record["seq"] = persisted.seq
+            self._append(conversation.id, records, persisted)
+            persisted.messages = len(conversation.messages)
+            persisted.metadata = copy.deepcopy(conversation.metadata)
+
+            # Rewriting the snapshot once the journal outgrows it keeps the cost per turn amortized O(1)
+            if persisted.journal_bytes > max(self.compact_min_bytes, persisted.snapshot_bytes):
+                persisted = self._write_snapshot(conversation, persisted.seq)
+            self._update_index(conversation, persisted)
+
+    def load(self, conversation_id: str) -> Dict:
+        """
+        Read a conversation: its snapshot with the journal replayed on top.
+
+        Args:
+            conversation_id (str): Conversation to read
+
+        Returns:
+            Dict: The conversation in the format of Conversation.to_dict
+        """
+        with self._lock:
+            data, persisted = self._read(conversation_id)
+            self._persisted[conversation_id] = persisted
+        return data
+
+    def sync(self):
+        """Force the files written since the last sync to disk"""
+        with self._lock:
+            paths, self._unsynced = self._unsynced, set()
+        for path in paths:
+            try:
+                with open(path, 'ab') as f:
+                    os.fsync(f.fileno())
+            except FileNotFoundError:
+                pass  # Journal folded into a snapshot meanwhile
+        if paths and os.name != 'nt':
+            # Makes the renames of new snapshots and removed journals durable
+            fd = os.open(self.save_dir, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def conversation_ids(self) -> List[str]:
+        """Ids of all stored conversations"""
+        ids = {}
+        for filename in os.listdir(self.save_dir):
+            if not filename.startswith(SNAPSHOT_PREFIX):
+                continue
+            for suffix in (SNAPSHOT_SUFFIX, LEGACY_SUFFIX):
+                if filename.endswith(suffix):
+                    ids[filename[len(SNAPSHOT_PREFIX):-len(suffix)]] = None
+        return list(ids)
+
+    def list(self, offset: int = 0, limit: int = None, sort_by: str = "timestamp",
+             reverse: bool = True) -> List[Dict]:
+        """
+        Index entries of the stored conversations, without reading their messages.
+
+        Conversation files the index does not know yet, e.g. from an older
+        version, are indexed first and entries of deleted files are dropped.
+
+        Args:
+            offset (int): Number of entries to skip
+            limit (int, optional): Maximum number of entries, defaults to all
+            sort_by (str): Entry field to sort by
+            reverse (bool): Sort descending, e.g. newest first
+
+        Returns:
+            List[Dict]: Entries with id, timestamp, provider, model, message_count, preview and bytes
+        """
+        stored = set(self.conversation_ids())
+        indexed = set(self.index.ids())
+        for conversation_id in stored - indexed:
+            entry = self._read_entry(conversation_id)
+            if entry is not None:
+                self.index.update(entry)
+        self.index.remove(indexed - stored)
+        return self.index.page(offset, limit, sort_by, reverse)
+
+    def rebuild_index(self):
+        """Read the header of every conversation and rewrite the index"""
+        self.index.rebuild(self.conversation_ids(), self._read_entry)
+
+    def _read(self, conversation_id: str):
+        """Snapshot with the journal replayed and what the files hold; callers hold the lock"""
+        path = self._existing_snapshot(conversation_id)
+        with open(path, 'rb') as f:
+            data = decode_conversation(f.read())
+        seq = data.pop("journal_seq", 0)
+        records, journal_bytes = self._read_journal(conversation_id)
+        for record in records:
+            if record["seq"] > seq:
+                self._replay(data, record)
+                seq = record["seq"]
+        return data, _Persisted(len(data["messages"]), copy.deepcopy(data.get("metadata", {})), seq,
+                                os.path.getsize(path), journal_bytes)
+
+    def _snapshot_exists(self, conversation_id: str) -> bool:
+        """True if a conversation has a snapshot in either format"""
+        return any(os.path.exists(path)
+                   for path in (self.snapshot_path(conversation_id), self.legacy_path(conversation_id)))
+
+    def _existing_snapshot(self, conversation_id: str) -> str:
+        """Path of the snapshot a conversation has, preferring the current format"""
+        for path in (self.snapshot_path(conversation_id), self.legacy_path(conversation_id)):
+            if os.path.exists(path):
+                return path
+        raise FileNotFoundError(f"Conversation {conversation_id} not found")
+
+    def _read_entry(self, conversation_id: str) -> Optional[Dict]:
+        """Index entry of a stored conversation from its snapshot header and journal; None if unreadable"""
+        try:
+            with self._lock:
+                path = self._existing_snapshot(conversation_id)
+                header = read_header(path)
+                records, journal_bytes = self._read_journal(conversation_id)
+                size = os.path.getsize(path) + journal_bytes
+            seq = header.get("journal_seq", 0)
+            for record in records:
+                if record["seq"] <= seq or record["type"] != "message":
+                    continue
+                header["message_count"] += 1
+                if not header["preview"] and record["message"]["role"] == "user":
+                    header["preview"] = make_preview(record["message"]["content"])
+        except (OSError, ValueError, KeyError):
+            return None
+        return make_entry(header, size)
+
+    def _update_index(self, conversation, persisted: _Persisted):
+        self.index.update(make_entry(conversation.to_dict(), persisted.snapshot_bytes + persisted.journal_bytes))
+
+    @staticmethod
+    def _metadata_records(old: Dict, new: Dict) -> List[Dict]:
+        """Records for changed metadata keys; lists that only grew are extended"""
+        records = []
+        for key, value in new.items():
+            previous = old.get(key)
+            if previous == value:
+                continue
+            if isinstance(previous, list) and isinstance(value, list) and value[:len(previous)] == previous:
+                records.append({"type": "extend", "key": key, "items": value[len(previous):]})
+            else:
+                records.append({"type": "metadata", "key": key, "value": value})
+        for key in old.keys() - new.keys():
+            records.append({"type": "metadata", "key": key, "delete": True})
+        return records
+
+    @staticmethod
+    def _replay(data: Dict, record: Dict):
+        metadata = data.setdefault("metadata", {})
+        if record["type"] == "message":
+            data["messages"].append(record["message"])
+        elif record["type"] == "extend":
+            metadata.setdefault(record["key"], []).extend(record["items"])
+        elif record.get("delete"):
+            metadata.pop(record["key"], None)
+        else:
+            metadata[record["key"]] = record["value"]
+
+    def _append(self, conversation_id: str, records: List[Dict], persisted: _Persisted):
+        """Append records with a single write, so a crash tears at most the last line"""
+        data = b"".join(dumps(record) + b"\n" for record in records)
+        path = self.journal_path(conversation_id)
+        with open(path, 'ab') as f:
+            f.write(data)
+        persisted.journal_bytes += len(data)
+        self._unsynced.add(path)
+
+    def _read_journal(self, conversation_id: str):
+        """Records of a journal and its valid size; a torn last record is cut off"""
+        path = self.journal_path(conversation_id)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+        except FileNotFoundError:
+            return [], 0
+
+        records = []
+        valid = 0
+        for line in content.splitlines(keepends=True):
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("incomplete record")
+                records.append(loads(line))
+            except ValueError:
+                break  # Only the tail can be torn; later appends start on a clean line
+            valid += len(line)
+        if valid < len(content):
+            with open(path, 'r+b') as f:
+                f.truncate(valid)
+        return records, valid
+
+    def _write_snapshot(self, conversation, seq: int) -> _Persisted:
+        """Write the whole conversation atomically and start an empty journal"""
+        data = encode_conversation(conversation.to_dict(), {"journal_seq": seq}, self.compress)
+        path = self.snapshot_path(conversation.id)
+        # Write to a temporary file first so a crash never leaves a truncated snapshot
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        self._unsynced.add(path)
+        # Records up to seq are in the snapshot; if removing the journal fails they are skipped on load
+        for old_path in (self.journal_path(conversation.id), self.legacy_path(conversation.id)):
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                pass
+        persisted = self._persisted[conversation.id] = _Persisted(
+            len(conversation.messages), copy.deepcopy(conversation.metadata), seq,
+            os.path.getsize(path), 0)
+        return persisted
@@ -1,31 +1,74 @@
-import json
+import copy
 import os
 from datetime import datetime as dt
 from typing import List, Dict
-from fpdf import FPDF
+
+from conversation_db import DEFAULT_FILENAME, SqliteConversationStore
+from conversation_journal import ConversationJournal
+from persistence_worker import DURABILITY_ALWAYS, DURABILITY_POLICIES, PersistenceWorker
+
+# Storage backend: "json" (snapshot plus journal files) or "sqlite" (one database with full-text search)
+STORAGE_BACKEND = os.environ.get("LLM_GUI_STORAGE", "json")
+# When saved data is forced to disk: "always", "interval" (about once a second) or "exit"
+DURABILITY = os.environ.get("LLM_GUI_DURABILITY", "interval")
 
 class Conversation:
-    def __init__(self, provider: str, model: str):
+    def __init__(self, provider: str, model: str, conversation_id: str = None):
         self.provider = provider
         self.model = model
         self.messages: List[Dict] = []
+        self.metadata: Dict = {}
         self.timestamp = dt.now()
-        self.id = self.timestamp.strftime("%Y%m%d_%H%M%S")
+        # Microseconds keep the ids of conversations started in the same second, e.g. by cron runs, apart
+        self.id = conversation_id or self.timestamp.strftime("%Y%m%d_%H%M%S_%f")
 
-    def add_message(self, role: str, content: str):
-        self.messages.append({
+    def add_message(self, role: str, content: str, metrics: Dict = None) -> Dict:
+        message = {
             "role": role,
             "content": content,
             "timestamp": dt.now().isoformat()
+        }
+        if metrics:
+            message["metrics"] = metrics
+        self.messages.append(message)
+        return message
+
+    def record_served_by(self, provider: str, model: str, hedged: bool = False, failover: bool = False):
+        """Record which provider and model answered the latest message"""
+        self.metadata.setdefault("served_by", []).append({
+            "message": len(self.messages) - 1,
+            "provider": provider,
+            "model": model,
+            "hedged": hedged,
+            "failover": failover
         })
 
+    def snapshot(self) -> "Conversation":
+        """Copy that is not affected by later changes; messages are never changed once added"""
+        conversation = Conversation(self.provider, self.model, self.id)
+        conversation.timestamp = self.timestamp
+        # A shallow copy, so messages that were loaded lazily are not decoded here
+        conversation.messages = copy.copy(self.messages)
+        conversation.metadata = copy.deepcopy(self.metadata)
+        return conversation
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Conversation":
+        """Rebuild a saved conversation so it can be continued"""
+        conversation = cls(data["provider"], data["model"], data["id"])
+        conversation.timestamp = dt.fromisoformat(data["timestamp"])
+        conversation.messages = copy.copy(data["messages"])
+        conversation.metadata = dict(data.get("metadata", {}))
+        return conversation
+
     def to_dict(self) -> Dict:
         return {
             "id": self.id,
             "provider": self.provider,
             "model": self.model,
             "timestamp": self.timestamp.isoformat(),
-            "messages": self.messages
+            "messages": self.messages,
+            "metadata": self.metadata
         }
 
 class ConversationExporter:
@@ -45,6 +88,7 @@ class ConversationExporter:
     @staticmethod
     def export_to_pdf(conversation: Dict, filepath: str):
         """Export conversation to a PDF file"""
+        from fpdf import FPDF  # Only needed for PDF export
         pdf = FPDF()
         pdf.add_page()
         
@@ -81,11 +125,38 @@ class ConversationExporter:
         pdf.output(filepath)
 
 class ConversationManager:
-    def __init__(self, save_dir: str = "conversations"):
+    def __init__(self, save_dir: str = "conversations", backend: str = None, background_saves: bool = False,
+                 durability: str = None, on_save_error=None):
+        """
+        Args:
+            save_dir (str): Directory of the saved conversations
+            backend (str, optional): Storage backend, "json" or "sqlite"; defaults to LLM_GUI_STORAGE
+            background_saves (bool): Save on a worker thread that coalesces repeated saves
+            durability (str, optional): When saves are forced to disk, "always", "interval" or "exit";
+                defaults to LLM_GUI_DURABILITY
+            on_save_error (Callable, optional): Called from the worker with a conversation id and the failure
+        """
         self.save_dir = save_dir
         self.current_conversation = None
         self.ensure_save_directory()
         self.exporter = ConversationExporter()
+        backend = backend or STORAGE_BACKEND
+        if backend == "sqlite":
+            self.store = SqliteConversationStore(os.path.join(save_dir, DEFAULT_FILENAME))
+            # One-shot import of the conversations saved as JSON files
+            if not self.store.is_migrated():
+                self.store.migrate(ConversationJournal(save_dir))
+        elif backend == "json":
+            # Snapshot plus append-only journal per conversation
+            self.store = ConversationJournal(save_dir)
+        else:
+            raise ValueError(f"Unknown storage backend: {backend}")
+
+        self.durability = durability or DURABILITY
+        if self.durability not in DURABILITY_POLICIES:
+            raise ValueError(f"Unknown durability policy: {self.durability}")
+        self.persistence = PersistenceWorker(self.store, self.durability, on_error=on_save_error) \
+            if background_saves else None
 
     def ensure_save_directory(self):
         """Create the save directory if it doesn't exist"""
@@ -93,51 +164,128 @@ class ConversationManager:
             os.makedirs(self.save_dir)
 
     def start_new_conversation(self, provider: str, model: str) -> Conversation:
-        """Start a new conversation and save the previous one if it exists"""
+        """Start a new conversation and save the previous one if it exists, in the background if enabled"""
         if self.current_conversation:
             self.save_conversation(self.current_conversation)
         self.current_conversation = Conversation(provider, model)
         return self.current_conversation
 
-    def add_message(self, role: str, content: str):
+    def resume_conversation(self, conversation_id: str) -> Conversation:
+        """Make a saved conversation the current one and save the previous one"""
+        if self.current_conversation and self.current_conversation.id == conversation_id:
+            return self.current_conversation
+        conversation = Conversation.from_dict(self.load_conversation(conversation_id))
+        if self.current_conversation:
+            self.save_conversation(self.current_conversation)
+        self.current_conversation = conversation
+        return conversation
+
+    def add_message(self, role: str, content: str, metrics: Dict = None) -> Dict:
         """Add a message to the current conversation"""
         if not self.current_conversation:
             raise ValueError("No active conversation. Call start_new_conversation first.")
-        self.current_conversation.add_message(role, content)
+        return self.current_conversation.add_message(role, content, metrics)
 
     def save_conversation(self, conversation: Conversation = None):
-        """Save the conversation to a JSON file"""
+        """Save the conversation's new messages; with background saves this only queues the save"""
         if conversation is None:
             conversation = self.current_conversation
         if conversation is None:
             return
-
-        filename = f"conversation_{conversation.id}.json"
-        filepath = os.path.join(self.save_dir, filename)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(conversation.to_dict(), f, indent=2, ensure_ascii=False)
+        if self.persistence:
+            self.persistence.submit(conversation)
+            return
+        self.store.save(conversation)
+        if self.durability == DURABILITY_ALWAYS:
+            self.store.sync()
 
     def load_conversation(self, conversation_id: str) -> Dict:
-        """Load a conversation from a JSON file"""
-        filename = f"conversation_{conversation_id}.json"
-        filepath = os.path.join(self.save_dir, filename)
-        
-        if not os.path.exists(filepath):
-            raise FileNotFoundError(f"Conversation {conversation_id} not found")
-        
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
-
-    def list_conversations(self) -> List[Dict]:
-        """List all saved conversations"""
-        conversations = []
-        for filename in os.listdir(self.save_dir):
-            if filename.startswith("conversation_") and filename.endswith(".json"):
-                filepath = os.path.join(self.save_dir, filename)
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    conversations.append(json.load(f))
-        return sorted(conversations, key=lambda x: x["timestamp"], reverse=True)
+        """Load a saved conversation, including saves still queued for it"""
+        if self.persistence:
+            self.persistence.flush(conversation_id)
+        return self.store.load(conversation_id)
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait for queued background saves; True if all are written"""
+        return self.persistence.flush(timeout=timeout) if self.persistence else True
+
+    def count_messages(self, conversation_id: str) -> int:
+        """Number of messages in a conversation"""
+        if self.current_conversation and self.current_conversation.id == conversation_id:
+            return len(self.current_conversation.messages)
+        return len(self.load_conversation(conversation_id)["messages"])
+
+    def load_messages(self, conversation_id: str, start: int = 0, end: int = None) -> List[Dict]:
+        """
+        Load a slice of a conversation's messages, e.g. for paging a transcript.
+        The current conversation is served from memory.
+
+        Args:
+            conversation_id (str): Conversation to read
+            start (int): Index of the first message
+            end (int, optional): Index after the last message, defaults to the end
+
+        Returns:
+            List[Dict]: The messages in the slice
+        """
+        if self.current_conversation and self.current_conversation.id == conversation_id:
+            return self.current_conversation.messages[start:end]
+        return self.load_conversation(conversation_id)["messages"][start:end]
+
+    def list_conversations(self, offset: int = 0, limit: int = None, sort_by: str = "timestamp",
+                           reverse: bool = True) -> List[Dict]:
+        """
+        List saved conversations from the metadata index, without loading their messages.
+
+        Args:
+            offset (int): Number of conversations to skip
+            limit (int, optional): Maximum number of conversations, defaults to all
+            sort_by (str): Field to sort by: timestamp, provider, model, message_count or bytes
+            reverse (bool): Sort descending, newest first by default
+
+        Returns:
+            List[Dict]: Entries with id, timestamp, provider, model, message_count, preview and bytes
+        """
+        self.flush()
+        return self.store.list(offset, limit, sort_by, reverse)
+
+    def rebuild_index(self):
+        """Rebuild the metadata index from the stored conversations"""
+        self.store.rebuild_index()
+
+    @property
+    def supports_search(self) -> bool:
+        """True if the storage backend has a full-text index"""
+        return hasattr(self.store, "search")
+
+    def search_conversations(self, text: str, limit: int = 50) -> List[Dict]:
+        """
+        Search the messages of all saved conversations.
+
+        Args:
+            text (str): Words to search for
+            limit (int): Maximum number of hits
+
+        Returns:
+            List[Dict]: Ranked hits with the conversation's id, timestamp, provider and model
+            and the message's position, role and a snippet
+        """
+        if not self.supports_search:
+            raise RuntimeError("Full-text search needs the SQLite storage backend (LLM_GUI_STORAGE=sqlite)")
+        self.flush()
+        return self.store.search(text, limit)
+
+    def close(self):
+        """Save the current conversation, write queued saves to disk and release the storage backend"""
+        if self.current_conversation and self.current_conversation.messages:
+            self.save_conversation()
+        if self.persistence:
+            self.persistence.close()
+        else:
+            self.store.sync()
+        close = getattr(self.store, "close", None)
+        if close:
+            close()
 
     def export_conversation(self, conversation_id: str, format: str = 'txt'):
         """Export a conversation to the specified format"""
@@ -0,0 +1,223 @@
+"""
+Hedged requests for the LLM GUI application.
+Sends a request to a backup provider/model when the primary has not
+produced its first token by a latency percentile deadline, keeps the
+first answer that starts and cancels the other. Errors before any text
+arrived fail over to the next backup. Every model gets the history that
+fits into its own context window.
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from queue import Empty, Queue
+from typing import Callable, Dict, List, Tuple
+
+from context_builder import ContextBuilder
+from providers import get_provider
+from request_executor import CancelToken
+
+DEFAULT_PERCENTILE = 0.95
+DEFAULT_DEADLINE = 5.0
+MIN_DEADLINE = 0.5
+MIN_SAMPLES = 5
+HISTORY_SIZE = 200
+
+
+class HedgePolicy:
+    """When to hedge and where to fail over"""
+
+    def __init__(self, backups: List[Tuple[str, str]], hedge: bool = True, failover: bool = True,
+                 percentile: float = DEFAULT_PERCENTILE, default_deadline: float = DEFAULT_DEADLINE):
+        """
+        Args:
+            backups (List[Tuple[str, str]]): Backup (provider, model) pairs in order of preference
+            hedge (bool): Start a backup when the primary is slow to produce a first token
+            failover (bool): Switch to a backup when a request fails before producing text
+            percentile (float): Percentile of observed time-to-first-token used as hedge deadline
+            default_deadline (float): Deadline in seconds until enough samples were observed
+        """
+        self.backups = list(backups)
+        self.hedge = hedge
+        self.failover = failover
+        self.percentile = percentile
+        self.default_deadline = default_deadline
+        self.history: Dict[Tuple[str, str], deque] = defaultdict(lambda: deque(maxlen=HISTORY_SIZE))
+        self._lock = threading.Lock()
+
+    def record_ttft(self, provider: str, model: str, seconds: float):
+        """Add an observed time-to-first-token"""
+        with self._lock:
+            self.history[(provider, model)].append(seconds)
+
+    def first_token_deadline(self, provider: str, model: str) -> float:
+        """Seconds to wait for the first token before hedging"""
+        with self._lock:
+            samples = sorted(self.history.get((provider, model), ()))
+        if len(samples) < MIN_SAMPLES:
+            return self.default_deadline
+        index = min(len(samples) - 1, int(self.percentile * len(samples)))
+        return max(MIN_DEADLINE, samples[index])
+
+
+class _Attempt:
+    """One request of a hedged send"""
+
+    def __init__(self, provider: str, model: str, token: CancelToken):
+        self.provider = provider
+        self.model = model
+        self.token = token
+        self.start = time.perf_counter()
+        self.buffer = []
+        self.started = False
+        self.metrics = {}
+
+
+class HedgedSender:
+    """Runs one logical request across the primary and backup models"""
+
+    def __init__(self, policy: HedgePolicy, scheduler, session_pool, api_keys: Dict[str, str]):
+        """
+        Args:
+            policy (HedgePolicy): Hedging and failover policy
+            scheduler (RequestScheduler): Scheduler used for every attempt
+            session_pool (SessionPool): Shared HTTP sessions
+            api_keys (Dict[str, str]): API key per provider
+        """
+        self.policy = policy
+        self.scheduler = scheduler
+        self.session_pool = session_pool
+        self.api_keys = api_keys
+
+    def send(self, provider: str, model: str, conversation, context_budget: Callable[[str, str], int],
+             stream: bool = False, token: CancelToken = None, on_delta=None, on_retry=None,
+             messages: List[Dict] = None) -> Dict:
+        """
+        Send a request with hedging and failover.
+
+        Args:
+            provider (str): Primary provider
+            model (str): Primary model
+            conversation (Conversation): Conversation whose history is sent
+            context_budget (Callable): Returns the prompt token budget of a provider and model
+            messages (List[Dict], optional): History already built for the primary model
+
+        Returns:
+            Dict: text, provider, model and metrics of the answer that won, and
+            whether the request was hedged or failed over
+        """
+        candidates = [(provider, model)] + [
+            pair for pair in self.policy.backups
+            if pair != (provider, model) and self.api_keys.get(pair[0])
+        ]
+        events = Queue()
+        lock = threading.Lock()
+        state = {'winner': None}
+        active = []
+        result = {'hedged': False, 'failover': False}
+
+        def forward(attempt, delta):
+            # Deltas of the winner go straight to the UI; others are buffered until a winner is chosen
+            with lock:
+                if state['winner'] is attempt:
+                    if on_delta:
+                        on_delta(delta)
+                    return
+                if state['winner'] is not None:
+                    return
+                attempt.buffer.append(delta)
+                first = not attempt.started
+                attempt.started = True
+            if first:
+                events.put(('first', attempt, None))
+
+        def launch():
+            pair = candidates.pop(0)
+            remaining = token.remaining() if token else None
+            attempt = _Attempt(pair[0], pair[1], CancelToken(remaining))
+            active.append(attempt)
+            # A backup's context window may be smaller than the primary's
+            if messages is not None and pair == (provider, model):
+                attempt_messages = messages
+            else:
+                attempt_messages = ContextBuilder().build(conversation, context_budget(*pair))
+
+            def run():
+                try:
+                    text = self.scheduler.send_chat(
+                        self.session_pool.get(attempt.provider), get_provider(attempt.provider),
+                        self.api_keys[attempt.provider], attempt.model, attempt_messages, stream,
+                        attempt.token, lambda delta: forward(attempt, delta), on_retry,
+                        attempt.metrics)
+                    events.put(('done', attempt, text))
+                except Exception as e:
+                    events.put(('error', attempt, e))
+
+            threading.Thread(target=run, daemon=True).start()
+            return attempt
+
+        def commit(attempt):
+            # Pick the winner, cancel the rest and flush its buffered deltas
+            with lock:
+                state['winner'] = attempt
+                buffered, attempt.buffer = attempt.buffer, []
+                if on_delta:
+                    for delta in buffered:
+                        on_delta(delta)
+            for other in active:
+                if other is not attempt:
+                    other.token.cancel()
+
+        primary = launch()
+        hedge_at = time.monotonic() + self.policy.first_token_deadline(provider, model)
+
+        try:
+            while True:
+                if token:
+                    token.check()
+                waiting = state['winner'] is None and not primary.started
+                if (self.policy.hedge and waiting and candidates and not result['hedged']
+                        and time.monotonic() >= hedge_at):
+                    launch()
+                    result['hedged'] = True
+
+                try:
+                    kind, attempt, payload = events.get(timeout=0.05)
+                except Empty:
+                    continue
+
+                if kind == 'first':
+                    self.policy.record_ttft(attempt.provider, attempt.model,
+                                            time.perf_counter() - attempt.start)
+                    if state['winner'] is None:
+                        commit(attempt)
+                elif kind == 'done':
+                    if not attempt.started:
+                        # Without streaming the whole answer is the first token
+                        self.policy.record_ttft(attempt.provider, attempt.model,
+                                                time.perf_counter() - attempt.start)
+                    if state['winner'] in (None, attempt):
+                        if state['winner'] is None:
+                            commit(attempt)
+                        result.update(text=payload, provider=attempt.provider, model=attempt.model,
+                                      metrics=attempt.metrics)
+                        return result
+                elif kind == 'error':
+                    active.remove(attempt)
+                    if state['winner'] is attempt:
+                        raise payload
+                    # Ignore cancelled losers and wait for attempts that are still running
+                    if state['winner'] is not None or active:
+                        continue
+                    if self.policy.failover and candidates:
+                        launch()
+                        result['failover'] = True
+                        continue
+                    raise payload
+        finally:
+            stopped = token is not None and token.cancelled
+            for attempt in active:
+                if stopped or attempt is not state['winner']:
+                    attempt.token.cancel()
+                else:
+                    attempt.token.finish()
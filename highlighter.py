@@ -0,0 +1,323 @@
+"""
+Markdown and code highlighting for the LLM GUI application.
+A line-based lexer turns Markdown with fenced code blocks into tag spans.
+Lexing runs on a worker thread and streamed text is lexed incrementally,
+line by line, with the lexer state carried over between chunks. The Tk
+thread only applies the finished spans, in small batches, and the spans of
+every finished message are cached so reloading a conversation is instant.
+"""
+
+import hashlib
+import re
+import threading
+import tkinter as tk
+from collections import OrderedDict
+from functools import lru_cache
+from tkinter import font as tkfont
+from typing import Callable, List, Optional, Tuple
+
+from request_executor import RequestExecutor
+
+Span = Tuple[str, int, int]
+
+CACHE_SIZE = 500
+# Tag operations per event loop iteration, so typing stays responsive during large reloads
+APPLY_BATCH = 300
+
+FENCE = re.compile(r'^ {0,3}(`{3,}|~{3,})\s*([\w+#.-]*)')
+HEADING = re.compile(r'^#{1,6}\s')
+QUOTE = re.compile(r'^ {0,3}>')
+LIST_MARKER = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s')
+INLINE_TOKEN = re.compile(
+    r'(?P<md_code>`[^`\n]+`)'
+    r'|(?P<md_bold>\*\*[^*\n]+\*\*|__[^_\n]+__)'
+    r'|(?P<md_italic>(?<![\w*])\*[^*\s][^*\n]*\*(?!\*)|(?<!\w)_[^_\s][^_\n]*_(?!\w))'
+    r'|(?P<md_link>\[[^\]\n]+\]\([^)\s]+\))'
+)
+
+KEYWORDS = frozenset("""
+    and as assert async await break case catch class const continue def default del do elif else
+    enum except export extends false final finally fn for from func function if impl import in
+    interface is lambda let loop match mod mut new nil none not null or package pass private
+    protected pub public raise return self static struct super switch this throw true try type
+    typeof use var void while with yield True False None
+""".split())
+
+# Line comment prefix per fence language; other named languages use "//"
+LINE_COMMENTS = {
+    'python': '#', 'py': '#', 'bash': '#', 'sh': '#', 'shell': '#', 'zsh': '#', 'ruby': '#',
+    'rb': '#', 'yaml': '#', 'yml': '#', 'toml': '#', 'r': '#', 'perl': '#', 'dockerfile': '#',
+    'sql': '--', 'lua': '--', 'haskell': '--', 'hs': '--',
+}
+
+TAG_STYLES = {
+    'md_heading': {'foreground': '#1f4e8c'},
+    'md_quote': {'foreground': '#6a737d'},
+    'md_list': {'foreground': '#b35900'},
+    'md_link': {'foreground': '#0366d6', 'underline': True},
+    'md_code': {'background': '#f0f0f0', 'font': 'TkFixedFont'},
+    'md_codeblock': {'background': '#f6f8fa', 'font': 'TkFixedFont'},
+    'md_fence': {'foreground': '#999999', 'font': 'TkFixedFont'},
+    'md_keyword': {'foreground': '#d73a49'},
+    'md_string': {'foreground': '#22863a'},
+    'md_comment': {'foreground': '#6a737d'},
+    'md_number': {'foreground': '#005cc5'},
+}
+
+
+@lru_cache(maxsize=None)
+def code_token_pattern(comment: Optional[str]):
+    """Token pattern of code lines; None accepts both '#' and '//' comments"""
+    prefix = '#|//' if comment is None else re.escape(comment)
+    return re.compile(
+        rf'(?P<md_comment>(?:{prefix}).*)'
+        r'|(?P<md_string>"(?:\\.|[^"\\\n])*"?|\'(?:\\.|[^\'\\\n])*\'?)'
+        r'|(?P<md_number>\b\d+(?:\.\d+)?\b)'
+        r'|(?P<word>\b[A-Za-z_]\w*\b)'
+    )
+
+
+class MarkdownLexer:
+    """Line-based Markdown lexer whose state carries over between chunks of a stream"""
+
+    def __init__(self):
+        self.fence = None
+        self.comment = None
+        self.offset = 0
+        self.pending = ""
+
+    def feed(self, text: str) -> List[Span]:
+        """Lex the lines completed by a chunk; offsets count from the start of the first chunk"""
+        self.pending += text
+        spans = []
+        start = 0
+        while True:
+            end = self.pending.find("\n", start)
+            if end < 0:
+                break
+            spans.extend(self._lex_line(self.pending[start:end + 1], self.offset + start))
+            start = end + 1
+        self.pending = self.pending[start:]
+        self.offset += start
+        return spans
+
+    def finish(self) -> List[Span]:
+        """Lex the last line if it has no line break"""
+        line, self.pending = self.pending, ""
+        spans = self._lex_line(line, self.offset) if line else []
+        self.offset += len(line)
+        return spans
+
+    def _lex_line(self, line: str, offset: int) -> List[Span]:
+        fence = FENCE.match(line)
+        if self.fence is not None:
+            if fence and fence.group(1)[0] == self.fence[0] and len(fence.group(1)) >= len(self.fence) \
+                    and not fence.group(2):
+                self.fence = None
+                return [('md_fence', offset, offset + len(line))]
+            spans = [('md_codeblock', offset, offset + len(line))]
+            for match in code_token_pattern(self.comment).finditer(line):
+                kind = match.lastgroup
+                if kind != 'word' or match.group() in KEYWORDS:
+                    spans.append(('md_keyword' if kind == 'word' else kind,
+                                  offset + match.start(), offset + match.end()))
+            return spans
+
+        if fence:
+            self.fence = fence.group(1)
+            language = fence.group(2).lower()
+            self.comment = LINE_COMMENTS.get(language, '//') if language else None
+            return [('md_fence', offset, offset + len(line))]
+        if HEADING.match(line):
+            return [('md_heading', offset, offset + len(line.rstrip("\n")))]
+
+        spans = []
+        if QUOTE.match(line):
+            spans.append(('md_quote', offset, offset + len(line.rstrip("\n"))))
+        marker = LIST_MARKER.match(line)
+        if marker:
+            spans.append(('md_list', offset, offset + marker.end()))
+        for match in INLINE_TOKEN.finditer(line):
+            spans.append((match.lastgroup, offset + match.start(), offset + match.end()))
+        return spans
+
+
+def lex_markdown(text: str) -> List[Span]:
+    """Spans of a complete Markdown text"""
+    lexer = MarkdownLexer()
+    return lexer.feed(text) + lexer.finish()
+
+
+def content_key(content: str) -> str:
+    """Cache key of a message text"""
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+class _Stream:
+    """Lexer state of an answer that is being streamed"""
+
+    def __init__(self):
+        self.lexer = MarkdownLexer()
+        self.parts = []
+        self.spans = []
+        self.header = 0
+        self.in_header = True
+        self.anchor = None
+
+
+class MarkdownHighlighter:
+    """Applies Markdown and code tags to the turns of a text widget"""
+
+    def __init__(self, widget, root, executor: RequestExecutor = None):
+        """
+        Args:
+            widget (tk.Text): Text widget to highlight
+            root (tk.Tk): Window whose event loop applies the tags
+            executor (RequestExecutor, optional): Worker that lexes; defaults to a private single thread
+        """
+        self.widget = widget
+        self.root = root
+        # One worker keeps the chunks of a stream in order
+        self.executor = executor or RequestExecutor(lambda callback, *args: root.after(0, callback, *args),
+                                                    workers=1)
+        self.cache: OrderedDict = OrderedDict()
+        self.generation = 0
+        self.stream: Optional[_Stream] = None
+        self._lock = threading.Lock()
+        self._configure_tags()
+
+    def reset(self):
+        """Forget pending work, e.g. when another conversation is shown"""
+        self.generation += 1
+        self.stream = None
+
+    def highlight_turn(self, anchor: str, content: str):
+        """
+        Highlight a rendered message, from the cache or in the background.
+
+        Args:
+            anchor (str): Tk index of the first character of the content, e.g. "turn3.first + 22 chars"
+            content (str): Message text
+        """
+        key = content_key(content)
+        spans = self.cached(key)
+        if spans is not None:
+            self._apply(lambda: anchor, spans, self.generation)
+            return
+
+        generation = self.generation
+
+        def done(spans):
+            self.store(key, spans)
+            self._apply(lambda: anchor, spans, generation)
+
+        self.executor.submit(lambda token: lex_markdown(content), on_success=done)
+
+    def begin_stream(self, anchor: str):
+        """Start highlighting a streamed answer whose first line, the turn header, starts at anchor"""
+        self.stream = stream = _Stream()
+        stream.anchor = anchor
+
+    def feed(self, text: str):
+        """Lex newly rendered text of the streamed answer in the background"""
+        stream = self.stream
+        if stream is None:
+            return
+        generation = self.generation
+
+        def job(token):
+            return self._feed_stream(stream, text)
+
+        self.executor.submit(job, on_success=lambda spans: self._apply_stream(stream, spans, generation))
+
+    def end_stream(self, anchor: str = None, content: str = None):
+        """
+        Finish the streamed answer.
+
+        Args:
+            anchor (str, optional): Index of the finished turn's first character; None drops the stream
+            content (str, optional): Stored message text; the spans are cached when it matches the stream
+        """
+        stream, self.stream = self.stream, None
+        if stream is None:
+            return
+        if anchor is None:
+            stream.anchor = None
+            return
+        stream.anchor = anchor
+        generation = self.generation
+
+        def job(token):
+            spans = stream.lexer.finish()
+            stream.spans.extend(spans)
+            streamed = ''.join(stream.parts)
+            if content is not None and streamed.rstrip("\n") == content.rstrip("\n"):
+                self.store(content_key(content), stream.spans)
+            return spans
+
+        self.executor.submit(job, on_success=lambda spans: self._apply_stream(stream, spans, generation))
+
+    def cached(self, key: str) -> Optional[List[Span]]:
+        with self._lock:
+            spans = self.cache.get(key)
+            if spans is not None:
+                self.cache.move_to_end(key)
+            return spans
+
+    def store(self, key: str, spans: List[Span]):
+        with self._lock:
+            self.cache[key] = list(spans)
+            self.cache.move_to_end(key)
+            while len(self.cache) > CACHE_SIZE:
+                self.cache.popitem(last=False)
+
+    def _feed_stream(self, stream: _Stream, text: str) -> List[Span]:
+        """Runs on the worker; skips the turn header line and lexes the content"""
+        if stream.in_header:
+            newline = text.find("\n")
+            if newline < 0:
+                stream.header += len(text)
+                return []
+            stream.header += newline + 1
+            stream.in_header = False
+            text = text[newline + 1:]
+        stream.parts.append(text)
+        spans = stream.lexer.feed(text)
+        stream.spans.extend(spans)
+        return spans
+
+    def _apply_stream(self, stream: _Stream, spans: List[Span], generation: int):
+        self._apply(lambda: stream.anchor and f"{stream.anchor} + {stream.header} chars", spans, generation)
+
+    def _apply(self, anchor: Callable[[], Optional[str]], spans: List[Span], generation: int, start: int = 0):
+        """Add tags in batches; stops if the text was replaced or removed meanwhile"""
+        if generation != self.generation or not self.widget.winfo_exists():
+            return
+        base = anchor()
+        if base is None:
+            return
+        try:
+            base = self.widget.index(base)
+            for tag, first, last in spans[start:start + APPLY_BATCH]:
+                self.widget.tag_add(tag, f"{base} + {first} chars", f"{base} + {last} chars")
+        except tk.TclError:
+            return  # The turn left the transcript window
+        if start + APPLY_BATCH < len(spans):
+            self.root.after(1, self._apply, anchor, spans, generation, start + APPLY_BATCH)
+
+    def _configure_tags(self):
+        heading_font = tkfont.nametofont("TkDefaultFont", root=self.widget).copy()
+        heading_font.configure(weight="bold")
+        bold_font = heading_font.copy()
+        italic_font = tkfont.nametofont("TkDefaultFont", root=self.widget).copy()
+        italic_font.configure(slant="italic")
+        self.fonts = (heading_font, bold_font, italic_font)
+
+        for tag, options in TAG_STYLES.items():
+            self.widget.tag_configure(tag, **options)
+        self.widget.tag_configure('md_heading', font=heading_font)
+        self.widget.tag_configure('md_bold', font=bold_font)
+        self.widget.tag_configure('md_italic', font=italic_font)
+        # Token colours win over the code block background
+        for tag in ('md_keyword', 'md_string', 'md_comment', 'md_number'):
+            self.widget.tag_raise(tag)
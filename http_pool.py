@@ -0,0 +1,168 @@
+"""
+HTTP session pool for the LLM GUI application.
+Keeps one keep-alive session per provider so repeated requests reuse
+their TCP+TLS connections instead of paying a new handshake every time.
+"""
+
+import threading
+from typing import Dict, Optional
+
+# Default connection pool settings per provider session
+DEFAULT_POOL_CONNECTIONS = 2
+DEFAULT_POOL_MAXSIZE = 8
+PREWARM_TIMEOUT = 5
+
+
+class Http2Response:
+    """Adapts a streamed httpx response to the parts of the requests API we use"""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+
+    @property
+    def text(self) -> str:
+        self._response.read()
+        return self._response.text
+
+    def json(self):
+        self._response.read()
+        return self._response.json()
+
+    def iter_lines(self):
+        return self._response.iter_lines()
+
+    def close(self):
+        self._response.close()
+
+
+class Http2Session:
+    """Session backed by an httpx client with HTTP/2 enabled"""
+
+    def __init__(self, httpx, pool_maxsize: int):
+        self._httpx = httpx
+        self._client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=pool_maxsize,
+                                max_keepalive_connections=pool_maxsize)
+        )
+
+    def _timeout(self, timeout):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return self._httpx.Timeout(read, connect=connect)
+        return self._httpx.Timeout(timeout)
+
+    def request(self, method, url, headers=None, json=None, timeout=None, stream=False):
+        request = self._client.build_request(method, url, headers=headers, json=json,
+                                             timeout=self._timeout(timeout))
+        import requests
+        try:
+            response = self._client.send(request, stream=True)
+        except self._httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except self._httpx.HTTPError as e:
+            raise requests.ConnectionError(str(e)) from e
+        return Http2Response(response)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url, **kwargs):
+        response = self.request("HEAD", url, **kwargs)
+        response.close()
+        return response
+
+    def close(self):
+        self._client.close()
+
+
+class SessionPool:
+    """Per-provider keep-alive HTTP sessions"""
+
+    def __init__(self, pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE, http2: bool = False):
+        """
+        Args:
+            pool_connections (int): Number of host pools to cache per session
+            pool_maxsize (int): Maximum connections kept alive per host
+            http2 (bool): Use HTTP/2 via httpx when it is installed
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.http2 = http2
+        self.settings: Dict[str, Dict] = {}
+        self.sessions: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, provider: str, pool_connections: int = None, pool_maxsize: int = None):
+        """Override the pool sizes of one provider; applies to sessions created afterwards"""
+        settings = self.settings.setdefault(provider, {})
+        if pool_connections is not None:
+            settings['pool_connections'] = pool_connections
+        if pool_maxsize is not None:
+            settings['pool_maxsize'] = pool_maxsize
+
+    def get(self, provider: str):
+        """Get the shared session of a provider, creating it on first use"""
+        session = self.sessions.get(provider)
+        if session is None:
+            with self._lock:
+                session = self.sessions.get(provider)
+                if session is None:
+                    session = self._create_session(provider)
+                    self.sessions[provider] = session
+        return session
+
+    def prewarm(self, provider: str, url: str) -> threading.Thread:
+        """Open a connection to the provider in the background so the next request skips the handshake"""
+        def warm():
+            try:
+                self.get(provider).head(url, timeout=PREWARM_TIMEOUT)
+            except Exception:
+                pass  # Pre-warming is best effort
+
+        thread = threading.Thread(target=warm, daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        """Close all sessions and their connections"""
+        with self._lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+
+    def _create_session(self, provider: str):
+        settings = self.settings.get(provider, {})
+        pool_connections = settings.get('pool_connections', self.pool_connections)
+        pool_maxsize = settings.get('pool_maxsize', self.pool_maxsize)
+
+        if self.http2:
+            httpx = self._load_httpx()
+            if httpx is not None:
+                return Http2Session(httpx, pool_maxsize)
+
+        # requests is imported on first use so importing the engine stays cheap
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @staticmethod
+    def _load_httpx() -> Optional[object]:
+        """Import httpx with HTTP/2 support, or None if it is not installed"""
+        try:
+            import httpx
+            import h2  # noqa: F401 - required by httpx for HTTP/2
+            return httpx
+        except ImportError:
+            print("Warning: HTTP/2 requires 'httpx[http2]'; falling back to HTTP/1.1")
+            return None
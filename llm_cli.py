@@ -0,0 +1,146 @@
+"""
+Headless command line interface for the LLM GUI engine.
+Runs chats and batches with the same providers, conversation store, context
+building, cache and scheduler as the GUI, without Tk, winreg or Aider, so it
+works on any OS, in cron jobs and in CI.
+
+Usage:
+    python llm_cli.py chat --provider openai --model gpt-4.1 "Explain SSE in one sentence"
+    echo "Follow-up question" | python llm_cli.py chat --conversation 20240101_120000
+    python llm_cli.py batch --provider openai --model gpt-4.1 --input prompts.jsonl --output results.jsonl
+"""
+
+import argparse
+import os
+import sys
+
+import batch_runner
+from providers import PROVIDERS, get_provider
+
+DEFAULT_PROVIDER = os.environ.get("LLM_GUI_PROVIDER", "anthropic")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Parser with the chat and batch subcommands"""
+    parser = argparse.ArgumentParser(prog="llm-gui", description="Headless LLM chat and batch runner")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    chat_parser = commands.add_parser("chat", help="Send a prompt, optionally continuing a saved conversation")
+    chat_parser.add_argument("prompt", nargs="*", help="Prompt text; read from stdin when omitted")
+    chat_parser.add_argument("--provider", default=None, choices=list(PROVIDERS),
+                             help=f"Provider (default: {DEFAULT_PROVIDER} or the continued conversation's)")
+    chat_parser.add_argument("--model", default=None, help="Model (default: the provider's first catalog model)")
+    chat_parser.add_argument("--conversation", help="Id of a saved conversation to continue")
+    chat_parser.add_argument("--save-dir", default="conversations", help="Conversation directory")
+    chat_parser.add_argument("--no-save", action="store_true", help="Do not save the conversation")
+    chat_parser.add_argument("--no-stream", action="store_true", help="Print the answer once it is complete")
+    chat_parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache lookup")
+    chat_parser.add_argument("--metrics", action="store_true", help="Print latency and token counts to stderr")
+    chat_parser.set_defaults(handler=run_chat)
+
+    batch_parser = commands.add_parser("batch", help="Run a JSONL or CSV prompt file against one model")
+    batch_runner.add_arguments(batch_parser)
+    batch_parser.set_defaults(handler=batch_runner.run_from_args)
+    return parser
+
+
+def run_chat(args, parser: argparse.ArgumentParser) -> int:
+    """Send one prompt and print the answer; returns the exit code"""
+    from context_builder import ContextBuilder
+    from conversation_manager import Conversation, ConversationManager
+    from http_pool import SessionPool
+    from model_catalog import shared_catalog
+    from request_executor import CancelToken
+    from response_cache import ResponseCache
+    from scheduler import shared_scheduler
+
+    manager = ConversationManager(args.save_dir)
+    if args.conversation:
+        try:
+            conversation = Conversation.from_dict(manager.load_conversation(args.conversation))
+        except FileNotFoundError as e:
+            parser.error(str(e))
+        provider = args.provider or conversation.provider
+        # The conversation's model belongs to its own provider; the history is cut to the model actually sent to
+        if args.model:
+            model = args.model
+        elif provider == conversation.provider:
+            model = conversation.model
+        else:
+            model = shared_catalog.models(provider)[0]
+    else:
+        provider = args.provider or DEFAULT_PROVIDER
+        if provider not in PROVIDERS:
+            parser.error(f"Unknown provider: {provider}")
+        model = args.model or shared_catalog.models(provider)[0]
+        conversation = Conversation(provider, model)
+
+    prompt = " ".join(args.prompt).strip()
+    if not prompt and not sys.stdin.isatty():
+        prompt = sys.stdin.read().strip()
+    if not prompt:
+        parser.error("no prompt given")
+
+    adapter = get_provider(provider)
+    api_key = os.environ.get(adapter.env_var)
+    if not api_key:
+        parser.error(f"{adapter.env_var} is not set")
+
+    conversation.add_message("user", prompt)
+    messages = ContextBuilder().build(conversation, shared_catalog.context_budget(provider, model))
+    cache = ResponseCache(os.path.join(os.path.dirname(manager.save_dir), "response_cache"))
+    cache_key = ResponseCache.make_key(provider, model, messages, adapter.generation_params())
+    stream = not args.no_stream
+
+    def on_delta(delta):
+        sys.stdout.write(delta)
+        sys.stdout.flush()
+
+    def on_retry(attempt, delay, error):
+        print(f"Retry {attempt} in {delay:.1f}s: {error}", file=sys.stderr)
+
+    metrics = {}
+    token = CancelToken(adapter.deadline)
+    pool = SessionPool(pool_maxsize=1)
+    try:
+        text = None if args.no_cache else cache.get(cache_key)
+        cached = text is not None
+        if not cached:
+            text = shared_scheduler.send_chat(pool.get(provider), adapter, api_key, model, messages,
+                                              stream, token, on_delta if stream else None, on_retry, metrics)
+            cache.put(cache_key, text)
+    except KeyboardInterrupt:
+        token.cancel()
+        print("\n[Request cancelled]", file=sys.stderr)
+        return 130
+    except Exception as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        return 1
+    finally:
+        token.finish()
+        pool.close()
+
+    # Streamed answers are already on screen
+    if cached or not stream:
+        sys.stdout.write(text)
+    sys.stdout.write("\n")
+
+    conversation.add_message("assistant", text, metrics)
+    conversation.record_served_by(provider, model)
+    if not args.no_save:
+        manager.save_conversation(conversation)
+        print(f"conversation {conversation.id}", file=sys.stderr)
+    if args.metrics and metrics:
+        print(" ".join(f"{name}={value}" for name, value in metrics.items()), file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    """Entry point of the llm-gui command"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    return args.handler(args, parser)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
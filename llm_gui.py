@@ -3,15 +3,31 @@
 import os
 import sys
 import json
-import requests
-import winreg
 import ctypes
+try:
+    import winreg
+except ImportError:
+    winreg = None  # Not on Windows; keys are kept in the process environment only
+import time
 from datetime import datetime
-from conversation_manager import ConversationManager
+from conversation_manager import ConversationManager, Conversation
 from aider_manager import AiderManager
+from request_executor import RequestExecutor, RequestCancelled, RequestTimeout
+from http_pool import SessionPool
+from providers import PROVIDERS, get_provider
+from scheduler import shared_scheduler
+from context_builder import ContextBuilder
+from response_cache import ResponseCache
+from batch_runner import BatchRunner
+from hedging import HedgePolicy, HedgedSender
+from metrics import MetricsStore
+from cassette import CassettePool, cassette_from_env
+from text_renderer import BufferedRenderer
+from transcript_view import TranscriptView, format_turn, turn_header
+from highlighter import MarkdownHighlighter
+from model_catalog import shared_catalog
 from tkinter import filedialog
 import threading
-from queue import Queue
 
 # Importiere die erforderlichen Module für die Erstellung der GUI
 try:
@@ -24,6 +40,19 @@ except ModuleNotFoundError as e:
     print(f"Fehler: {e}. Bitte stelle sicher, dass alle erforderlichen Module installiert sind.")
     sys.exit(1)
 
+# Connection pool settings; set LLM_GUI_HTTP2=1 to use HTTP/2 when httpx is installed
+POOL_MAXSIZE = 8
+HTTP2_ENABLED = os.environ.get("LLM_GUI_HTTP2") == "1"
+
+# Aider is started in the background shortly after the window appears; LLM_GUI_AIDER_WARMUP=0
+# defers it until the Aider dialog is first used
+AIDER_WARMUP = os.environ.get("LLM_GUI_AIDER_WARMUP", "1") != "0"
+AIDER_WARMUP_DELAY_MS = 1000
+# Model lists are revalidated in the background once the window is up
+MODEL_REFRESH_DELAY_MS = 500
+# Pause in typing before the Load dialog searches
+SEARCH_DELAY_MS = 150
+
 def is_admin():
     """Check if the script is running with admin privileges"""
     try:
@@ -33,6 +62,9 @@ def is_admin():
 
 def set_environment_variable(name, value):
     """Set a permanent environment variable in Windows"""
+    if winreg is None:
+        os.environ[name] = value
+        return True
     try:
         # Open the registry key for environment variables
         key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, 'Environment', 0, winreg.KEY_ALL_ACCESS)
@@ -67,26 +99,52 @@ class LLMGUI:
         self.root = root
         root.title("LLM GUI")
 
-        # Initialize conversation manager
-        self.conversation_manager = ConversationManager()
-        self.aider_manager = AiderManager()
-        self.event_queue = Queue()
-        
-        # Start event processing thread
-        self.event_thread = threading.Thread(target=self.process_events, daemon=True)
-        self.event_thread.start()
+        # Initialize conversation manager; saves run on a worker so disk stalls never freeze the window
+        self.conversation_manager = ConversationManager(
+            background_saves=True,
+            on_save_error=lambda conversation_id, error: self.root.after(0, self.report_save_error, error))
+        self.context_builder = ContextBuilder()
+        # Model lists, context windows and prices; read from disk, refreshed in the background
+        self.model_catalog = shared_catalog
+
+        # Cache responses next to the conversations directory
+        cache_dir = os.path.join(os.path.dirname(self.conversation_manager.save_dir), "response_cache")
+        self.response_cache = ResponseCache(cache_dir)
+        # Aider is built off the UI thread; aider_state is 'idle', 'starting', 'ready' or 'failed'
+        self.aider_manager = None
+        self.aider_state = "idle"
+        self.aider_error = None
+        self.aider_ready = threading.Event()
+        self.aider_lock = threading.Lock()
+
+        # Run provider requests on background workers, results return via root.after
+        self.request_executor = RequestExecutor(lambda callback, *args: self.root.after(0, callback, *args))
+        self.active_request = None
+        self.response_started = False
+
+        # Global in-flight cap, rate limits and retries shared with batch runs and Aider
+        self.scheduler = shared_scheduler
+        # Time-to-first-token history for hedging, kept for the whole session
+        self.hedge_policy = HedgePolicy([])
+        # Rolling latency and throughput per provider/model for the metrics panel
+        self.metrics_store = MetricsStore()
+        self.metrics_table = None
+
+        # Keep-alive sessions per provider
+        self.session_pool = SessionPool(pool_maxsize=POOL_MAXSIZE, http2=HTTP2_ENABLED)
+        for adapter in PROVIDERS.values():
+            self.session_pool.configure(adapter.name, pool_maxsize=adapter.pool_maxsize)
+
+        # Record or replay provider traffic when LLM_GUI_CASSETTE is set
+        self.cassette = cassette_from_env()
+        if self.cassette:
+            self.session_pool = CassettePool(self.session_pool, self.cassette)
         
         # Create menu bar
         self.create_menu()
 
         # Initialize variables
-        self.api_keys = {
-            'anthropic': tk.StringVar(),
-            'openai': tk.StringVar(),
-            'google': tk.StringVar(),
-            'mistral': tk.StringVar(),
-            'openrouter': tk.StringVar()
-        }
+        self.api_keys = {provider: tk.StringVar() for provider in PROVIDERS}
         
         # Load API keys from environment
         self.load_api_keys()
@@ -104,6 +162,27 @@ class LLMGUI:
         # Create prompt and response areas
         self.create_prompt_response_areas()
 
+        # Refresh stale model lists and warm up Aider once the window is up
+        self.root.after(MODEL_REFRESH_DELAY_MS, self.refresh_model_catalog)
+        if AIDER_WARMUP:
+            self.root.after(AIDER_WARMUP_DELAY_MS, self.start_aider_init)
+
+        # Write pending saves before the window goes away
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
+    def close(self):
+        """Cancel the running request, flush the conversation saves and close the window"""
+        self.cancel_request()
+        try:
+            self.conversation_manager.close()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save conversations: {str(e)}")
+        self.root.destroy()
+
+    def report_save_error(self, error):
+        """Tell the user that a background save failed"""
+        messagebox.showerror("Error", f"Failed to save conversation: {str(error)}")
+
     def save_api_key(self, provider):
         """Save API key to system environment variables"""
         api_key = self.api_keys[provider].get().strip()
@@ -116,15 +195,8 @@ class LLMGUI:
 
     def load_api_keys(self):
         """Load API keys from environment variables"""
-        env_mapping = {
-            'anthropic': 'ANTHROPIC_API_KEY',
-            'openai': 'OPENAI_API_KEY',
-            'google': 'GOOGLE_API_KEY',
-            'mistral': 'MISTRAL_API_KEY',
-            'openrouter': 'OPENROUTER_API_KEY'
-        }
-        for provider, env_var in env_mapping.items():
-            key = os.environ.get(env_var, '')
+        for provider, adapter in PROVIDERS.items():
+            key = os.environ.get(adapter.env_var, '')
             self.api_keys[provider].set(key)
 
     def create_menu(self):
@@ -148,21 +220,26 @@ class LLMGUI:
         tools_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Tools", menu=tools_menu)
         tools_menu.add_command(label="Code Edit with Aider", command=self.show_aider_dialog)
+        tools_menu.add_command(label="Compare Models", command=self.show_compare_dialog)
+        tools_menu.add_command(label="Batch Run", command=self.show_batch_dialog)
+        tools_menu.add_command(label="Request Metrics", command=self.show_metrics_dialog)
         
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit)
+        file_menu.add_command(label="Exit", command=self.close)
 
     def new_conversation(self):
         """Start a new conversation"""
+        self.cancel_request()
         provider = self.provider_var.get()
         model = self.model_var.get()
         self.conversation_manager.start_new_conversation(provider, model)
         self.prompt_text.delete("1.0", tk.END)
-        self.response_text.delete("1.0", tk.END)
+        self.show_transcript()
 
     def load_conversation_dialog(self):
         """Show dialog to load a previous conversation"""
-        conversations = self.conversation_manager.list_conversations()
+        manager = self.conversation_manager
+        conversations = manager.list_conversations()
         if not conversations:
             messagebox.showinfo("Info", "No saved conversations found.")
             return
@@ -170,43 +247,97 @@ class LLMGUI:
         # Create a dialog window
         dialog = tk.Toplevel(self.root)
         dialog.title("Load Conversation")
-        dialog.geometry("600x400")
+        dialog.geometry("800x400")
         dialog.transient(self.root)
         dialog.grab_set()
 
+        # Full-text search over all messages when the storage backend has an index
+        search_var = tk.StringVar()
+        if manager.supports_search:
+            search_frame = ttk.Frame(dialog)
+            search_frame.pack(fill=tk.X, padx=5, pady=(5, 0))
+            ttk.Label(search_frame, text="Search:").pack(side="left")
+            search_entry = ttk.Entry(search_frame, textvariable=search_var)
+            search_entry.pack(side="left", fill=tk.X, expand=True, padx=5)
+            search_entry.focus_set()
+
         # Create a listbox with conversations
         listbox = tk.Listbox(dialog, width=70)
         listbox.pack(padx=5, pady=5, fill=tk.BOTH, expand=True)
+        rows = list(conversations)
+
+        def fill(entries, describe):
+            rows[:] = entries
+            listbox.delete(0, tk.END)
+            for conv in entries:
+                timestamp = datetime.fromisoformat(conv["timestamp"]).strftime("%Y-%m-%d %H:%M:%S")
+                listbox.insert(tk.END, f"{timestamp} - {conv['provider']} - {conv['model']} - {describe(conv)}")
 
-        # Add conversations to listbox
-        for conv in conversations:
-            timestamp = datetime.fromisoformat(conv["timestamp"]).strftime("%Y-%m-%d %H:%M:%S")
-            listbox.insert(tk.END, f"{timestamp} - {conv['provider']} - {conv['model']}")
+        def show_conversations():
+            fill(conversations, lambda conv: f"{conv['message_count']} messages - {conv['preview']}")
+
+        def show_search_results():
+            search_job[0] = None
+            text = search_var.get().strip()
+            if not text:
+                show_conversations()
+                return
+            hits = manager.search_conversations(text)
+            fill(hits, lambda hit: f"{hit['role'].title()}: {' '.join(hit['snippet'].split())}")
+
+        # Search once typing pauses instead of on every key
+        search_job = [None]
+
+        def on_search_changed(*args):
+            if search_job[0] is not None:
+                dialog.after_cancel(search_job[0])
+            search_job[0] = dialog.after(SEARCH_DELAY_MS, show_search_results)
+
+        search_var.trace_add("write", on_search_changed)
+
+        def rebuild_index():
+            manager.rebuild_index()
+            conversations[:] = manager.list_conversations()
+            show_search_results()
+
+        # Add conversations to listbox; the entries come from the metadata index
+        show_conversations()
 
         def load_selected():
             selection = listbox.curselection()
             if selection:
-                conv = conversations[selection[0]]
+                conv = rows[selection[0]]
                 self.load_conversation(conv)
                 dialog.destroy()
 
         # Add load button
         load_button = ttk.Button(dialog, text="Load", command=load_selected)
-        load_button.pack(pady=5)
+        load_button.pack(side="left", padx=5, pady=5)
+        ttk.Button(dialog, text="Rebuild Index", command=rebuild_index).pack(side="right", padx=5, pady=5)
+        listbox.bind("<Double-Button-1>", lambda event: load_selected())
 
     def load_conversation(self, conversation):
-        """Load a conversation into the GUI"""
+        """Load a conversation into the GUI so it can be continued"""
+        self.cancel_request()
+
         # Set provider and model
         self.provider_var.set(conversation["provider"])
         self.update_models()
         self.model_var.set(conversation["model"])
 
-        # Display messages
-        self.response_text.delete("1.0", tk.END)
-        for msg in conversation["messages"]:
-            timestamp = datetime.fromisoformat(msg["timestamp"]).strftime("%Y-%m-%d %H:%M:%S")
-            role = msg["role"].title()
-            self.response_text.insert(tk.END, f"[{timestamp}] {role}:\n{msg['content']}\n\n")
+        # Display the newest messages; older ones are paged in on scroll
+        self.conversation_manager.resume_conversation(conversation["id"])
+        self.show_transcript()
+
+    def show_transcript(self):
+        """Show the current conversation in the windowed response view"""
+        manager = self.conversation_manager
+        if not manager.current_conversation:
+            self.transcript.show(None, 0)
+            return
+        conversation_id = manager.current_conversation.id
+        self.transcript.show(lambda start, end: manager.load_messages(conversation_id, start, end),
+                             manager.count_messages(conversation_id))
 
     def create_api_key_entries(self):
         """Create API key entries"""
@@ -255,9 +386,9 @@ class LLMGUI:
         ttk.Label(self.main_frame, text="Select Provider:").grid(row=6, column=0, sticky=tk.W, pady=5)
         self.provider_var = tk.StringVar(value='anthropic')  # Set Anthropic as default
         self.provider_dropdown = ttk.Combobox(self.main_frame, textvariable=self.provider_var)
-        self.provider_dropdown['values'] = ['anthropic', 'openai', 'google', 'mistral', 'openrouter']
+        self.provider_dropdown['values'] = list(PROVIDERS)
         self.provider_dropdown.grid(row=6, column=1, sticky=(tk.W, tk.E), pady=5)
-        self.provider_dropdown.bind('<<ComboboxSelected>>', self.update_models)
+        self.provider_dropdown.bind('<<ComboboxSelected>>', self.on_provider_selected)
         
         # Model selection
         ttk.Label(self.main_frame, text="Select Model:").grid(row=7, column=0, sticky=tk.W, pady=5)
@@ -281,38 +412,101 @@ class LLMGUI:
         response_label.grid(row=9, column=0, padx=5, pady=5, sticky="w")
         self.response_text = scrolledtext.ScrolledText(self.main_frame, height=10, wrap=tk.WORD)
         self.response_text.grid(row=9, column=1, padx=5, pady=5, sticky="nsew")
+        # Only a window of turns is rendered; streamed text is drawn in batches at a capped frame rate
+        # and Markdown/code highlighting is lexed on a worker thread
+        self.transcript = TranscriptView(self.response_text, self.root,
+                                         highlighter=MarkdownHighlighter(self.response_text, self.root))
+
+        # Streaming toggle
+        self.stream_var = tk.BooleanVar(value=True)
+        self.stream_check = ttk.Checkbutton(self.main_frame, text="Stream response", variable=self.stream_var)
+        self.stream_check.grid(row=10, column=1, padx=5, pady=5, sticky="w")
+
+        # Response cache toggle and statistics
+        cache_frame = ttk.Frame(self.main_frame)
+        cache_frame.grid(row=11, column=1, padx=5, pady=5, sticky="w")
+        self.use_cache_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(cache_frame, text="Use response cache",
+                        variable=self.use_cache_var).pack(side="left")
+        self.cache_status = ttk.Label(cache_frame, text="")
+        self.cache_status.pack(side="left", padx=10)
 
-        # Send button
-        self.send_button = ttk.Button(self.main_frame, text="Send", command=self.send_request)
-        self.send_button.grid(row=10, column=1, padx=5, pady=5, sticky="e")
+        # Backup model for hedging and failover
+        hedge_frame = ttk.Frame(self.main_frame)
+        hedge_frame.grid(row=12, column=1, padx=5, pady=5, sticky="w")
+        ttk.Label(hedge_frame, text="Backup model:").pack(side="left")
+        self.backup_var = tk.StringVar(value="(none)")
+        self.backup_dropdown = ttk.Combobox(hedge_frame, textvariable=self.backup_var, state="readonly",
+                                            width=40)
+        self.update_backup_models()
+        self.backup_dropdown.pack(side="left", padx=5)
+        self.hedge_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(hedge_frame, text="Hedge slow requests",
+                        variable=self.hedge_var).pack(side="left", padx=5)
+
+        # Send and Cancel buttons
+        button_frame = ttk.Frame(self.main_frame)
+        button_frame.grid(row=10, column=1, padx=5, pady=5, sticky="e")
+        self.request_status = ttk.Label(button_frame, text="")
+        self.request_status.pack(side="left", padx=5)
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel_request,
+                                        state=tk.DISABLED)
+        self.cancel_button.pack(side="left", padx=2)
+        self.send_button = ttk.Button(button_frame, text="Send", command=self.send_request)
+        self.send_button.pack(side="left", padx=2)
 
         # Configure grid
         self.main_frame.grid_columnconfigure(1, weight=1)
 
+    def on_provider_selected(self, event=None):
+        """Update the model list and pre-warm the connection to the new provider"""
+        self.update_models()
+        provider = self.provider_var.get()
+        if provider in PROVIDERS:
+            self.session_pool.prewarm(provider, PROVIDERS[provider].base_url)
+
     def update_models(self, event=None):
         """Update available models based on selected provider"""
         provider = self.provider_var.get()
-        
-        # Set available models based on provider
-        if provider == 'anthropic':
-            models = ['claude-3-opus-20240229', 'claude-3-sonnet-20240229']
-        elif provider == 'openai':
-            models = ['gpt-4', 'gpt-3.5-turbo']
-        elif provider == 'google':
-            models = ['gemini-pro']
-        elif provider == 'mistral':
-            models = ['mistral-tiny', 'mistral-small', 'mistral-medium']
-        else:  # openrouter
-            models = ['openrouter/auto']
-            
+        # The provider box is editable; names it does not know get the OpenRouter list as before
+        models = self.model_catalog.models(provider if provider in PROVIDERS else 'openrouter')
         self.model_dropdown['values'] = models
         self.model_var.set(models[0])  # Set first model as default
 
+    def update_backup_models(self):
+        """Offer every provider/model pair of the catalog as backup model"""
+        self.backup_dropdown['values'] = ["(none)"] + [f"{name}/{model}" for name in PROVIDERS
+                                                       for model in self.model_catalog.models(name)]
+
+    def refresh_model_catalog(self):
+        """Fetch stale model lists of all providers with an API key in the background"""
+        if self.cassette:
+            return  # Recorded sessions only know the recorded requests
+        api_keys = {provider: var.get() for provider, var in self.api_keys.items()}
+        self.model_catalog.refresh_in_background(
+            self.session_pool, api_keys,
+            on_update=lambda provider: self.root.after(0, self.handle_models_updated, provider))
+
+    def handle_models_updated(self, provider):
+        """Show a refreshed model list, keeping the selected model if it still exists"""
+        self.update_backup_models()
+        if provider != self.provider_var.get():
+            return
+        models = self.model_catalog.models(provider)
+        self.model_dropdown['values'] = models
+        if self.model_var.get() not in models:
+            self.model_var.set(models[0])
+
     def send_request(self):
-        """Send request to the selected provider"""
+        """Send request to the selected provider on a background worker"""
         try:
+            if self.active_request:
+                return
+
             provider = self.provider_var.get()
             api_key = self.api_keys[provider].get()
+            if not api_key and self.cassette and self.cassette.replaying:
+                api_key = "replay"  # Replays never reach the provider
             if not api_key:
                 messagebox.showerror("Error", f"Please enter your {provider.title()} API key.")
                 return
@@ -330,139 +524,160 @@ class LLMGUI:
             # Start new conversation if none exists
             if not self.conversation_manager.current_conversation:
                 self.conversation_manager.start_new_conversation(provider, model)
+                self.show_transcript()
 
             # Add user message to conversation
-            self.conversation_manager.add_message("user", prompt)
-
-            # Send request based on provider
-            if provider == 'anthropic':
-                self.send_anthropic_request(api_key, model, prompt)
-            elif provider == 'openai':
-                self.send_openai_request(api_key, model, prompt)
-            elif provider == 'google':
-                self.send_google_request(api_key, model, prompt)
-            elif provider == 'mistral':
-                self.send_mistral_request(api_key, model, prompt)
-            elif provider == 'openrouter':
-                self.send_openrouter_request(api_key, model, prompt)
+            self.transcript.append_message(self.conversation_manager.add_message("user", prompt))
+
+            stream = self.stream_var.get()
+            adapter = get_provider(provider)
+            session = self.session_pool.get(provider)
+            # Send the conversation history that fits into the model's context window
+            conversation = self.conversation_manager.current_conversation
+            messages = self.context_builder.build(conversation, self.model_catalog.context_budget(provider, model))
+
+            def on_retry(attempt, delay, error):
+                self.root.after(0, self.request_status.config,
+                                {'text': f"Retry {attempt} in {delay:.1f}s: {error}"[:80]})
+
+            # Unchecking the cache bypasses the lookup but still stores the fresh answer
+            use_cache = self.use_cache_var.get()
+            cache_key = ResponseCache.make_key(provider, model, messages, adapter.generation_params())
+            sender = self.make_hedged_sender()
+
+            def job(token):
+                # The worker must not touch Tk; deltas are queued for the renderer's next frame
+                def on_delta(delta):
+                    self.append_response_delta(delta, token)
+
+                result = {'provider': provider, 'model': model, 'hedged': False, 'failover': False}
+                if use_cache:
+                    cached = self.response_cache.get(cache_key)
+                    if cached is not None:
+                        return dict(result, text=cached)
+                if sender:
+                    result = sender.send(provider, model, conversation, self.model_catalog.context_budget,
+                                         stream, token, on_delta, on_retry, messages)
+                else:
+                    result['metrics'] = {}
+                    result['text'] = self.scheduler.send_chat(session, adapter, api_key, model, messages,
+                                                              stream, token, on_delta, on_retry,
+                                                              result['metrics'])
+                # Answers from a backup model must not be served for the primary's key
+                if (result['provider'], result['model']) == (provider, model):
+                    self.response_cache.put(cache_key, result['text'])
+                return result
+
+            self.response_started = False
+            self.transcript.begin_live()
+            token = self.request_executor.submit(
+                job,
+                on_success=lambda result: self.handle_response(result, token),
+                on_error=lambda error: self.handle_request_error(error, token),
+                timeout=adapter.deadline
+            )
+            self.active_request = token
+            self.set_request_running(True)
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to send request: {str(e)}")
 
-    def send_anthropic_request(self, api_key, model, prompt):
-        """Send request to Anthropic API"""
-        headers = {
-            "x-api-key": api_key,
-            "anthropic-version": "2023-06-01",
-            "content-type": "application/json",
-        }
-        data = {
-            "model": model,
-            "messages": [{"role": "user", "content": prompt}],
-            "max_tokens": 4096
-        }
-        response = requests.post(
-            "https://api.anthropic.com/v1/messages",
-            headers=headers,
-            json=data
-        )
-        self.handle_response(response)
-
-    def send_openai_request(self, api_key, model, prompt):
-        """Send request to OpenAI API"""
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        data = {
-            "model": model,
-            "messages": [{"role": "user", "content": prompt}]
-        }
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=data
-        )
-        self.handle_response(response)
-
-    def send_google_request(self, api_key, model, prompt):
-        """Send request to Google API"""
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        data = {
-            "model": model,
-            "contents": [{"role": "user", "parts": [{"text": prompt}]}]
-        }
-        response = requests.post(
-            f"https://generativelanguage.googleapis.com/v1/models/{model}:generateContent",
-            headers=headers,
-            json=data
-        )
-        self.handle_response(response)
-
-    def send_mistral_request(self, api_key, model, prompt):
-        """Send request to Mistral API"""
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        data = {
-            "model": model,
-            "messages": [{"role": "user", "content": prompt}]
-        }
-        response = requests.post(
-            "https://api.mistral.ai/v1/chat/completions",
-            headers=headers,
-            json=data
-        )
-        self.handle_response(response)
-
-    def send_openrouter_request(self, api_key, model, prompt):
-        """Send request to OpenRouter API"""
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://github.com/your-repository",
-            "X-Title": "LLM GUI"
-        }
-        data = {
-            "model": model,
-            "messages": [{"role": "user", "content": prompt}]
-        }
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            json=data
-        )
-        self.handle_response(response)
+    def make_hedged_sender(self):
+        """Hedged sender for the selected backup model, or None without a backup"""
+        backup = self.backup_var.get()
+        if "/" not in backup:
+            return None
+        self.hedge_policy.backups = [tuple(backup.split("/", 1))]
+        self.hedge_policy.hedge = self.hedge_var.get()
+        api_keys = {provider: var.get() for provider, var in self.api_keys.items()}
+        return HedgedSender(self.hedge_policy, self.scheduler, self.session_pool, api_keys)
 
-    def handle_response(self, response):
-        """Handle API response and update UI"""
-        if response.status_code == 200:
-            result = response.json()
-            provider = self.provider_var.get()
-            
-            # Extract response text based on provider
-            if provider == 'anthropic':
-                response_text = result["content"][0]["text"]
-            elif provider == 'openai' or provider == 'mistral':
-                response_text = result["choices"][0]["message"]["content"]
-            elif provider == 'google':
-                response_text = result["candidates"][0]["content"]["parts"][0]["text"]
-            
-            # Add assistant message to conversation
-            self.conversation_manager.add_message("assistant", response_text)
-            
-            # Save conversation after each response
-            self.conversation_manager.save_conversation()
-            
-            # Update UI with timestamp
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.response_text.insert(tk.END, f"\n[{timestamp}] Assistant:\n{response_text}\n")
+    def cancel_request(self):
+        """Cancel the request that is currently in flight"""
+        if self.active_request:
+            self.active_request.cancel()
+            self.set_request_running(False)
+            if self.response_started:
+                self.transcript.write("\n\n")
+            self.transcript.write("[Request cancelled]\n\n")
+            self.transcript.end_live()
+
+    def set_request_running(self, running):
+        """Toggle the Send and Cancel buttons while a request is in flight"""
+        if running:
+            self.send_button.config(state=tk.DISABLED)
+            self.cancel_button.config(state=tk.NORMAL)
+        else:
+            self.active_request = None
+            self.request_status.config(text="")
+            self.send_button.config(state=tk.NORMAL)
+            self.cancel_button.config(state=tk.DISABLED)
+            self.update_cache_status()
+
+    def update_cache_status(self):
+        """Show the response cache hit/miss statistics"""
+        stats = self.response_cache.stats()
+        self.cache_status.config(
+            text=f"Cache: {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%})")
+
+    def show_prompt_cache_usage(self, metrics):
+        """Show how much of the last prompt the provider served from its prompt cache"""
+        read = metrics.get("cache_read_tokens")
+        written = metrics.get("cache_write_tokens")
+        if read is None and written is None:
+            return
+        self.request_status.config(text=f"Prompt cache: {read or 0} tokens read / {written or 0} written")
+
+    def append_response_delta(self, delta, token):
+        """Queue a streamed text delta for the response area; called on the worker thread"""
+        if token.cancelled:
+            return
+        if not self.response_started:
+            self.response_started = True
+            self.transcript.write(turn_header("assistant"), token.event)
+        self.transcript.write(delta, token.event)
+
+    def handle_response(self, result, token=None):
+        """Store the finished response and update UI"""
+        # Ignore results of requests that were cancelled in the meantime
+        if token is not None and token is not self.active_request:
+            return
+        self.set_request_running(False)
+
+        # Add assistant message to conversation
+        response_text = result['text']
+        metrics = result.get('metrics')
+        message = self.conversation_manager.add_message("assistant", response_text, metrics)
+        self.conversation_manager.current_conversation.record_served_by(
+            result['provider'], result['model'], result['hedged'], result['failover'])
+        if metrics:
+            self.record_metrics(result['provider'], result['model'], metrics)
+            self.show_prompt_cache_usage(metrics)
+
+        # Save conversation after each response
+        self.conversation_manager.save_conversation()
+
+        # Streamed responses are already queued for display
+        if self.response_started:
+            self.transcript.write("\n\n")
         else:
-            messagebox.showerror("Error", f"API request failed: {response.text}")
+            self.transcript.write(format_turn(message))
+        self.transcript.end_live(message)
+
+    def handle_request_error(self, error, token=None):
+        """Report a failed or timed out request"""
+        if token is not None and token is not self.active_request:
+            return
+        self.set_request_running(False)
+        if self.response_started:
+            self.transcript.write("\n\n")
+        if isinstance(error, RequestCancelled):
+            self.transcript.write("[Request cancelled]\n\n")
+        self.transcript.end_live()
+        if isinstance(error, RequestTimeout):
+            messagebox.showerror("Timeout", str(error))
+        elif not isinstance(error, RequestCancelled):
+            messagebox.showerror("Error", str(error))
 
     def export_conversation(self, format_type: str):
         """Export the current conversation"""
@@ -488,6 +703,308 @@ class LLMGUI:
         except Exception as e:
             messagebox.showerror("Export Error", f"Failed to export conversation: {str(e)}")
 
+    def show_compare_dialog(self):
+        """Show dialog to send one prompt to several models at once"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Compare Models")
+        dialog.geometry("1200x800")
+        # Closing the window stops the requests still running; finished answers are already saved
+        dialog.bind("<Destroy>", lambda event: self.cancel_comparison() if event.widget is dialog else None)
+        dialog.grid_columnconfigure(0, weight=1)
+        dialog.grid_rowconfigure(2, weight=1)
+
+        # Provider/model pairs; only providers with an API key can be selected
+        select_frame = ttk.LabelFrame(dialog, text="Models")
+        select_frame.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
+        self.compare_pairs = [(provider, model)
+                              for provider in PROVIDERS
+                              if self.api_keys[provider].get()
+                              for model in self.model_catalog.models(provider)]
+        self.compare_listbox = tk.Listbox(select_frame, selectmode="multiple", height=6)
+        for provider, model in self.compare_pairs:
+            self.compare_listbox.insert(tk.END, f"{provider} / {model}")
+        self.compare_listbox.pack(fill="x", padx=5, pady=5)
+
+        # Prompt and buttons
+        prompt_frame = ttk.LabelFrame(dialog, text="Prompt")
+        prompt_frame.grid(row=1, column=0, padx=5, pady=5, sticky="ew")
+        self.compare_prompt = tk.Text(prompt_frame, height=4, wrap=tk.WORD)
+        self.compare_prompt.pack(fill="x", padx=5, pady=5)
+        button_frame = ttk.Frame(prompt_frame)
+        button_frame.pack(fill="x", padx=5, pady=5)
+        self.compare_cancel_button = ttk.Button(button_frame, text="Cancel", state=tk.DISABLED,
+                                                command=self.cancel_comparison)
+        self.compare_cancel_button.pack(side="right", padx=2)
+        self.compare_run_button = ttk.Button(button_frame, text="Run Comparison",
+                                             command=self.run_comparison)
+        self.compare_run_button.pack(side="right", padx=2)
+
+        # Side-by-side result panes, filled when a comparison starts
+        self.compare_panes = ttk.PanedWindow(dialog, orient=tk.HORIZONTAL)
+        self.compare_panes.grid(row=2, column=0, padx=5, pady=5, sticky="nsew")
+        self.compare_outputs = []
+        self.compare_renderers = []
+        self.compare_tokens = []
+
+        # Latency table
+        columns = ("provider", "model", "ttft", "total", "chars", "status")
+        self.compare_table = ttk.Treeview(dialog, columns=columns, show="headings", height=6)
+        for column, heading in zip(columns, ("Provider", "Model", "First Token (s)",
+                                              "Total (s)", "Characters", "Status")):
+            self.compare_table.heading(column, text=heading)
+            self.compare_table.column(column, width=120)
+        self.compare_table.grid(row=3, column=0, padx=5, pady=5, sticky="ew")
+
+    def run_comparison(self):
+        """Send the compare prompt to all selected models concurrently"""
+        prompt = self.compare_prompt.get("1.0", tk.END).strip()
+        pairs = [self.compare_pairs[i] for i in self.compare_listbox.curselection()]
+        if not prompt:
+            messagebox.showwarning("Warning", "Please enter a prompt.", parent=self.compare_prompt)
+            return
+        if not pairs:
+            messagebox.showwarning("Warning", "Please select at least one model.", parent=self.compare_prompt)
+            return
+
+        # Reset panes and table
+        for pane in self.compare_panes.panes():
+            self.compare_panes.forget(pane)
+        self.compare_table.delete(*self.compare_table.get_children())
+        self.compare_outputs = []
+        self.compare_renderers = []
+        self.compare_tokens = []
+
+        # One worker per model so all requests run at the same time
+        executor = RequestExecutor(lambda callback, *args: self.root.after(0, callback, *args),
+                                   workers=len(pairs))
+        base_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        messages = [{"role": "user", "content": prompt}]
+
+        for index, (provider, model) in enumerate(pairs):
+            frame = ttk.LabelFrame(self.compare_panes, text=f"{provider} / {model}")
+            output = scrolledtext.ScrolledText(frame, wrap=tk.WORD, width=30)
+            output.pack(fill="both", expand=True, padx=2, pady=2)
+            self.compare_panes.add(frame, weight=1)
+            self.compare_outputs.append(output)
+            self.compare_renderers.append(BufferedRenderer(output, self.root))
+            self.compare_table.insert("", tk.END, iid=str(index),
+                                      values=(provider, model, "", "", "", "running"))
+
+            conversation = Conversation(provider, model, f"{base_id}_{index + 1}")
+            conversation.add_message("user", prompt)
+
+            job = self.make_compare_job(index, provider, model, messages)
+            self.compare_tokens.append(executor.submit(
+                job,
+                on_success=lambda result, i=index, c=conversation: self.handle_compare_result(i, c, result),
+                on_error=lambda error, i=index: self.handle_compare_error(i, error),
+                timeout=get_provider(provider).deadline
+            ))
+
+        # Workers exit once the submitted requests are done
+        executor.shutdown()
+        self.compare_run_button.config(state=tk.DISABLED)
+        self.compare_cancel_button.config(state=tk.NORMAL)
+
+    def make_compare_job(self, index, provider, model, messages):
+        """Build a worker job that streams one model's answer and times it"""
+        adapter = get_provider(provider)
+        api_key = self.api_keys[provider].get()
+        session = self.session_pool.get(provider)
+        renderer = self.compare_renderers[index]
+
+        def job(token):
+            start = time.perf_counter()
+            first_token = []
+            metrics = {}
+
+            def on_delta(delta):
+                if not first_token:
+                    first_token.append(time.perf_counter() - start)
+                renderer.write(delta, token.event)
+
+            text = self.scheduler.send_chat(session, adapter, api_key, model, messages,
+                                            True, token, on_delta, metrics=metrics)
+            total = time.perf_counter() - start
+            return {'text': text, 'ttft': first_token[0] if first_token else total, 'total': total,
+                    'provider': provider, 'model': model, 'metrics': metrics}
+
+        return job
+
+    def handle_compare_result(self, index, conversation, result):
+        """Store the answer of a finished model and record its latency"""
+        # Saved first, so the answer is kept even if the Compare window was closed meanwhile
+        conversation.add_message("assistant", result['text'], result['metrics'])
+        self.conversation_manager.save_conversation(conversation)
+        if result['metrics']:
+            self.record_metrics(result['provider'], result['model'], result['metrics'])
+        if not self.compare_table.winfo_exists():
+            return
+        row = self.compare_table.item(str(index), "values")
+        self.compare_table.item(str(index), values=(row[0], row[1], f"{result['ttft']:.2f}",
+                                                    f"{result['total']:.2f}", len(result['text']), "done"))
+        self.finish_comparison_if_done()
+
+    def handle_compare_error(self, index, error):
+        """Show the failure of one model in the latency table"""
+        if not self.compare_table.winfo_exists():
+            return
+        row = self.compare_table.item(str(index), "values")
+        status = "cancelled" if isinstance(error, RequestCancelled) else f"error: {error}"
+        self.compare_table.item(str(index), values=(row[0], row[1], "", "", "", status))
+        self.finish_comparison_if_done()
+
+    def finish_comparison_if_done(self):
+        """Re-enable the Run button once every model has finished"""
+        rows = [self.compare_table.item(iid, "values") for iid in self.compare_table.get_children()]
+        if all(row[5] != "running" for row in rows):
+            self.compare_run_button.config(state=tk.NORMAL)
+            self.compare_cancel_button.config(state=tk.DISABLED)
+
+    def cancel_comparison(self):
+        """Cancel all requests of the running comparison"""
+        for token in self.compare_tokens:
+            token.cancel()
+
+    def record_metrics(self, provider, model, metrics):
+        """Add the metrics of a finished request and refresh an open metrics panel"""
+        self.metrics_store.record(provider, model, metrics)
+        if self.metrics_table is not None and self.metrics_table.winfo_exists():
+            self.refresh_metrics()
+
+    def show_metrics_dialog(self):
+        """Show rolling latency and throughput percentiles per provider/model"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Request Metrics")
+        dialog.geometry("1100x300")
+
+        columns = ("provider", "model", "requests", "connect", "ttft", "total", "tokens_per_sec", "tokens",
+                   "prompt_cache")
+        headings = ("Provider", "Model", "Requests", "Connect p50/p95 (s)", "First Token p50/p95 (s)",
+                    "Total p50/p95 (s)", "Tokens/s p50/p95", "Tokens in/out", "Prompt cache read/write")
+        self.metrics_table = ttk.Treeview(dialog, columns=columns, show="headings")
+        for column, heading in zip(columns, headings):
+            self.metrics_table.heading(column, text=heading)
+            self.metrics_table.column(column, width=110)
+        self.metrics_table.pack(fill="both", expand=True, padx=5, pady=5)
+        ttk.Label(dialog, text=f"Last {self.metrics_store.window} requests per model of this session").pack(
+            side="left", padx=5, pady=5)
+        ttk.Button(dialog, text="Refresh", command=self.refresh_metrics).pack(side="right", padx=5, pady=5)
+        self.refresh_metrics()
+
+    def refresh_metrics(self):
+        """Fill the metrics panel from the metrics store"""
+        def pair(row, field, digits):
+            values = [row[f"{field}_p50"], row[f"{field}_p95"]]
+            return " / ".join("-" if value is None else f"{value:.{digits}f}" for value in values)
+
+        self.metrics_table.delete(*self.metrics_table.get_children())
+        for row in self.metrics_store.summary():
+            self.metrics_table.insert("", tk.END, values=(
+                row["provider"], row["model"], row["requests"],
+                pair(row, "connect", 2), pair(row, "ttft", 2), pair(row, "total", 2),
+                pair(row, "tokens_per_sec", 1), f"{row['input_tokens']} / {row['output_tokens']}",
+                f"{row['cache_read_tokens']} / {row['cache_write_tokens']}"))
+
+    def show_batch_dialog(self):
+        """Show dialog to run a prompt file against the selected model"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Batch Run")
+        dialog.geometry("600x250")
+        dialog.grid_columnconfigure(1, weight=1)
+        self.batch_runner = None
+
+        provider = self.provider_var.get()
+        model = self.model_var.get()
+        ttk.Label(dialog, text=f"Model: {provider} / {model}").grid(
+            row=0, column=0, columnspan=3, padx=5, pady=5, sticky="w")
+
+        # Input and output files
+        self.batch_input_var = tk.StringVar()
+        self.batch_output_var = tk.StringVar()
+        ttk.Label(dialog, text="Prompts (JSONL/CSV):").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        ttk.Entry(dialog, textvariable=self.batch_input_var).grid(row=1, column=1, padx=5, pady=5, sticky="ew")
+        ttk.Button(dialog, text="Browse", command=lambda: self.batch_input_var.set(
+            filedialog.askopenfilename(filetypes=[("Prompt files", "*.jsonl *.csv"), ("All files", "*.*")])
+        )).grid(row=1, column=2, padx=5, pady=5)
+        ttk.Label(dialog, text="Results (JSONL):").grid(row=2, column=0, padx=5, pady=5, sticky="w")
+        ttk.Entry(dialog, textvariable=self.batch_output_var).grid(row=2, column=1, padx=5, pady=5, sticky="ew")
+        ttk.Button(dialog, text="Browse", command=lambda: self.batch_output_var.set(
+            filedialog.asksaveasfilename(defaultextension=".jsonl", filetypes=[("JSONL", "*.jsonl")])
+        )).grid(row=2, column=2, padx=5, pady=5)
+
+        # Concurrency and rate limit
+        limits_frame = ttk.Frame(dialog)
+        limits_frame.grid(row=3, column=0, columnspan=3, padx=5, pady=5, sticky="w")
+        self.batch_concurrency_var = tk.IntVar(value=4)
+        self.batch_rpm_var = tk.StringVar(value="")
+        ttk.Label(limits_frame, text="Concurrency:").pack(side="left")
+        ttk.Spinbox(limits_frame, from_=1, to=64, width=5,
+                    textvariable=self.batch_concurrency_var).pack(side="left", padx=5)
+        ttk.Label(limits_frame, text="Requests/min (empty = no limit):").pack(side="left", padx=(15, 0))
+        ttk.Entry(limits_frame, width=8, textvariable=self.batch_rpm_var).pack(side="left", padx=5)
+
+        # Progress and buttons
+        self.batch_status = ttk.Label(dialog, text="")
+        self.batch_status.grid(row=4, column=0, columnspan=3, padx=5, pady=5, sticky="w")
+        button_frame = ttk.Frame(dialog)
+        button_frame.grid(row=5, column=0, columnspan=3, padx=5, pady=5, sticky="e")
+        self.batch_cancel_button = ttk.Button(button_frame, text="Cancel", state=tk.DISABLED,
+                                              command=lambda: self.batch_runner and self.batch_runner.cancel())
+        self.batch_cancel_button.pack(side="left", padx=2)
+        self.batch_start_button = ttk.Button(button_frame, text="Start",
+                                             command=lambda: self.start_batch(provider, model))
+        self.batch_start_button.pack(side="left", padx=2)
+
+    def start_batch(self, provider, model):
+        """Start a batch run in the background"""
+        input_path = self.batch_input_var.get()
+        output_path = self.batch_output_var.get()
+        api_key = self.api_keys[provider].get()
+        if not api_key:
+            messagebox.showerror("Error", f"Please enter your {provider.title()} API key.")
+            return
+        if not input_path or not output_path:
+            messagebox.showerror("Error", "Please choose a prompt file and a results file.")
+            return
+        try:
+            concurrency = int(self.batch_concurrency_var.get())
+            rpm = float(self.batch_rpm_var.get()) if self.batch_rpm_var.get().strip() else None
+        except (ValueError, tk.TclError):
+            messagebox.showerror("Error", "Concurrency and requests/min must be numbers.")
+            return
+
+        def on_progress(counts):
+            self.root.after(0, self.batch_status.config, {
+                'text': f"Completed {counts['completed']} - failed {counts['failed']} - "
+                        f"skipped {counts['skipped']}"})
+
+        self.batch_runner = BatchRunner(provider, model, api_key, concurrency, rpm,
+                                        session_pool=self.session_pool, on_progress=on_progress,
+                                        scheduler=self.scheduler)
+
+        def run():
+            try:
+                counts = self.batch_runner.run(input_path, output_path)
+                self.root.after(0, self.finish_batch, counts, None)
+            except Exception as e:
+                self.root.after(0, self.finish_batch, None, e)
+
+        self.batch_status.config(text="Running...")
+        self.batch_start_button.config(state=tk.DISABLED)
+        self.batch_cancel_button.config(state=tk.NORMAL)
+        threading.Thread(target=run, daemon=True).start()
+
+    def finish_batch(self, counts, error):
+        """Report the end of a batch run"""
+        self.batch_start_button.config(state=tk.NORMAL)
+        self.batch_cancel_button.config(state=tk.DISABLED)
+        if error:
+            self.batch_status.config(text=f"Batch failed: {error}")
+        else:
+            self.batch_status.config(text=f"Finished: {counts['completed']} completed, "
+                                          f"{counts['failed']} failed, {counts['skipped']} skipped")
+
     def show_aider_dialog(self):
         """Show dialog for Aider code editing"""
         dialog = tk.Toplevel(self.root)
@@ -509,17 +1026,17 @@ class LLMGUI:
         # Main model selection
         main_model_label = ttk.Label(model_frame, text="Main Model:")
         main_model_label.grid(row=0, column=0, padx=5, pady=5, sticky="w")
-        self.main_model_var = tk.StringVar(value="gpt-4")
+        self.main_model_var = tk.StringVar(value=self.model_catalog.aider_models('openai')[0])
         self.main_model_dropdown = ttk.Combobox(model_frame, textvariable=self.main_model_var,
-                                              values=self.aider_manager.get_available_models())
+                                              values=self.get_aider_models())
         self.main_model_dropdown.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
         
         # Weak model selection
         weak_model_label = ttk.Label(model_frame, text="Helper Model:")
         weak_model_label.grid(row=0, column=2, padx=5, pady=5, sticky="w")
-        self.weak_model_var = tk.StringVar(value="gpt-3.5-turbo")
+        self.weak_model_var = tk.StringVar(value="gpt-4o-mini")
         self.weak_model_dropdown = ttk.Combobox(model_frame, textvariable=self.weak_model_var,
-                                              values=self.aider_manager.get_available_models())
+                                              values=self.get_aider_models())
         self.weak_model_dropdown.grid(row=0, column=3, padx=5, pady=5, sticky="ew")
         
         # Configure model frame grid
@@ -606,6 +1123,69 @@ class LLMGUI:
                                   font=text_font)
         self.console_text.pack(fill="both", expand=True, padx=5, pady=5)
         console_scroll.config(command=self.console_text.yview)
+        self.aider_renderer = BufferedRenderer(self.aider_response, self.root)
+        self.console_renderer = BufferedRenderer(self.console_text, self.root)
+
+        # Start Aider now if it was not warmed up, and show whether it is ready
+        self.start_aider_init()
+        self.update_aider_status()
+
+    def start_aider_init(self):
+        """Build the AiderManager on a background thread unless it is ready or starting"""
+        with self.aider_lock:
+            if self.aider_state in ("starting", "ready"):
+                return
+            self.aider_state = "starting"
+            self.aider_error = None
+            self.aider_ready.clear()
+        threading.Thread(target=self._init_aider, daemon=True).start()
+
+    def _init_aider(self):
+        """Worker that builds the AiderManager and reports the result to the UI thread"""
+        try:
+            manager = AiderManager()
+        except Exception as e:
+            with self.aider_lock:
+                self.aider_error = e
+                self.aider_state = "failed"
+        else:
+            with self.aider_lock:
+                self.aider_manager = manager
+                self.aider_state = "ready"
+        self.aider_ready.set()
+        self.root.after(0, self.update_aider_status)
+
+    def get_aider_manager(self):
+        """Wait for the AiderManager, starting it if needed; call from a worker thread"""
+        self.start_aider_init()
+        self.aider_ready.wait()
+        if self.aider_state == "failed":
+            raise RuntimeError(f"Aider could not be started: {self.aider_error}")
+        return self.aider_manager
+
+    def get_aider_models(self):
+        """Aider models; the provider defaults are shown until Aider is ready"""
+        if self.aider_manager is not None:
+            return self.aider_manager.get_available_models()
+        return [model for provider in PROVIDERS for model in self.model_catalog.aider_models(provider)]
+
+    def update_aider_status(self):
+        """Show the Aider readiness in an open Aider dialog"""
+        if not hasattr(self, 'edit_status') or not self.edit_status.winfo_exists():
+            return
+        # Results of an edit replace the readiness message
+        text = self.edit_status.cget('text')
+        if text and not text.startswith(("Starting Aider", "Aider ")):
+            return
+        if self.aider_state == "ready":
+            self.edit_status.config(text="Aider ready")
+            models = self.get_aider_models()
+            self.main_model_dropdown['values'] = models
+            self.weak_model_dropdown['values'] = models
+        elif self.aider_state == "failed":
+            self.edit_status.config(text=f"Aider failed to start: {self.aider_error}"[:120])
+        else:
+            self.edit_status.config(text="Starting Aider...")
 
     def add_files_to_edit(self):
         """Add files to the edit list"""
@@ -638,7 +1218,7 @@ class LLMGUI:
         # Process in background thread to keep UI responsive
         def process_edit():
             try:
-                response = self.aider_manager.process_code_edit(prompt, files)  
+                response = self.get_aider_manager().process_code_edit(prompt, files)
                 # Schedule response handling in main thread
                 self.root.after(0, lambda: self._handle_aider_response(response))
             except Exception as e:
@@ -652,32 +1232,25 @@ class LLMGUI:
         """Handle the response from Aider"""
         # Clear previous status and response
         self.edit_status.config(text="")
-        self.aider_response.delete("1.0", tk.END)
-        self.console_text.delete("1.0", tk.END)
+        self.aider_renderer.clear()
+        self.console_renderer.clear()
         
         if response.get('success'):
             # Show the main response message
             message = response.get('message', '')
             if message:
-                try:
-                    # Try to insert the message directly
-                    self.aider_response.insert(tk.END, message + "\n")
-                except tk.TclError:
-                    # If there's an encoding error, try to clean the text
-                    clean_message = ''.join(char for char in message if ord(char) < 128)
-                    self.aider_response.insert(tk.END, clean_message + "\n")
+                self.aider_renderer.write(message + "\n")
             
             # Show console output if available
             if 'console_output' in response:
-                self.console_text.insert(tk.END, response['console_output'])
-                self.console_text.see(tk.END)
+                self.console_renderer.write(response['console_output'])
             
             # Show changed files if any
             changed_files = response.get('files_changed', [])
             if changed_files:
-                self.aider_response.insert(tk.END, "\nFiles changed:\n")
+                self.aider_renderer.write("\nFiles changed:\n")
                 for file in changed_files:
-                    self.aider_response.insert(tk.END, f"- {file}\n")
+                    self.aider_renderer.write(f"- {file}\n")
                 
             # Update status based on changes
             if changed_files:
@@ -690,28 +1263,9 @@ class LLMGUI:
             error_msg = response.get('error', 'Unknown error occurred')
             details = response.get('details', '')
             
-            try:
-                # Try to insert the error message directly
-                self.aider_response.insert(tk.END, f"Error: {error_msg}\n")
-                if details:
-                    self.aider_response.insert(tk.END, f"\nDetails: {details}")
-            except tk.TclError:
-                # If there's an encoding error, try to clean the text
-                clean_error = ''.join(char for char in error_msg if ord(char) < 128)
-                clean_details = ''.join(char for char in details if ord(char) < 128) if details else ''
-                self.aider_response.insert(tk.END, f"Error: {clean_error}\n")
-                if clean_details:
-                    self.aider_response.insert(tk.END, f"\nDetails: {clean_details}")
-
-    def process_events(self):
-        """Process async events in a separate thread"""
-        while True:
-            try:
-                coro, callback = self.event_queue.get()
-                # Removed asyncio.run
-                callback(coro)
-            except Exception as e:
-                print(f"Error processing event: {e}")
+            self.aider_renderer.write(f"Error: {error_msg}\n")
+            if details:
+                self.aider_renderer.write(f"\nDetails: {details}")
 
 # Hauptprogramm
 if __name__ == "__main__":
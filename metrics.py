@@ -0,0 +1,66 @@
+"""
+Request metrics for the LLM GUI application.
+Keeps a rolling window of the latency and throughput of recent requests
+per provider/model and summarizes it as p50/p95 percentiles.
+"""
+
+import math
+import threading
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_WINDOW = 100
+# Metrics that are summarized as percentiles
+SUMMARY_FIELDS = ("connect", "ttft", "total", "tokens_per_sec")
+# Token counts that are summed
+TOKEN_FIELDS = ("input_tokens", "output_tokens", "cache_read_tokens", "cache_write_tokens")
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values; None for an empty list"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = math.ceil(fraction * len(ordered))
+    return ordered[min(len(ordered), max(1, rank)) - 1]
+
+
+class MetricsStore:
+    """Rolling request metrics per provider/model"""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        """
+        Args:
+            window (int): Number of recent requests kept per provider/model
+        """
+        self.window = window
+        self.samples: Dict[Tuple[str, str], deque] = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, model: str, metrics: Dict):
+        """Add the metrics of a finished request"""
+        with self._lock:
+            self.samples[(provider, model)].append(dict(metrics))
+
+    def summary(self) -> List[Dict]:
+        """
+        Summarize the recorded requests.
+
+        Returns:
+            List[Dict]: One row per provider/model with the request count, the
+            p50/p95 of each summary field and the summed token and prompt cache counts
+        """
+        with self._lock:
+            samples = {key: list(values) for key, values in self.samples.items()}
+
+        rows = []
+        for (provider, model), records in sorted(samples.items()):
+            row = {"provider": provider, "model": model, "requests": len(records)}
+            for field in SUMMARY_FIELDS:
+                values = [record[field] for record in records if record.get(field) is not None]
+                row[f"{field}_p50"] = percentile(values, 0.5)
+                row[f"{field}_p95"] = percentile(values, 0.95)
+            for field in TOKEN_FIELDS:
+                row[field] = sum(record.get(field) or 0 for record in records)
+            rows.append(row)
+        return rows
@@ -0,0 +1,396 @@
+"""
+Local mock provider server for the LLM GUI application.
+Speaks the Anthropic, OpenAI, Google, Mistral and OpenRouter chat wire
+formats, buffered and as SSE streams, with configurable latency, errors and
+429 rate limiting, so the request path can be tested and benchmarked
+without network access or API keys. Prompt caching is simulated: Anthropic
+requests cache the prefixes up to their cache_control breakpoints, OpenAI
+style requests every prefix, and usage reports the cached tokens.
+
+Usage:
+    python mock_provider.py --port 8765 --latency 0.2 --rate-limit-rate 0.05
+    set LLM_GUI_OPENAI_BASE_URL=http://127.0.0.1:8765 (and likewise for the other providers)
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Tuple
+
+GOOGLE_PATH = re.compile(r"^/v1/models/(?P<model>[^:/]+):(?P<method>generateContent|streamGenerateContent)$")
+# Chat models of the model lists; their ids pass the OpenAI chat model filter
+MOCK_MODELS = ["gpt-mock-large", "gpt-mock-small"]
+MODELS_ETAG = '"mock-models-1"'
+
+
+class MockConfig:
+    """Behaviour of the mock server"""
+
+    def __init__(self, latency: float = 0.0, token_delay: float = 0.0, chunks: int = 20,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, retry_after: float = 1.0,
+                 seed: int = None):
+        """
+        Args:
+            latency (float): Seconds before the response headers are sent
+            token_delay (float): Seconds between two streamed chunks
+            chunks (int): Number of words in every answer
+            error_rate (float): Fraction of requests answered with HTTP 500
+            rate_limit_rate (float): Fraction of requests answered with HTTP 429
+            retry_after (float): Retry-After seconds sent with a 429
+            seed (int, optional): Seed for reproducible error injection
+        """
+        self.latency = latency
+        self.token_delay = token_delay
+        self.chunks = chunks
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def roll(self) -> str:
+        """Pick the outcome of a request: 'ok', 'error' or 'rate_limit'"""
+        with self.lock:
+            value = self.random.random()
+        if value < self.rate_limit_rate:
+            return 'rate_limit'
+        if value < self.rate_limit_rate + self.error_rate:
+            return 'error'
+        return 'ok'
+
+
+def answer_words(count: int) -> List[str]:
+    """Deterministic answer split into streamable words"""
+    return [f"word{i} " for i in range(count)]
+
+
+def count_input_tokens(body: Dict) -> int:
+    """Rough prompt token count of a request body"""
+    return len(json.dumps(body)) // 4 + 1
+
+
+def prompt_prefixes(messages: List[Dict]) -> List[Tuple[str, int]]:
+    """Hash and rough token count of every message prefix, ignoring cache_control markers"""
+    digest = hashlib.sha1()
+    tokens = 0
+    prefixes = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list):
+            content = [{key: value for key, value in block.items() if key != "cache_control"}
+                       for block in content]
+        text = json.dumps({"role": message.get("role"), "content": content})
+        digest.update(text.encode('utf-8'))
+        tokens += len(text) // 4 + 1
+        prefixes.append((digest.hexdigest(), tokens))
+    return prefixes
+
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    """Request handler for all provider wire formats"""
+    protocol_version = "HTTP/1.1"
+    server_version = "MockProvider/1.0"
+    # Send small SSE chunks immediately instead of waiting for delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output readable
+
+    def do_HEAD(self):
+        # Connection pre-warming
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        # Model lists; the wire format is told apart by the providers' auth headers
+        path = self.path.partition("?")[0]
+        if path not in ("/v1/models", "/api/v1/models"):
+            self.send_json(404, {"error": {"message": f"Unknown endpoint {path}"}})
+            return
+        self.server.count('models')
+        if self.headers.get("If-None-Match") == MODELS_ETAG:
+            self.send_response(304)
+            self.send_header("ETag", MODELS_ETAG)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if self.headers.get("x-goog-api-key"):
+            data = {"models": [{"name": f"models/{model}", "inputTokenLimit": 32768,
+                                "supportedGenerationMethods": ["generateContent"]} for model in MOCK_MODELS]}
+        elif self.headers.get("anthropic-version"):
+            data = {"data": [{"id": model, "type": "model"} for model in MOCK_MODELS], "has_more": False}
+        elif path == "/api/v1/models":
+            data = {"data": [{"id": model, "context_length": 32768,
+                              "pricing": {"prompt": "0.000001", "completion": "0.000002"}}
+                             for model in MOCK_MODELS]}
+        else:
+            data = {"data": [{"id": model, "object": "model", "created": 1700000000 - i,
+                              "max_context_length": 32768} for i, model in enumerate(MOCK_MODELS)]
+                    + [{"id": "text-embedding-mock", "object": "model", "created": 1700000000,
+                        "capabilities": {"completion_chat": False}}]}
+        self.send_json(200, data, {"ETag": MODELS_ETAG})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+
+        path = self.path.partition("?")[0]
+        google = GOOGLE_PATH.match(path)
+        if path == "/v1/messages":
+            wire, stream = 'anthropic', bool(body.get("stream"))
+        elif path in ("/v1/chat/completions", "/api/v1/chat/completions"):
+            wire, stream = 'openai', bool(body.get("stream"))
+        elif google:
+            wire, stream = 'google', google.group("method") == "streamGenerateContent"
+        else:
+            self.send_json(404, {"error": {"message": f"Unknown endpoint {path}"}})
+            return
+
+        config = self.server.config
+        self.server.count(wire)
+        if config.latency:
+            time.sleep(config.latency)
+
+        outcome = config.roll()
+        if outcome == 'rate_limit':
+            self.send_json(429, {"error": {"type": "rate_limit_error", "message": "Rate limit exceeded"}},
+                           {"Retry-After": str(config.retry_after)})
+            return
+        if outcome == 'error':
+            self.send_json(500, {"error": {"type": "api_error", "message": "Internal server error"}})
+            return
+
+        words = answer_words(config.chunks)
+        cache_read, cache_write = self.server.prompt_cache(wire, body)
+        usage = (count_input_tokens(body), len(words), cache_read, cache_write)
+        if not stream:
+            self.send_json(200, self.complete(wire, body, ''.join(words), usage))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        events = {'anthropic': self.anthropic_events, 'openai': self.openai_events,
+                  'google': self.google_events}[wire](body, words, usage)
+        for event in events:
+            self.write_chunk(event.encode('utf-8'))
+        self.write_chunk(b"")
+
+    def send_json(self, status: int, data: Dict, headers: Dict = None):
+        payload = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def write_chunk(self, data: bytes):
+        """Write one chunk of a chunked response; an empty chunk ends the response"""
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def sse(self, data, event: str = None) -> str:
+        prefix = f"event: {event}\n" if event else ""
+        payload = data if isinstance(data, str) else json.dumps(data)
+        return f"{prefix}data: {payload}\n\n"
+
+    def pause(self):
+        delay = self.server.config.token_delay
+        if delay:
+            time.sleep(delay)
+
+    @staticmethod
+    def complete(wire: str, body: Dict, text: str, usage) -> Dict:
+        """Buffered response body of a wire format"""
+        input_tokens, output_tokens = usage[:2]
+        if wire == 'anthropic':
+            return {"type": "message", "role": "assistant", "model": body.get("model"),
+                    "content": [{"type": "text", "text": text}],
+                    "usage": anthropic_usage(usage)}
+        if wire == 'google':
+            return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}],
+                    "usageMetadata": {"promptTokenCount": input_tokens, "candidatesTokenCount": output_tokens}}
+        return {"object": "chat.completion", "model": body.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                             "finish_reason": "stop"}],
+                "usage": openai_usage(usage)}
+
+    def anthropic_events(self, body, words, usage) -> Iterator[str]:
+        yield self.sse({"type": "message_start", "message": {
+            "role": "assistant", "model": body.get("model"),
+            "usage": dict(anthropic_usage(usage), output_tokens=1)}}, "message_start")
+        yield self.sse({"type": "content_block_start", "index": 0,
+                        "content_block": {"type": "text", "text": ""}}, "content_block_start")
+        for word in words:
+            self.pause()
+            yield self.sse({"type": "content_block_delta", "index": 0,
+                            "delta": {"type": "text_delta", "text": word}}, "content_block_delta")
+        yield self.sse({"type": "content_block_stop", "index": 0}, "content_block_stop")
+        yield self.sse({"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+                        "usage": {"output_tokens": usage[1]}}, "message_delta")
+        yield self.sse({"type": "message_stop"}, "message_stop")
+
+    def openai_events(self, body, words, usage) -> Iterator[str]:
+        for word in words:
+            self.pause()
+            yield self.sse({"object": "chat.completion.chunk", "model": body.get("model"),
+                            "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}]})
+        usage = openai_usage(usage)
+        final = {"object": "chat.completion.chunk", "model": body.get("model"),
+                 "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        if (body.get("stream_options") or {}).get("include_usage"):
+            # OpenAI sends usage in an extra chunk without choices
+            yield self.sse(final)
+            yield self.sse({"object": "chat.completion.chunk", "choices": [], "usage": usage})
+        else:
+            # Mistral and OpenRouter attach it to the last chunk
+            final["usage"] = usage
+            yield self.sse(final)
+        yield self.sse("[DONE]")
+
+    def google_events(self, body, words, usage) -> Iterator[str]:
+        input_tokens, output_tokens = usage[:2]
+        for index, word in enumerate(words):
+            self.pause()
+            event = {"candidates": [{"content": {"role": "model", "parts": [{"text": word}]}}]}
+            if index == len(words) - 1:
+                event["usageMetadata"] = {"promptTokenCount": input_tokens,
+                                          "candidatesTokenCount": output_tokens}
+            yield self.sse(event)
+
+
+def anthropic_usage(usage) -> Dict:
+    """Anthropic usage block; input_tokens excludes the cached and newly cached tokens"""
+    input_tokens, output_tokens, cache_read, cache_write = usage
+    return {"input_tokens": max(0, input_tokens - cache_read - cache_write), "output_tokens": output_tokens,
+            "cache_read_input_tokens": cache_read, "cache_creation_input_tokens": cache_write}
+
+
+def openai_usage(usage) -> Dict:
+    """OpenAI usage block; prompt_tokens includes the cached tokens"""
+    input_tokens, output_tokens, cache_read, _ = usage
+    return {"prompt_tokens": input_tokens, "completion_tokens": output_tokens,
+            "prompt_tokens_details": {"cached_tokens": cache_read}}
+
+
+class MockProviderServer(ThreadingHTTPServer):
+    """Threaded mock server; use as a context manager or call start() and stop()"""
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, config: MockConfig = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            config (MockConfig, optional): Latency and error behaviour
+            host (str): Interface to listen on
+            port (int): Port to listen on; 0 picks a free port
+        """
+        super().__init__((host, port), MockProviderHandler)
+        self.config = config or MockConfig()
+        self.requests = {}
+        self.cached_prefixes = set()
+        self._count_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to use for every provider adapter"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, wire: str):
+        with self._count_lock:
+            self.requests[wire] = self.requests.get(wire, 0) + 1
+
+    def prompt_cache(self, wire: str, body: Dict) -> Tuple[int, int]:
+        """
+        Look a request's prompt up in the simulated prompt cache and cache its prefixes.
+
+        Returns:
+            Tuple[int, int]: Tokens read from and written to the cache
+        """
+        messages = body.get("messages") or []
+        prefixes = prompt_prefixes(messages)
+        if wire == 'anthropic':
+            points = [index for index, message in enumerate(messages)
+                      if isinstance(message.get("content"), list)
+                      and any("cache_control" in block for block in message["content"])]
+        elif wire == 'openai':
+            points = list(range(len(messages)))
+        else:
+            return 0, 0
+        if not points:
+            return 0, 0
+
+        with self._cache_lock:
+            read = max((prefixes[index][1] for index in points if prefixes[index][0] in self.cached_prefixes),
+                       default=0)
+            self.cached_prefixes.update(prefixes[index][0] for index in points)
+        if wire != 'anthropic':
+            return read, 0
+        return read, prefixes[points[-1]][1] - read
+
+    def start(self) -> str:
+        """Serve on a background thread and return the base URL"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        """Stop serving and close the socket"""
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    """Run the mock server in the foreground"""
+    parser = argparse.ArgumentParser(description="Local mock LLM provider server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before the response headers")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between streamed chunks")
+    parser.add_argument("--chunks", type=int, default=20, help="Words per answer")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    config = MockConfig(args.latency, args.token_delay, args.chunks, args.error_rate,
+                        args.rate_limit_rate, args.retry_after)
+    server = MockProviderServer(config, args.host, args.port)
+    print(f"Mock provider server on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
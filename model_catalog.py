@@ -0,0 +1,170 @@
+"""
+Model catalog for the LLM GUI application.
+Fetches every provider's model list endpoint in the background and keeps
+the result, with context window sizes and per-token prices, in an on-disk
+cache with a TTL and ETag revalidation. Lookups only ever read the cache,
+falling back to the adapters' built-in lists, so they never wait on the network.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from providers import PROVIDERS, ProviderError, get_provider
+
+DEFAULT_PATH = "model_catalog.json"
+DEFAULT_TTL = 24 * 3600
+FETCH_TIMEOUT = (5, 20)
+CATALOG_VERSION = 1
+
+
+class ModelCatalog:
+    """Model lists of all providers, cached on disk and refreshed in the background"""
+
+    def __init__(self, path: str = DEFAULT_PATH, ttl: float = DEFAULT_TTL):
+        """
+        Args:
+            path (str): JSON file of the cached model lists
+            ttl (float): Seconds before a provider's list is fetched again
+        """
+        self.path = path
+        self.ttl = ttl
+        self._providers = None
+        self._lock = threading.Lock()
+
+    def models(self, provider: str) -> List[str]:
+        """Model ids of a provider, from the cache or the adapter's built-in list"""
+        entries = self._entry(provider).get("models")
+        if entries:
+            return [model["id"] for model in entries]
+        return list(get_provider(provider).models)
+
+    def aider_models(self, provider: str) -> List[str]:
+        """Models offered to Aider; an adapter's explicit Aider list wins over the catalog"""
+        adapter = get_provider(provider)
+        if adapter.aider_models is not None:
+            return list(adapter.aider_models)
+        return self.models(provider)
+
+    def info(self, provider: str, model: str) -> Dict:
+        """Catalog entry with id, context_window, input_price and output_price of a model"""
+        for entry in self._entry(provider).get("models", []):
+            if entry["id"] == model:
+                return dict(entry)
+        return get_provider(provider).model_entry(model)
+
+    def context_budget(self, provider: str, model: str) -> int:
+        """Prompt tokens available for the history, using the catalog's context window when known"""
+        return get_provider(provider).context_budget(model, self.info(provider, model)["context_window"])
+
+    def price(self, provider: str, model: str) -> Tuple[Optional[float], Optional[float]]:
+        """USD per input and output token, None where unknown"""
+        entry = self.info(provider, model)
+        return entry["input_price"], entry["output_price"]
+
+    def is_stale(self, provider: str) -> bool:
+        """True if the provider's list was never fetched or is older than the TTL"""
+        return time.time() - self._entry(provider).get("fetched", 0) >= self.ttl
+
+    def refresh(self, provider: str, session, api_key: str, force: bool = False) -> bool:
+        """
+        Fetch a provider's model list unless the cached one is still fresh.
+
+        Args:
+            provider (str): Provider to refresh
+            session: HTTP session to send the request with
+            api_key (str): API key of the provider
+            force (bool): Ignore the TTL; the ETag still avoids downloading an unchanged list
+
+        Returns:
+            bool: True if the list of model ids changed
+        """
+        if not force and not self.is_stale(provider):
+            return False
+        adapter = get_provider(provider)
+        cached = self._entry(provider)
+        headers = dict(adapter.headers(api_key))
+        if cached.get("etag") and cached.get("models"):
+            headers["If-None-Match"] = cached["etag"]
+
+        response = session.get(adapter.models_url(), headers=headers, timeout=FETCH_TIMEOUT)
+        try:
+            if response.status_code == 304:
+                self._update(provider, dict(cached, fetched=time.time()))
+                return False
+            if response.status_code != 200:
+                raise ProviderError(response.status_code, response.headers,
+                                    f"{response.status_code} - {response.text[:200]}")
+            models = adapter.parse_models(response.json())
+            etag = response.headers.get("etag")
+        finally:
+            response.close()
+
+        old_ids = [model["id"] for model in cached.get("models", [])]
+        self._update(provider, {"fetched": time.time(), "etag": etag, "models": models})
+        return [model["id"] for model in models] != old_ids
+
+    def refresh_in_background(self, session_pool, api_keys: Dict[str, str],
+                              on_update: Callable[[str], None] = None,
+                              on_error: Callable[[str, Exception], None] = None) -> threading.Thread:
+        """
+        Refresh the stale lists of all providers with an API key on a daemon thread.
+
+        Args:
+            session_pool (SessionPool): Pool whose provider sessions send the requests
+            api_keys (Dict[str, str]): API key per provider
+            on_update (Callable, optional): Called from the thread with a provider whose list changed
+            on_error (Callable, optional): Called from the thread with a provider and the failure
+        """
+        def run():
+            for provider in PROVIDERS:
+                api_key = api_keys.get(provider)
+                if not api_key:
+                    continue
+                try:
+                    changed = self.refresh(provider, session_pool.get(provider), api_key)
+                except Exception as e:
+                    if on_error:
+                        on_error(provider, e)
+                    continue
+                if changed and on_update:
+                    on_update(provider)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def _entry(self, provider: str) -> Dict:
+        with self._lock:
+            return self._load().get(provider, {})
+
+    def _update(self, provider: str, entry: Dict):
+        with self._lock:
+            self._load()[provider] = entry
+            data = json.dumps({"version": CATALOG_VERSION, "providers": self._providers},
+                              indent=2, ensure_ascii=False)
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Write to a temporary file first so a crash never leaves a truncated catalog
+            temp_path = f"{self.path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(temp_path, self.path)
+
+    def _load(self) -> Dict[str, Dict]:
+        """Read the cache file on first use; callers hold the lock"""
+        if self._providers is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._providers = data["providers"] if data.get("version") == CATALOG_VERSION else {}
+            except (OSError, ValueError, KeyError):
+                self._providers = {}
+        return self._providers
+
+
+# Catalog shared by the chat window and Aider
+shared_catalog = ModelCatalog()
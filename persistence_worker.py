@@ -0,0 +1,147 @@
+"""
+Background conversation saving for the LLM GUI application.
+Saves run on a worker thread so disk stalls never block the Tk thread.
+Saves of the same conversation that queue up while the worker is busy are
+coalesced into one write of the newest state, and a durability policy
+decides how often the written data is forced to disk.
+"""
+
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+# Durability policies: fsync after every write, at most every sync interval, or only on close
+DURABILITY_ALWAYS = "always"
+DURABILITY_INTERVAL = "interval"
+DURABILITY_EXIT = "exit"
+DURABILITY_POLICIES = (DURABILITY_ALWAYS, DURABILITY_INTERVAL, DURABILITY_EXIT)
+SYNC_INTERVAL = 1.0
+CLOSE_TIMEOUT = 10.0
+
+
+class PersistenceWorker:
+    """Saves conversations to a store on a background thread"""
+
+    def __init__(self, store, durability: str = DURABILITY_INTERVAL, sync_interval: float = SYNC_INTERVAL,
+                 on_error: Callable[[str, Exception], None] = None):
+        """
+        Args:
+            store: Conversation store with save(conversation) and sync()
+            durability (str): One of DURABILITY_POLICIES
+            sync_interval (float): Seconds between two syncs with the interval policy
+            on_error (Callable, optional): Called from the worker with a conversation id and the failure
+        """
+        if durability not in DURABILITY_POLICIES:
+            raise ValueError(f"Unknown durability policy: {durability}")
+        self.store = store
+        self.durability = durability
+        self.sync_interval = sync_interval
+        self.on_error = on_error
+        self.writes = 0
+        self.coalesced = 0
+        self._pending: "OrderedDict[str, object]" = OrderedDict()
+        self._saving: Optional[str] = None
+        self._unsynced = False
+        self._last_sync = time.monotonic()
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="persistence", daemon=True)
+        self._thread.start()
+        # Daemon threads die with the interpreter; write what is pending first
+        atexit.register(self.close)
+
+    def submit(self, conversation):
+        """
+        Queue a save of a conversation's current state; returns immediately.
+
+        Args:
+            conversation (Conversation): Conversation to save; a snapshot is taken so it can keep changing
+        """
+        snapshot = conversation.snapshot()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Persistence worker is closed")
+            if snapshot.id in self._pending:
+                self.coalesced += 1
+            self._pending[snapshot.id] = snapshot
+            self._condition.notify_all()
+
+    def flush(self, conversation_id: str = None, timeout: float = None) -> bool:
+        """
+        Wait until the queued saves are written.
+
+        Args:
+            conversation_id (str, optional): Only wait for this conversation
+            timeout (float, optional): Maximum seconds to wait
+
+        Returns:
+            bool: True if nothing is pending any more
+        """
+        def done():
+            if conversation_id is None:
+                return not self._pending and self._saving is None
+            return conversation_id not in self._pending and self._saving != conversation_id
+
+        with self._condition:
+            return self._condition.wait_for(done, timeout)
+
+    def close(self, timeout: float = CLOSE_TIMEOUT) -> bool:
+        """Write the pending saves, force them to disk and stop the worker; safe to call twice"""
+        with self._condition:
+            if self._closed:
+                return True
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+        return not self._thread.is_alive()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    if self._unsynced and self.durability == DURABILITY_INTERVAL:
+                        remaining = self._last_sync + self.sync_interval - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                    else:
+                        self._condition.wait()
+                if not self._pending:
+                    if self._closed:
+                        break
+                    conversation = None
+                else:
+                    conversation_id, conversation = self._pending.popitem(last=False)
+                    self._saving = conversation_id
+
+            if conversation is not None:
+                try:
+                    self.store.save(conversation)
+                    self.writes += 1
+                    self._unsynced = True
+                except Exception as e:
+                    if self.on_error:
+                        self.on_error(conversation.id, e)
+                with self._condition:
+                    self._saving = None
+                    self._condition.notify_all()
+
+            if self._unsynced and (self.durability == DURABILITY_ALWAYS or (
+                    self.durability == DURABILITY_INTERVAL
+                    and time.monotonic() - self._last_sync >= self.sync_interval)):
+                self._sync()
+        self._sync()
+
+    def _sync(self):
+        if not self._unsynced:
+            return
+        self._unsynced = False
+        self._last_sync = time.monotonic()
+        try:
+            self.store.sync()
+        except Exception as e:
+            if self.on_error:
+                self.on_error(None, e)
@@ -0,0 +1,510 @@
+"""
+Provider adapters for the LLM GUI application.
+Each adapter owns the wire format of one LLM API: endpoint, headers,
+payload encoding, response decoding and stream parsing. The chat path
+looks adapters up in the PROVIDERS registry instead of branching on names.
+"""
+
+import os
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from context_builder import estimate_tokens
+from request_executor import RequestTimeout
+from streaming import iter_sse_json
+
+# Default timeouts in seconds: (connect, read) per socket operation and a deadline for the whole request
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 120
+REQUEST_DEADLINE = 600
+
+PROVIDERS: Dict[str, "ProviderAdapter"] = {}
+
+
+class ProviderError(RuntimeError):
+    """Raised when a provider answers with an HTTP error status"""
+
+    def __init__(self, status_code: int, headers, message: str):
+        super().__init__(f"API request failed: {message}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def register_provider(adapter_class):
+    """Class decorator that adds an adapter instance to the registry"""
+    adapter = adapter_class()
+    PROVIDERS[adapter.name] = adapter
+    return adapter_class
+
+
+def get_provider(name: str) -> "ProviderAdapter":
+    """Look up the adapter of a provider"""
+    try:
+        return PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown provider: {name}") from None
+
+
+class ProviderAdapter:
+    """Base class for provider adapters"""
+    name: str = None
+    base_url: str = None
+    env_var: str = None
+    models: List[str] = []
+    # Models offered to Aider; None means the same as the chat models
+    aider_models: Optional[List[str]] = None
+    # Context window sizes in tokens per model
+    context_windows: Dict[str, int] = {}
+    default_context_window = 8192
+    # Prices in USD per input and output token per model, where known
+    prices: Dict[str, Tuple[float, float]] = {}
+    # Endpoint of the model list, relative to the base URL
+    models_path = "/v1/models"
+    # Prompt size from which explicit cache breakpoints are sent; None if the provider caches on its own
+    cache_min_tokens: Optional[int] = None
+    # Tokens kept free for the response
+    response_reserve = 1024
+    timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+    deadline = REQUEST_DEADLINE
+    pool_maxsize = 8
+
+    def __init__(self, base_url: str = None):
+        # LLM_GUI_<PROVIDER>_BASE_URL points a provider at a proxy or a local mock server
+        self.base_url = base_url or os.environ.get(f"LLM_GUI_{self.name.upper()}_BASE_URL") or self.base_url
+        self._headers = {}
+
+    def headers(self, api_key: str) -> Dict[str, str]:
+        """Get the request headers for an API key; built once and reused"""
+        headers = self._headers.get(api_key)
+        if headers is None:
+            headers = self.build_headers(api_key)
+            self._headers = {api_key: headers}
+        return headers
+
+    def build_headers(self, api_key: str) -> Dict[str, str]:
+        raise NotImplementedError
+
+    def generation_params(self) -> Dict:
+        """Generation parameters sent with every request"""
+        return {}
+
+    def url(self, model: str, stream: bool = False) -> str:
+        raise NotImplementedError
+
+    def encode_payload(self, model: str, messages: List[Dict], stream: bool = False) -> Dict:
+        raise NotImplementedError
+
+    def decode_response(self, result: Dict) -> str:
+        raise NotImplementedError
+
+    def parse_stream_event(self, event: Dict) -> Optional[str]:
+        raise NotImplementedError
+
+    def parse_usage(self, result: Dict) -> Dict[str, int]:
+        """Input, output and prompt cache token counts reported in a response or stream event"""
+        return {}
+
+    def iter_deltas(self, lines: Iterable, usage: Dict = None) -> Iterator[str]:
+        """Yield the text deltas of a streamed response, collecting token usage into usage"""
+        for event in iter_sse_json(lines):
+            if usage is not None:
+                usage.update(self.parse_usage(event))
+            delta = self.parse_stream_event(event)
+            if delta:
+                yield delta
+
+    def context_budget(self, model: str, window: int = None) -> int:
+        """Number of prompt tokens available for the history of a request"""
+        window = window or self.context_windows.get(model, self.default_context_window)
+        return window - self.response_reserve
+
+    def models_url(self) -> str:
+        return f"{self.base_url}{self.models_path}"
+
+    def parse_models(self, result: Dict) -> List[Dict]:
+        """Catalog entries of the chat models in a model list response"""
+        raise NotImplementedError
+
+    def model_entry(self, model: str, context_window: int = None,
+                    input_price: float = None, output_price: float = None) -> Dict:
+        """Catalog entry of a model; missing values come from the built-in tables"""
+        prices = self.prices.get(model, (None, None))
+        return {
+            "id": model,
+            "context_window": context_window or self.context_windows.get(model),
+            "input_price": input_price if input_price is not None else prices[0],
+            "output_price": output_price if output_price is not None else prices[1],
+        }
+
+    def get_aider_models(self) -> List[str]:
+        return list(self.aider_models if self.aider_models is not None else self.models)
+
+
+@register_provider
+class AnthropicAdapter(ProviderAdapter):
+    name = 'anthropic'
+    base_url = "https://api.anthropic.com"
+    env_var = 'ANTHROPIC_API_KEY'
+    models = ['claude-sonnet-4-5-20250929', 'claude-opus-4-1-20250805', 'claude-haiku-4-5-20251001']
+    context_windows = {model: 200000 for model in models}
+    max_tokens = 4096
+    response_reserve = max_tokens
+    models_path = "/v1/models?limit=1000"
+    # Shorter prefixes are not cached by the API
+    cache_min_tokens = 1024
+    cache_control = {"type": "ephemeral"}
+    usage_fields = {
+        "input_tokens": "input_tokens",
+        "output_tokens": "output_tokens",
+        "cache_read_input_tokens": "cache_read_tokens",
+        "cache_creation_input_tokens": "cache_write_tokens",
+    }
+
+    def build_headers(self, api_key):
+        return {
+            "x-api-key": api_key,
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json",
+        }
+
+    def url(self, model, stream=False):
+        return f"{self.base_url}/v1/messages"
+
+    def parse_models(self, result):
+        # The list has no context sizes; every current Claude model has a 200k window
+        return [self.model_entry(model["id"], self.context_windows.get(model["id"], 200000))
+                for model in result.get("data", [])]
+
+    def generation_params(self):
+        return {"max_tokens": self.max_tokens}
+
+    def encode_payload(self, model, messages, stream=False):
+        data = {
+            "model": model,
+            "messages": self.mark_cache_breakpoints(messages)
+        }
+        data.update(self.generation_params())
+        if stream:
+            data["stream"] = True
+        return data
+
+    def mark_cache_breakpoints(self, messages):
+        """
+        Add cache_control breakpoints to a long history.
+
+        The newest message writes the whole prompt to the cache for the next
+        turn and the previous user message, the newest message of the last
+        request, reads what that request wrote.
+
+        Args:
+            messages (List[Dict]): Chat messages with role and content
+
+        Returns:
+            List[Dict]: The messages, with the breakpoint messages as content blocks
+        """
+        if sum(estimate_tokens(message["content"]) for message in messages) < self.cache_min_tokens:
+            return messages
+        marked = list(messages)
+        breakpoints = [len(marked) - 1]
+        previous = [index for index, message in enumerate(marked[:-1]) if message["role"] == "user"]
+        if previous:
+            breakpoints.append(previous[-1])
+        for index in breakpoints:
+            message = marked[index]
+            marked[index] = {"role": message["role"], "content": [
+                {"type": "text", "text": message["content"], "cache_control": self.cache_control}]}
+        return marked
+
+    def decode_response(self, result):
+        return result["content"][0]["text"]
+
+    def parse_usage(self, result):
+        # Streams report input tokens in message_start and output tokens in message_delta
+        usage = result.get("usage") or result.get("message", {}).get("usage") or {}
+        return {name: usage[key] for key, name in self.usage_fields.items() if usage.get(key) is not None}
+
+    def parse_stream_event(self, event):
+        event_type = event.get("type")
+        if event_type == "error":
+            raise RuntimeError(event.get("error", {}).get("message", "Stream error"))
+        if event_type == "content_block_delta":
+            delta = event.get("delta", {})
+            if delta.get("type") == "text_delta":
+                return delta.get("text")
+        return None
+
+
+@register_provider
+class OpenAIAdapter(ProviderAdapter):
+    """OpenAI chat completions; also the base for compatible APIs"""
+    name = 'openai'
+    base_url = "https://api.openai.com"
+    env_var = 'OPENAI_API_KEY'
+    models = ['gpt-4.1', 'gpt-4o', 'gpt-4o-mini']
+    context_windows = {'gpt-4.1': 1047576, 'gpt-4o': 128000, 'gpt-4o-mini': 128000}
+    path = "/v1/chat/completions"
+    # Ask for a final usage chunk in streams; compatible APIs send it without being asked
+    stream_options = {"include_usage": True}
+    # The model list also holds embedding, audio and image models
+    chat_prefixes = ('gpt-', 'chatgpt-', 'o1', 'o3', 'o4')
+    non_chat_markers = ('audio', 'realtime', 'transcribe', 'tts', 'image', 'instruct', 'embedding', 'search')
+
+    def build_headers(self, api_key):
+        return {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def url(self, model, stream=False):
+        return f"{self.base_url}{self.path}"
+
+    def parse_models(self, result):
+        models = [model for model in result.get("data", [])
+                  if model["id"].startswith(self.chat_prefixes)
+                  and not any(marker in model["id"] for marker in self.non_chat_markers)]
+        models.sort(key=lambda model: model.get("created", 0), reverse=True)
+        return [self.model_entry(model["id"]) for model in models]
+
+    def encode_payload(self, model, messages, stream=False):
+        data = {
+            "model": model,
+            "messages": messages
+        }
+        if stream:
+            data["stream"] = True
+            if self.stream_options:
+                data["stream_options"] = self.stream_options
+        return data
+
+    def decode_response(self, result):
+        return result["choices"][0]["message"]["content"]
+
+    def parse_usage(self, result):
+        usage = result.get("usage") or {}
+        counts = {}
+        if "prompt_tokens" in usage:
+            counts["input_tokens"] = usage["prompt_tokens"]
+        if "completion_tokens" in usage:
+            counts["output_tokens"] = usage["completion_tokens"]
+        # Prompts from 1024 tokens are cached automatically; cached tokens are part of prompt_tokens
+        details = usage.get("prompt_tokens_details") or {}
+        if details.get("cached_tokens") is not None:
+            counts["cache_read_tokens"] = details["cached_tokens"]
+        return counts
+
+    def parse_stream_event(self, event):
+        if "error" in event:
+            error = event["error"]
+            raise RuntimeError(error.get("message", str(error)) if isinstance(error, dict) else str(error))
+        choices = event.get("choices") or []
+        if not choices:
+            return None
+        return choices[0].get("delta", {}).get("content")
+
+
+@register_provider
+class GoogleAdapter(ProviderAdapter):
+    name = 'google'
+    base_url = "https://generativelanguage.googleapis.com"
+    env_var = 'GOOGLE_API_KEY'
+    models = ['gemini-2.5-pro', 'gemini-2.5-flash']
+    context_windows = {model: 1048576 for model in models}
+    models_path = "/v1/models?pageSize=1000"
+
+    def build_headers(self, api_key):
+        # API keys go in x-goog-api-key; a Bearer header expects an OAuth token
+        return {
+            "x-goog-api-key": api_key,
+            "Content-Type": "application/json"
+        }
+
+    def url(self, model, stream=False):
+        # Google streams through a separate method; alt=sse selects the SSE wire format
+        if stream:
+            return f"{self.base_url}/v1/models/{model}:streamGenerateContent?alt=sse"
+        return f"{self.base_url}/v1/models/{model}:generateContent"
+
+    def parse_models(self, result):
+        return [self.model_entry(model["name"].rpartition("/")[2], model.get("inputTokenLimit"))
+                for model in result.get("models", [])
+                if "generateContent" in model.get("supportedGenerationMethods", [])]
+
+    def encode_payload(self, model, messages, stream=False):
+        contents = []
+        for message in messages:
+            role = "model" if message["role"] == "assistant" else "user"
+            contents.append({"role": role, "parts": [{"text": message["content"]}]})
+        return {"contents": contents}
+
+    def decode_response(self, result):
+        return result["candidates"][0]["content"]["parts"][0]["text"]
+
+    def parse_usage(self, result):
+        usage = result.get("usageMetadata") or {}
+        counts = {}
+        if "promptTokenCount" in usage:
+            counts["input_tokens"] = usage["promptTokenCount"]
+        if "candidatesTokenCount" in usage:
+            counts["output_tokens"] = usage["candidatesTokenCount"]
+        # Implicit caching of repeated prefixes
+        if "cachedContentTokenCount" in usage:
+            counts["cache_read_tokens"] = usage["cachedContentTokenCount"]
+        return counts
+
+    def parse_stream_event(self, event):
+        candidates = event.get("candidates") or []
+        if not candidates:
+            return None
+        parts = candidates[0].get("content", {}).get("parts", [])
+        return ''.join(part.get("text", "") for part in parts) or None
+
+
+@register_provider
+class MistralAdapter(OpenAIAdapter):
+    name = 'mistral'
+    base_url = "https://api.mistral.ai"
+    env_var = 'MISTRAL_API_KEY'
+    models = ['mistral-large-latest', 'mistral-medium-latest', 'mistral-small-latest']
+    context_windows = {model: 128000 for model in models}
+    # Aider addresses Mistral models through litellm's provider prefix
+    aider_models = [f'mistral/{model}' for model in models]
+    stream_options = None
+
+    def parse_models(self, result):
+        return [self.model_entry(model["id"], model.get("max_context_length"))
+                for model in result.get("data", [])
+                if model.get("capabilities", {}).get("completion_chat", True)]
+
+
+@register_provider
+class OpenRouterAdapter(OpenAIAdapter):
+    name = 'openrouter'
+    base_url = "https://openrouter.ai"
+    env_var = 'OPENROUTER_API_KEY'
+    models = ['openrouter/auto']
+    path = "/api/v1/chat/completions"
+    models_path = "/api/v1/models"
+    stream_options = None
+
+    def parse_models(self, result):
+        entries = []
+        for model in result.get("data", []):
+            pricing = model.get("pricing") or {}
+            entries.append(self.model_entry(model["id"], model.get("context_length"),
+                                            _price(pricing.get("prompt")), _price(pricing.get("completion"))))
+        return entries
+
+    def build_headers(self, api_key):
+        headers = super().build_headers(api_key)
+        headers["HTTP-Referer"] = "https://github.com/your-repository"
+        headers["X-Title"] = "LLM GUI"
+        return headers
+
+
+def _price(value) -> Optional[float]:
+    """Per-token price from a string or number; None if unknown"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def request_metrics(connect: float, first_token: Optional[float], total: float,
+                    usage: Dict[str, int]) -> Dict:
+    """
+    Build the metrics record of a finished request.
+
+    Args:
+        connect (float): Seconds until the response headers arrived
+        first_token (float, optional): Seconds until the first streamed delta; None without streaming
+        total (float): Seconds until the response was complete
+        usage (Dict[str, int]): Token counts reported by the provider
+
+    Returns:
+        Dict: Timings in seconds, token counts and output tokens per second
+    """
+    ttft = first_token if first_token is not None else total
+    output_tokens = usage.get("output_tokens")
+    # Throughput of the generation phase; without streaming that is the whole request
+    generation = total - first_token if first_token is not None else total
+    return {
+        "connect": round(connect, 3),
+        "ttft": round(ttft, 3),
+        "total": round(total, 3),
+        "input_tokens": usage.get("input_tokens"),
+        "output_tokens": output_tokens,
+        "cache_read_tokens": usage.get("cache_read_tokens"),
+        "cache_write_tokens": usage.get("cache_write_tokens"),
+        "tokens_per_sec": round(output_tokens / generation, 1) if output_tokens and generation > 0 else None,
+    }
+
+
+def send_chat(session, adapter: ProviderAdapter, api_key: str, model: str, messages: List[Dict],
+              stream: bool = False, token=None, on_delta=None, on_response=None,
+              metrics: Dict = None) -> str:
+    """
+    Send a chat request through a provider adapter.
+
+    Args:
+        session: HTTP session used for the request (see http_pool.SessionPool)
+        adapter (ProviderAdapter): Adapter of the target provider
+        api_key (str): Provider API key
+        model (str): Model name
+        messages (List[Dict]): Chat messages with role and content
+        stream (bool): Stream the response and report deltas to on_delta
+        token (CancelToken, optional): Cancellation handle of the request
+        on_delta (Callable, optional): Called with each streamed text delta
+        on_response (Callable, optional): Called with the HTTP response once its headers arrived
+        metrics (Dict, optional): Filled with the timings and token counts of the request
+
+    Returns:
+        str: The complete response text
+    """
+    import requests  # Imported on first request so importing the engine stays cheap
+
+    start = time.perf_counter()
+    try:
+        # Always read the body lazily so a cancel can abort it mid-transfer
+        response = session.post(
+            adapter.url(model, stream),
+            headers=adapter.headers(api_key),
+            json=adapter.encode_payload(model, messages, stream),
+            stream=True,
+            timeout=adapter.timeout
+        )
+    except requests.Timeout as e:
+        raise RequestTimeout(f"Connection to {adapter.name} timed out") from e
+
+    usage = {}
+    first_token = None
+    try:
+        connect = time.perf_counter() - start
+        if token:
+            token.attach(response)
+        if on_response:
+            on_response(response)
+        if response.status_code != 200:
+            raise ProviderError(response.status_code, response.headers, response.text)
+        if not stream:
+            result = response.json()
+            usage = adapter.parse_usage(result)
+            text = adapter.decode_response(result)
+        else:
+            chunks = []
+            for delta in adapter.iter_deltas(response.iter_lines(), usage):
+                if token:
+                    token.check()
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                chunks.append(delta)
+                if on_delta:
+                    on_delta(delta)
+            text = ''.join(chunks)
+        if metrics is not None:
+            metrics.update(request_metrics(connect, first_token, time.perf_counter() - start, usage))
+        return text
+    except (requests.Timeout, requests.ConnectionError) as e:
+        # Read timeouts in the middle of a body arrive as ConnectionError
+        raise RequestTimeout(f"{adapter.name.title()} stopped responding") from e
+    finally:
+        response.close()
@@ -0,0 +1,169 @@
+"""
+Background request executor for the LLM GUI application.
+Runs provider requests on worker threads so the Tk event loop never blocks,
+and hands results back to the UI thread through a dispatch callback.
+"""
+
+import threading
+import time
+from queue import Queue
+from typing import Any, Callable, Optional
+
+
+class RequestCancelled(Exception):
+    """Raised when a request was cancelled by the user"""
+
+
+class RequestTimeout(Exception):
+    """Raised when a request ran past its deadline"""
+
+
+class CancelToken:
+    """Cancellation handle shared between the UI and a running request"""
+
+    def __init__(self, deadline: Optional[float] = None):
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._response = None
+        self._timer = None
+        self.timed_out = False
+        self.deadline = time.monotonic() + deadline if deadline else None
+
+        # Abort the request when the deadline passes, even if it is blocked in a read
+        if deadline:
+            self._timer = threading.Timer(deadline, self._expire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def event(self) -> threading.Event:
+        """Event that is set once the request is cancelled or timed out"""
+        return self._event
+
+    def attach(self, response):
+        """Register the in-flight HTTP response so cancel() can abort it"""
+        with self._lock:
+            self._response = response
+        if self.cancelled:
+            self._close_response()
+
+    def cancel(self):
+        """Cancel the request and abort its HTTP connection"""
+        self._event.set()
+        self._close_response()
+        self.finish()
+
+    def finish(self):
+        """Stop the deadline timer once the request is done"""
+        if self._timer:
+            self._timer.cancel()
+
+    def wait(self, seconds: float):
+        """Sleep for the given time; raises if the request is stopped meanwhile"""
+        remaining = self.remaining()
+        if remaining is not None:
+            seconds = min(seconds, remaining)
+        self._event.wait(seconds)
+        self.check()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline, or None without a deadline"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def error(self) -> Exception:
+        """Exception describing why the request was stopped"""
+        if self.timed_out:
+            return RequestTimeout("Request exceeded its deadline")
+        return RequestCancelled("Request was cancelled")
+
+    def check(self):
+        """Raise if the request was cancelled or ran past its deadline"""
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.timed_out = True
+            self._event.set()
+        if self.cancelled:
+            raise self.error()
+
+    def _expire(self):
+        self.timed_out = True
+        self.cancel()
+
+    def _close_response(self):
+        with self._lock:
+            response = self._response
+        if response is not None:
+            try:
+                response.close()
+            except Exception:
+                pass  # The response may already be closed
+
+
+class RequestExecutor:
+    """Pool of worker threads that run request jobs off the UI thread"""
+
+    def __init__(self, dispatch: Callable, workers: int = 4):
+        """
+        Args:
+            dispatch (Callable): Schedules ``callback(*args)`` on the UI thread,
+                e.g. ``lambda cb, *args: root.after(0, cb, *args)``
+            workers (int): Number of worker threads
+        """
+        self.dispatch = dispatch
+        self.queue = Queue()
+        self.threads = []
+        for _ in range(workers):
+            thread = threading.Thread(target=self._worker, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, job: Callable[[CancelToken], Any],
+               on_success: Callable = None, on_error: Callable = None,
+               timeout: float = None) -> CancelToken:
+        """
+        Queue a job for execution on a worker thread.
+
+        Args:
+            job (Callable): Called with the CancelToken; its return value is the result
+            on_success (Callable): Called on the UI thread with the result
+            on_error (Callable): Called on the UI thread with the exception
+            timeout (float, optional): Deadline in seconds for the whole request
+
+        Returns:
+            CancelToken: Handle to cancel the request
+        """
+        token = CancelToken(timeout)
+        self.queue.put((job, token, on_success, on_error))
+        return token
+
+    def shutdown(self):
+        """Stop the worker threads after the queued jobs"""
+        for _ in self.threads:
+            self.queue.put(None)
+
+    def _worker(self):
+        """Run queued jobs until shutdown"""
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            job, token, on_success, on_error = item
+            try:
+                token.check()
+                result = job(token)
+                token.check()
+            except Exception as e:
+                # Failures caused by an abort are reported as the abort itself
+                error = token.error() if token.cancelled else e
+                if on_error:
+                    self.dispatch(on_error, error)
+            else:
+                if on_success:
+                    self.dispatch(on_success, result)
+            finally:
+                token.finish()
@@ -0,0 +1,183 @@
+"""
+Response cache for the LLM GUI application.
+Content-addressed cache of provider responses with an in-memory LRU tier
+and a persistent on-disk tier, so repeated prompts skip the paid round trip.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_DISK_BYTES = 100 * 1024 * 1024
+DEFAULT_TTL = 7 * 24 * 3600
+
+
+def normalize_messages(messages: List[Dict]) -> List[List[str]]:
+    """Reduce messages to role and content with normalized whitespace"""
+    normalized = []
+    for message in messages:
+        content = message["content"].replace('\r\n', '\n').strip()
+        normalized.append([message["role"], content])
+    return normalized
+
+
+class ResponseCache:
+    """Two-tier cache of response texts keyed by request content"""
+
+    def __init__(self, cache_dir: str = "response_cache",
+                 max_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 max_disk_bytes: int = DEFAULT_DISK_BYTES,
+                 ttl: float = DEFAULT_TTL):
+        """
+        Args:
+            cache_dir (str): Directory of the on-disk tier
+            max_entries (int): Number of responses kept in memory
+            max_disk_bytes (int): Size limit of the on-disk tier
+            ttl (float): Seconds before a cached response expires
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+
+    @staticmethod
+    def make_key(provider: str, model: str, messages: List[Dict], params: Dict = None) -> str:
+        """Hash of the provider, model, normalized messages and generation parameters"""
+        payload = json.dumps(
+            [provider, model, normalize_messages(messages), params or {}],
+            sort_keys=True, separators=(',', ':'), ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a response, checking memory first and then disk"""
+        now = time.time()
+        with self._lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                created, response = entry
+                if now - created < self.ttl:
+                    self.memory.move_to_end(key)
+                    self.hits += 1
+                    return response
+                del self.memory[key]
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is not None and now - entry[0] < self.ttl:
+                self._remember(key, entry)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        if entry is not None:
+            self._remove_disk(key)
+        return None
+
+    def put(self, key: str, response: str):
+        """Store a response in both tiers"""
+        entry = (time.time(), response)
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def clear(self):
+        """Remove all cached responses"""
+        with self._lock:
+            self.memory.clear()
+            for path, _, _ in self._disk_entries():
+                os.remove(path)
+            self._disk_bytes = 0
+
+    def stats(self) -> Dict:
+        """Hit and miss counters of this session"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'memory_entries': len(self.memory),
+            }
+
+    def _remember(self, key, entry):
+        """Insert into the memory tier and evict the least recently used entries"""
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data["created"], data["response"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key, entry):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({"created": entry[0], "response": entry[1]}, ensure_ascii=False)
+
+        # Write to a temporary file first so readers never see a partial entry
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+            else:
+                self._disk_bytes += len(data.encode('utf-8'))
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _remove_disk(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _disk_entries(self):
+        """Yield (path, size, mtime) of every file in the on-disk tier"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                if filename.endswith(".json"):
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    def _evict_disk(self):
+        """Delete expired entries, then the oldest ones until the tier is at 90% of its limit"""
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        expired_before = time.time() - self.ttl
+        target = self.max_disk_bytes * 0.9
+        for path, size, mtime in entries:
+            if total <= target and mtime >= expired_before:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
@@ -0,0 +1,352 @@
+"""
+Request scheduler for the LLM GUI application.
+Coordinates all provider traffic of the process: a global cap on requests
+in flight (chat, compare, batch and Aider edits), a token bucket per provider
+that all of them draw from, tightened by the providers' rate-limit headers,
+waits learned from Retry-After, and jittered exponential retries for 429 and
+5xx responses.
+"""
+
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional
+
+from providers import ProviderError, send_chat
+
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 60.0
+# Request rate per provider of the shared scheduler until the provider's headers report a lower one; 0 disables it
+DEFAULT_REQUESTS_PER_MINUTE = float(os.environ.get("LLM_GUI_RPM", "120"))
+# Requests the default rate allows at once, e.g. for a comparison of several models
+DEFAULT_BURST = 20
+
+# Status codes worth retrying; 529 is Anthropic's "overloaded"
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+# Header names (lower case) with the remaining requests and the reset time
+REMAINING_HEADERS = ('anthropic-ratelimit-requests-remaining', 'x-ratelimit-remaining-requests',
+                     'x-ratelimit-remaining')
+RESET_HEADERS = ('anthropic-ratelimit-requests-reset', 'x-ratelimit-reset-requests',
+                 'x-ratelimit-reset')
+
+DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+class TokenBucket:
+    """Token bucket rate limiter"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Args:
+            rate (float): Tokens added per second
+            capacity (float, optional): Maximum burst size, defaults to one second of tokens
+        """
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate: float, capacity: float = None):
+        """Change the rate; tokens collected so far are kept up to the new capacity"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.rate = rate
+            self.capacity = capacity or max(1.0, rate)
+            self.tokens = min(self.tokens, self.capacity)
+
+    def acquire(self, cancelled: threading.Event = None) -> bool:
+        """Wait until a token is available; returns False if cancelled while waiting"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if cancelled is not None:
+                if cancelled.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+
+def parse_reset(value: str, now: float = None) -> Optional[float]:
+    """Convert a rate-limit reset header into seconds from now"""
+    if not value:
+        return None
+    now = time.time() if now is None else now
+    value = value.strip()
+
+    # Durations like "1s", "6m0s" or "250ms" (OpenAI, Mistral)
+    matches = DURATION_PATTERN.findall(value)
+    if matches and ''.join(number + unit for number, unit in matches) == value:
+        return sum(float(number) * DURATION_UNITS[unit] for number, unit in matches)
+
+    try:
+        number = float(value)
+    except ValueError:
+        number = None
+    if number is not None:
+        # Epoch milliseconds (OpenRouter), epoch seconds, or plain seconds
+        if number > 1e11:
+            return max(0.0, number / 1000 - now)
+        if number > 1e9:
+            return max(0.0, number - now)
+        return number
+
+    # RFC 3339 timestamps (Anthropic) or HTTP dates (Retry-After)
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            moment = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, moment.timestamp() - now)
+
+
+def _header(headers, names) -> Optional[str]:
+    """First present header out of several names, case-insensitively"""
+    if not headers:
+        return None
+    lowered = {key.lower(): value for key, value in headers.items()}
+    for name in names:
+        if name in lowered:
+            return lowered[name]
+    return None
+
+
+class RequestScheduler:
+    """Shared limiter and retry policy for all provider requests"""
+
+    def __init__(self, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY,
+                 requests_per_minute: float = None,
+                 burst: float = DEFAULT_BURST):
+        """
+        Args:
+            max_in_flight (int): Requests allowed in flight across the whole process
+            max_retries (int): Retries after a retryable failure
+            base_delay (float): First backoff delay in seconds
+            max_delay (float): Upper bound of a single backoff delay
+            requests_per_minute (float, optional): Default rate limit of every provider
+            burst (float): Requests a configured rate allows at once
+        """
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.requests_per_minute = requests_per_minute
+        self.burst = burst
+        # Configured, header-learned and temporary rates per provider; the lowest one applies
+        self.rates: Dict[str, Optional[float]] = {}
+        self.learned_rates: Dict[str, float] = {}
+        self.rate_caps: Dict[str, List[float]] = {}
+        self.limiters: Dict[str, TokenBucket] = {}
+        self.blocked_until: Dict[str, float] = {}
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def set_rate(self, provider: str, requests_per_minute: float = None):
+        """Configure the request rate of a provider; None restores the default rate"""
+        with self._condition:
+            if requests_per_minute:
+                self.rates[provider] = requests_per_minute
+            else:
+                self.rates.pop(provider, None)
+            self._update_limiter(provider)
+
+    @contextmanager
+    def rate_limit(self, provider: str, requests_per_minute: float = None):
+        """Cap the request rate of a provider while the block runs, e.g. for a batch run; None adds no cap"""
+        if not requests_per_minute:
+            yield
+            return
+        with self._condition:
+            self.rate_caps.setdefault(provider, []).append(requests_per_minute)
+            self._update_limiter(provider)
+        try:
+            yield
+        finally:
+            with self._condition:
+                caps = self.rate_caps[provider]
+                caps.remove(requests_per_minute)
+                if not caps:
+                    del self.rate_caps[provider]
+                self._update_limiter(provider)
+
+    def limiter(self, provider: str) -> Optional[TokenBucket]:
+        """Token bucket every request to the provider draws from; None without a rate limit"""
+        with self._condition:
+            if provider not in self.limiters:
+                self._update_limiter(provider)
+            return self.limiters.get(provider)
+
+    @contextmanager
+    def slot(self, provider: str = None, token=None):
+        """Hold one of the global in-flight slots after the provider's limits allow a request"""
+        if provider:
+            self._wait_for_provider(provider, token)
+        with self._condition:
+            while self.in_flight >= self.max_in_flight:
+                self._condition.wait(0.1)
+                if token:
+                    token.check()
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+                self._condition.notify()
+
+    def observe(self, provider: str, headers, status_code: int = None):
+        """Learn the provider's limits from response headers"""
+        delay = None
+        if status_code == 429:
+            delay = parse_reset(_header(headers, ('retry-after',)))
+        remaining = _header(headers, REMAINING_HEADERS)
+        try:
+            remaining = float(remaining) if remaining is not None else None
+        except ValueError:
+            remaining = None
+        if remaining is not None:
+            reset = parse_reset(_header(headers, RESET_HEADERS))
+            if remaining <= 0:
+                if delay is None:
+                    delay = reset
+            elif reset:
+                # Spread the remaining requests until the reset; the bucket only gets tighter than configured
+                with self._condition:
+                    self.learned_rates[provider] = remaining / reset * 60
+                    self._update_limiter(provider)
+        if delay:
+            until = time.monotonic() + delay
+            with self._condition:
+                self.blocked_until[provider] = max(self.blocked_until.get(provider, 0), until)
+
+    def backoff(self, attempt: int, error: Exception = None) -> float:
+        """Delay before the next attempt: Retry-After if given, else full-jitter exponential"""
+        if isinstance(error, ProviderError):
+            retry_after = parse_reset(_header(error.headers, ('retry-after',)))
+            if retry_after is not None:
+                return min(self.max_delay, retry_after) + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def run(self, provider: str, func: Callable, token=None,
+            on_retry: Callable[[int, float, Exception], None] = None,
+            can_retry: Callable[[], bool] = None):
+        """
+        Run a request function under the scheduler's limits, retrying transient failures.
+
+        Args:
+            provider (str): Provider the request goes to
+            func (Callable): Sends the request and returns its result
+            token (CancelToken, optional): Cancellation handle of the request
+            on_retry (Callable, optional): Called with attempt, delay and error before a retry
+            can_retry (Callable, optional): Returns False once a retry would repeat output,
+                e.g. after streamed text was shown
+        """
+        import requests
+
+        attempt = 0
+        while True:
+            try:
+                with self.slot(provider, token):
+                    return func()
+            except ProviderError as e:
+                self.observe(provider, e.headers, e.status_code)
+                if e.status_code not in RETRYABLE_STATUS or attempt >= self.max_retries \
+                        or (can_retry and not can_retry()):
+                    raise
+                error = e
+            except requests.ConnectionError as e:
+                if (token and token.cancelled) or attempt >= self.max_retries \
+                        or (can_retry and not can_retry()):
+                    raise
+                error = e
+
+            delay = self.backoff(attempt, error)
+            attempt += 1
+            if on_retry:
+                on_retry(attempt, delay, error)
+            if token:
+                token.wait(delay)
+            else:
+                time.sleep(delay)
+
+    def send_chat(self, session, adapter, api_key: str, model: str, messages,
+                  stream: bool = False, token=None, on_delta=None, on_retry=None,
+                  metrics=None) -> str:
+        """providers.send_chat with limits, header tracking and retries"""
+        streamed = False
+
+        def observe(response):
+            self.observe(adapter.name, response.headers)
+
+        def forward(delta):
+            nonlocal streamed
+            streamed = True
+            on_delta(delta)
+
+        # A retry after text reached on_delta would show that text twice
+        return self.run(adapter.name,
+                        lambda: send_chat(session, adapter, api_key, model, messages,
+                                          stream, token, forward if on_delta else None, on_response=observe,
+                                          metrics=metrics),
+                        token, on_retry, can_retry=lambda: not streamed)
+
+    def _wait_for_provider(self, provider: str, token=None):
+        """Block while the provider is rate limited"""
+        while True:
+            with self._condition:
+                delay = self.blocked_until.get(provider, 0) - time.monotonic()
+            if delay <= 0:
+                break
+            if token:
+                token.wait(min(delay, 1.0))
+            else:
+                time.sleep(min(delay, 1.0))
+
+        limiter = self.limiter(provider)
+        if limiter and not limiter.acquire(token.event if token else None):
+            token.check()
+
+    def _update_limiter(self, provider: str):
+        """Set the provider's bucket to the lowest of its rates; callers hold the condition"""
+        configured = self.rates.get(provider, self.requests_per_minute)
+        rates = [rate for rate in (configured, self.learned_rates.get(provider)) if rate]
+        rates.extend(self.rate_caps.get(provider, ()))
+        if not rates:
+            self.limiters.pop(provider, None)
+            return
+        rate = min(rates)
+        # The configured rate allows short bursts; caps and learned limits are paced evenly
+        capacity = max(1.0, min(self.burst, rate)) if rate == configured else None
+        limiter = self.limiters.get(provider)
+        if limiter is None:
+            self.limiters[provider] = TokenBucket(rate / 60.0, capacity)
+        elif (limiter.rate, limiter.capacity) != (rate / 60.0, capacity or max(1.0, rate / 60.0)):
+            limiter.set_rate(rate / 60.0, capacity)
+
+
+# Scheduler shared by the chat window, batch runs and Aider edits; one rate limit per provider for all of them
+shared_scheduler = RequestScheduler(requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE or None)
@@ -0,0 +1,51 @@
+"""
+Streaming helpers for the LLM GUI application.
+Splits the server-sent event streams of the provider APIs into decoded events.
+"""
+
+import json
+from typing import Dict, Iterable, Iterator
+
+# Sentinel sent by OpenAI-compatible APIs at the end of a stream
+DONE_MARKER = "[DONE]"
+
+
+def iter_sse_data(lines: Iterable) -> Iterator[str]:
+    """Yield the data payload of every server-sent event in a line stream"""
+    data_lines = []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.rstrip('\r')
+
+        # An empty line terminates the current event
+        if not line:
+            if data_lines:
+                yield '\n'.join(data_lines)
+                data_lines = []
+            continue
+
+        # Lines starting with a colon are comments (keep-alive pings)
+        if line.startswith(':'):
+            continue
+
+        if line.startswith('data:'):
+            value = line[5:]
+            if value.startswith(' '):
+                value = value[1:]
+            data_lines.append(value)
+
+    # Flush an event that was not followed by a blank line
+    if data_lines:
+        yield '\n'.join(data_lines)
+
+
+def iter_sse_json(lines: Iterable) -> Iterator[Dict]:
+    """Yield the JSON events of a stream, stopping at the [DONE] marker"""
+    for data in iter_sse_data(lines):
+        if data == DONE_MARKER:
+            break
+        try:
+            yield json.loads(data)
+        except json.JSONDecodeError:
+            continue
@@ -18,8 +18,8 @@ class TestAiderInitialization(unittest.TestCase):
     def test_model_initialization(self):
         """Test initialization with specific model"""
         manager = AiderManager()
-        manager.initialize_aider(main_model='claude-3-opus-20240229')
-        self.assertEqual(manager.main_model, 'claude-3-opus-20240229')
+        manager.initialize_aider(main_model='claude-sonnet-4-5-20250929')
+        self.assertEqual(manager.main_model, 'claude-sonnet-4-5-20250929')
     
     def test_file_handling(self):
         """Test file handling in process_code_edit"""
@@ -36,7 +36,7 @@ class TestAiderManager(unittest.TestCase):
         
         # Create AiderManager instance with Anthropic model
         self.manager = AiderManager()
-        self.manager.set_model('claude-3-opus-20240229')
+        self.manager.set_model('claude-sonnet-4-5-20250929')
     
     def tearDown(self):
         """Clean up after each test method"""
@@ -91,6 +91,16 @@ class TestAiderManager(unittest.TestCase):
             with self.assertRaises(RuntimeError):
                 self.manager.initialize_aider()
     
+    def test_cassette_wraps_weak_model(self):
+        """Test that replays also cover the weak model's completions"""
+        cassette = MagicMock()
+        self.manager.cassette = cassette
+        with patch('aider.models.Model') as model_class, patch('aider.coders.EditBlockCoder'):
+            self.manager.initialize_aider('claude-sonnet-4-5-20250929')
+        model = model_class.return_value
+        cassette.wrap_model.assert_any_call(model)
+        cassette.wrap_model.assert_any_call(model.weak_model)
+
     def test_process_code_edit(self):
         """Test code editing process"""
         # Test with non-existent file
@@ -122,17 +132,38 @@ class TestAiderManager(unittest.TestCase):
         models = self.manager.get_available_models()
         self.assertIsInstance(models, list)
         self.assertGreater(len(models), 0)
-        self.assertIn('claude-3-opus-20240229', models)
+        self.assertIn('claude-sonnet-4-5-20250929', models)
     
     def test_set_model(self):
         """Test model setting"""
         # Test with valid models
-        self.manager.set_model("claude-3-opus-20240229")
-        self.assertEqual(self.manager.main_model, "claude-3-opus-20240229")
+        self.manager.set_model("claude-sonnet-4-5-20250929")
+        self.assertEqual(self.manager.main_model, "claude-sonnet-4-5-20250929")
         
         # Test with invalid model
         with self.assertRaises(ValueError):
             self.manager.set_model("invalid-model")
 
+class TestAiderManagerCleanup(unittest.TestCase):
+    def test_stdio_is_not_closed(self):
+        """Test that cleanup restores the streams it replaced and leaves the interpreter's open"""
+        import io
+        import sys
+        stdout = sys.stdout
+        console = io.StringIO()
+        manager = AiderManager.__new__(AiderManager)
+        manager._redirected_streams = [('stdout', console, stdout)]
+        sys.stdout = console
+        manager.__del__()
+        self.assertIs(sys.stdout, stdout)
+        self.assertTrue(console.closed)
+        self.assertFalse(sys.stdout.closed)
+        self.assertFalse(sys.stderr.closed)
+
+        # A manager whose initialization failed has nothing to restore
+        AiderManager.__new__(AiderManager).__del__()
+        self.assertFalse(sys.stdout.closed)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,100 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from batch_runner import BatchRunner, iter_batch_items, load_completed_ids
+from scheduler import RequestScheduler, TokenBucket
+
+class TestBatchRunner(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.input_path = os.path.join(self.test_dir, "prompts.jsonl")
+        self.output_path = os.path.join(self.test_dir, "results.jsonl")
+        with open(self.input_path, "w", encoding="utf-8") as f:
+            for i in range(10):
+                f.write(json.dumps({"id": f"p{i}", "prompt": f"prompt {i}"}) + "\n")
+        # A fresh scheduler, so the rate limits of earlier tests do not slow these down
+        self.scheduler = RequestScheduler()
+        self.scheduler_patcher = patch('batch_runner.shared_scheduler', self.scheduler)
+        self.scheduler_patcher.start()
+
+    def tearDown(self):
+        self.scheduler_patcher.stop()
+        shutil.rmtree(self.test_dir)
+
+    def read_results(self):
+        with open(self.output_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_iter_batch_items_csv(self):
+        """Test reading prompts from CSV and numbering rows without an id"""
+        csv_path = os.path.join(self.test_dir, "prompts.csv")
+        with open(csv_path, "w", encoding="utf-8", newline="") as f:
+            f.write("prompt\nfirst\nsecond\n")
+        items = list(iter_batch_items(csv_path))
+        self.assertEqual([(i["id"], i["prompt"]) for i in items], [("1", "first"), ("2", "second")])
+
+    def test_run(self):
+        """Test that all prompts are answered and written as JSONL"""
+        with patch('scheduler.send_chat', side_effect=lambda *a, **k: a[4][0]["content"].upper()):
+            counts = BatchRunner('openai', 'gpt-4', 'key', concurrency=3).run(self.input_path, self.output_path)
+        self.assertEqual(counts, {'completed': 10, 'failed': 0, 'skipped': 0})
+        results = {r["id"]: r for r in self.read_results()}
+        self.assertEqual(len(results), 10)
+        self.assertEqual(results["p3"]["response"], "PROMPT 3")
+        self.assertIsNone(results["p3"]["error"])
+
+    def test_rate_limit_is_shared(self):
+        """Test that the batch's rate limit is applied by the scheduler for all requests of the provider"""
+        rates = []
+
+        def send(*args, **kwargs):
+            rates.append(self.scheduler.limiter('openai').rate)
+            return "ok"
+
+        with patch('scheduler.send_chat', side_effect=send):
+            BatchRunner('openai', 'gpt-4', 'key', requests_per_minute=6000).run(self.input_path, self.output_path)
+        self.assertEqual(set(rates), {100.0})
+        self.assertIsNone(self.scheduler.limiter('openai'))
+
+    def test_malformed_input(self):
+        """Test that a bad input line ends the run with its error instead of hanging"""
+        with open(self.input_path, "a", encoding="utf-8") as f:
+            f.write("{not json\n")
+        with patch('scheduler.send_chat', return_value="answer"):
+            with self.assertRaises(ValueError):
+                BatchRunner('openai', 'gpt-4', 'key', concurrency=3).run(self.input_path, self.output_path)
+        # Items read before the bad line were still answered
+        self.assertEqual(len(self.read_results()), 10)
+
+    def test_resume(self):
+        """Test that successful results are skipped and failures retried"""
+        def flaky(*args, **kwargs):
+            if args[4][0]["content"] == "prompt 5":
+                raise RuntimeError("API request failed")
+            return "ok"
+
+        with patch('scheduler.send_chat', side_effect=flaky):
+            counts = BatchRunner('openai', 'gpt-4', 'key').run(self.input_path, self.output_path)
+        self.assertEqual(counts['failed'], 1)
+        self.assertEqual(len(load_completed_ids(self.output_path)), 9)
+
+        with patch('scheduler.send_chat', return_value="ok") as mock_send:
+            counts = BatchRunner('openai', 'gpt-4', 'key').run(self.input_path, self.output_path)
+        self.assertEqual(counts, {'completed': 1, 'failed': 0, 'skipped': 9})
+        self.assertEqual(mock_send.call_count, 1)
+        self.assertEqual(len(load_completed_ids(self.output_path)), 10)
+
+    def test_token_bucket(self):
+        """Test that the bucket allows a burst and then throttles"""
+        bucket = TokenBucket(rate=20, capacity=2)
+        start = time.monotonic()
+        for _ in range(4):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.08)
+
+if __name__ == '__main__':
+    unittest.main()
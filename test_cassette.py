@@ -0,0 +1,121 @@
+import gzip
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+from cassette import Cassette, CassetteMiss, CassettePool, request_key
+from http_pool import SessionPool
+from mock_provider import MockConfig, MockProviderServer, answer_words
+from providers import ProviderError, get_provider, send_chat
+
+class TestCassette(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "session.jsonl.gz")
+        self.server = MockProviderServer(MockConfig(chunks=4, token_delay=0.02))
+        self.server.start()
+        self.messages = [{"role": "user", "content": "Hi"}]
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def send(self, pool, provider, stream=True, **kwargs):
+        adapter = type(get_provider(provider))(self.server.url)
+        return send_chat(pool.get(provider), adapter, 'sk-secret-key', adapter.models[0],
+                         self.messages, stream, **kwargs)
+
+    def record(self, *providers):
+        pool = CassettePool(SessionPool(), Cassette(self.path, 'record'))
+        for provider in providers:
+            self.send(pool, provider)
+            self.send(pool, provider, stream=False)
+        pool.close()
+
+    def test_record_and_replay(self):
+        """Test that recorded streams and buffered responses replay without the server"""
+        self.record('anthropic', 'google')
+        self.server.stop()
+        self.server = MockProviderServer()
+        self.server.start()
+
+        pool = CassettePool(SessionPool(), Cassette(self.path, 'replay'))
+        expected = ''.join(answer_words(4))
+        for provider in ('anthropic', 'google'):
+            deltas = []
+            metrics = {}
+            self.assertEqual(self.send(pool, provider, on_delta=deltas.append, metrics=metrics), expected)
+            self.assertEqual(len(deltas), 4)
+            self.assertEqual(metrics["output_tokens"], 4)
+            self.assertEqual(self.send(pool, provider, stream=False), expected)
+        self.assertEqual(self.server.requests, {})
+
+        with self.assertRaises(CassetteMiss):
+            self.send(pool, 'openai')
+
+    def test_secrets_are_scrubbed(self):
+        """Test that API keys never reach the cassette file"""
+        self.record('openai', 'google')
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            content = f.read()
+        self.assertNotIn('sk-secret-key', content)
+        self.assertIn('"kind":"http"', content)
+
+    def test_replay_timing(self):
+        """Test that the recorded timing is kept or skipped"""
+        self.record('openai')
+        fast = CassettePool(SessionPool(), Cassette(self.path, 'replay', timing=0))
+        start = time.monotonic()
+        self.send(fast, 'openai')
+        fast_elapsed = time.monotonic() - start
+
+        timed = CassettePool(SessionPool(), Cassette(self.path, 'replay', timing=1.0))
+        start = time.monotonic()
+        self.send(timed, 'openai')
+        self.assertGreater(time.monotonic() - start, max(0.06, fast_elapsed))
+
+    def test_errors_are_replayed(self):
+        """Test that rate limit responses replay with their headers"""
+        self.server.config.rate_limit_rate = 1.0
+        pool = CassettePool(SessionPool(), Cassette(self.path, 'record'))
+        with self.assertRaises(ProviderError):
+            self.send(pool, 'mistral')
+
+        replay = CassettePool(SessionPool(), Cassette(self.path, 'replay'))
+        with self.assertRaises(ProviderError) as context:
+            self.send(replay, 'mistral')
+        self.assertEqual(context.exception.status_code, 429)
+        self.assertEqual(context.exception.headers.get("Retry-After"), "1.0")
+
+    def test_aider_model_calls(self):
+        """Test recording and replaying Aider completions"""
+        completion = MagicMock()
+        completion.model_dump.return_value = {"choices": [{"message": {"content": "edit"}}]}
+        model = MagicMock()
+        model.name = 'claude-3-opus-20240229'
+        model.send_completion.return_value = ("hash", completion)
+        messages = [{"role": "user", "content": "Change it"}]
+
+        Cassette(self.path, 'record').wrap_model(model)
+        model.send_completion(messages, None, False)
+
+        replay_model = MagicMock()
+        replay_model.name = 'claude-3-opus-20240229'
+        Cassette(self.path, 'replay').wrap_model(replay_model)
+        try:
+            import litellm
+        except ImportError:
+            self.skipTest("litellm is not installed")
+        hash_object, replayed = replay_model.send_completion(messages, None, False)
+        self.assertIsInstance(replayed, litellm.ModelResponse)
+        self.assertEqual(replayed.choices[0].message.content, "edit")
+
+    def test_request_key_ignores_host_and_credentials(self):
+        """Test that keys match across base URLs and API keys"""
+        self.assertEqual(request_key("POST", "https://api.example.com/v1/x?key=a", {"a": 1}),
+                         request_key("POST", "http://127.0.0.1:1/v1/x?key=b", {"a": 1}))
+
+if __name__ == '__main__':
+    unittest.main()
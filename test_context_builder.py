@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import MagicMock
+from context_builder import ContextBuilder, MESSAGE_OVERHEAD_TOKENS
+from conversation_manager import Conversation
+
+class TestContextBuilder(unittest.TestCase):
+    def setUp(self):
+        # One token per character keeps the budgets easy to reason about
+        self.counter = MagicMock(side_effect=len)
+        self.builder = ContextBuilder(token_counter=self.counter)
+        self.conversation = Conversation('anthropic', 'claude-3-opus-20240229')
+
+    def add_turn(self, prompt, answer):
+        self.conversation.add_message("user", prompt)
+        self.conversation.add_message("assistant", answer)
+
+    def test_full_history_within_budget(self):
+        """Test that the whole history is sent when it fits"""
+        self.add_turn("aaaa", "bbbb")
+        self.conversation.add_message("user", "cccc")
+        messages = self.builder.build(self.conversation, 1000)
+        self.assertEqual([m["content"] for m in messages], ["aaaa", "bbbb", "cccc"])
+        self.assertEqual(set(messages[0]), {"role", "content"})
+
+    def test_sliding_window(self):
+        """Test that the oldest turns are dropped first"""
+        per_message = 10 + MESSAGE_OVERHEAD_TOKENS
+        for i in range(5):
+            self.add_turn("u" * 10, "a" * 10)
+        self.conversation.add_message("user", "q" * 10)
+        messages = self.builder.build(self.conversation, per_message * 3)
+        self.assertEqual(len(messages), 3)
+        self.assertEqual(messages[0]["role"], "user")
+        self.assertEqual(messages[-1]["content"], "q" * 10)
+
+    def test_window_start_is_stable(self):
+        """Test that the window start only moves in steps, keeping the cached prefix valid"""
+        per_message = 10 + MESSAGE_OVERHEAD_TOKENS
+        budget = per_message * 8
+        starts = []
+        for i in range(12):
+            self.conversation.add_message("user", "u" * 10)
+            messages = self.builder.build(self.conversation, budget)
+            self.assertLessEqual(len(messages) * per_message, budget)
+            self.assertEqual(messages[0]["role"], "user")
+            starts.append(len(self.conversation.messages) - len(messages))
+            self.conversation.add_message("assistant", "a" * 10)
+        moves = sum(1 for previous, start in zip(starts, starts[1:]) if start != previous)
+        self.assertLess(moves, len(starts) // 2)
+
+    def test_window_starts_with_user(self):
+        """Test that a window never opens with an assistant message"""
+        per_message = 10 + MESSAGE_OVERHEAD_TOKENS
+        for i in range(3):
+            self.add_turn("u" * 10, "a" * 10)
+        self.conversation.add_message("user", "q" * 10)
+        messages = self.builder.build(self.conversation, per_message * 2)
+        self.assertEqual([m["role"] for m in messages], ["user"])
+
+    def test_latest_message_always_sent(self):
+        """Test that an oversized prompt is still sent"""
+        self.conversation.add_message("user", "x" * 100)
+        self.assertEqual(len(self.builder.build(self.conversation, 10)), 1)
+
+    def test_counts_are_cached(self):
+        """Test that each message is only counted once"""
+        self.add_turn("aaaa", "bbbb")
+        self.builder.build(self.conversation, 1000)
+        self.assertEqual(self.counter.call_count, 2)
+        self.conversation.add_message("user", "cccc")
+        self.builder.build(self.conversation, 1000)
+        self.assertEqual(self.counter.call_count, 3)
+
+        # A different conversation starts a fresh cache
+        other = Conversation('openai', 'gpt-4')
+        other.add_message("user", "dddd")
+        self.builder.build(other, 1000)
+        self.assertEqual(self.counter.call_count, 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import conversation_codec
+from conversation_codec import LazyMessages, decode_conversation, encode_conversation, read_header
+from conversation_journal import ConversationJournal
+from conversation_manager import Conversation
+
+class TestConversationCodec(unittest.TestCase):
+    def setUp(self):
+        self.save_dir = tempfile.mkdtemp()
+        self.conversation = Conversation("anthropic", "claude-3-opus-20240229", "c1")
+        self.conversation.add_message("assistant", "Welcome")
+        for i in range(20):
+            self.conversation.add_message("user", f"Question {i} über café")
+            self.conversation.add_message("assistant", f"Answer {i}", {"output_tokens": i})
+        self.conversation.metadata["tags"] = ["codec"]
+
+    def tearDown(self):
+        shutil.rmtree(self.save_dir)
+
+    def test_round_trip(self):
+        """Test that plain and compressed snapshots decode to the same conversation"""
+        data = self.conversation.to_dict()
+        for compress in (False, True):
+            with self.subTest(compress=compress):
+                raw = encode_conversation(data, {"journal_seq": 7}, compress)
+                self.assertTrue(raw.startswith(conversation_codec.MAGIC))
+                decoded = decode_conversation(raw)
+                self.assertEqual(decoded.pop("journal_seq"), 7)
+                self.assertEqual(decoded, data)
+        self.assertLess(len(encode_conversation(data, compress=True)), len(encode_conversation(data)))
+
+    def test_messages_are_decoded_lazily(self):
+        """Test that only the accessed messages are decoded and undecoded ones are re-encoded as they are"""
+        raw = encode_conversation(self.conversation.to_dict())
+        with patch.object(conversation_codec, 'loads', wraps=conversation_codec.loads) as loads:
+            messages = decode_conversation(raw)["messages"]
+            loads.reset_mock()
+            self.assertEqual(len(messages), 41)
+            self.assertEqual([m["content"] for m in messages[-2:]], ["Question 19 über café", "Answer 19"])
+            self.assertEqual(loads.call_count, 2)
+
+            resumed = Conversation.from_dict(decode_conversation(raw))
+            resumed.add_message("user", "New")
+            loads.reset_mock()
+            raw = encode_conversation(resumed.to_dict())
+            self.assertEqual(loads.call_count, 2)  # Only up to the first prompt, for the preview
+            data = decode_conversation(raw)
+        self.assertIsInstance(data["messages"], LazyMessages)
+        self.assertEqual(data["messages"], self.conversation.messages + [resumed.messages[-1]])
+
+    def test_header_without_messages(self):
+        """Test reading the metadata of current and legacy files"""
+        path = os.path.join(self.save_dir, "conversation_c1.conv")
+        with open(path, 'wb') as f:
+            f.write(encode_conversation(self.conversation.to_dict(), compress=True))
+        with patch.object(conversation_codec, 'LazyMessages') as lazy:
+            header = read_header(path)
+        lazy.assert_not_called()
+        self.assertEqual(header["message_count"], 41)
+        self.assertEqual(header["preview"], "Question 0 über café")
+        self.assertEqual(header["metadata"], {"tags": ["codec"]})
+
+        legacy_path = os.path.join(self.save_dir, "conversation_c1.json")
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            json.dump(self.conversation.to_dict(), f, indent=2)
+        self.assertEqual(read_header(legacy_path), header)
+
+    def test_newer_format_is_rejected(self):
+        """Test that files of a newer format version are not misread"""
+        raw = bytearray(encode_conversation(self.conversation.to_dict()))
+        raw[len(conversation_codec.MAGIC)] = conversation_codec.FORMAT_VERSION + 1
+        with self.assertRaises(ValueError):
+            decode_conversation(bytes(raw))
+        with self.assertRaises(ValueError):
+            decode_conversation(conversation_codec.MAGIC)
+
+    def test_legacy_snapshot_is_converted(self):
+        """Test that a JSON snapshot of an older version is read and replaced on the next snapshot"""
+        journal = ConversationJournal(self.save_dir)
+        with open(journal.legacy_path("c1"), 'w', encoding='utf-8') as f:
+            json.dump(self.conversation.to_dict(), f, indent=2)
+        self.assertEqual(journal.conversation_ids(), ["c1"])
+        self.assertEqual(journal.list()[0]["message_count"], 41)
+
+        resumed = Conversation.from_dict(journal.load("c1"))
+        self.assertEqual(resumed.to_dict(), self.conversation.to_dict())
+        del resumed.messages[-1]  # An edited history is written as a new snapshot
+        journal.save(resumed)
+        self.assertFalse(os.path.exists(journal.legacy_path("c1")))
+        self.assertEqual(journal.conversation_ids(), ["c1"])
+        self.assertEqual(ConversationJournal(self.save_dir).load("c1"), resumed.to_dict())
+
+
+if __name__ == '__main__':
+    unittest.main()
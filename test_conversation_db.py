@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+import unittest
+from conversation_db import SqliteConversationStore, fts_query
+from conversation_manager import Conversation, ConversationManager
+
+class TestSqliteConversationStore(unittest.TestCase):
+    def setUp(self):
+        self.save_dir = tempfile.mkdtemp()
+        self.store = SqliteConversationStore(os.path.join(self.save_dir, "test.db"))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.save_dir)
+
+    def conversation(self, conversation_id, *contents):
+        conversation = Conversation("openai", "gpt-4", conversation_id)
+        for i, content in enumerate(contents):
+            conversation.add_message("user" if i % 2 == 0 else "assistant", content,
+                                     {"output_tokens": 3} if i % 2 else None)
+        return conversation
+
+    def test_save_and_load(self):
+        """Test that saves append the new messages and loading returns the same conversation"""
+        conversation = self.conversation("c1", "Hello", "Hi there")
+        conversation.record_served_by("openai", "gpt-4")
+        self.store.save(conversation)
+        conversation.add_message("user", "More")
+        self.store.save(conversation)
+        self.assertEqual(self.store.load("c1"), conversation.to_dict())
+
+        # A history that was edited instead of extended is stored again
+        conversation.messages[:] = conversation.messages[:1]
+        self.store.save(conversation)
+        self.assertEqual(self.store.load("c1")["messages"], conversation.messages)
+        with self.assertRaises(FileNotFoundError):
+            self.store.load("missing")
+
+    def test_list(self):
+        """Test sorted and paged metadata"""
+        for i in range(3):
+            conversation = self.conversation(f"c{i}", *["word"] * (i + 1))
+            conversation.timestamp = conversation.timestamp.replace(year=2020 + i)
+            self.store.save(conversation)
+        entries = self.store.list(0, 2)
+        self.assertEqual([entry["id"] for entry in entries], ["c2", "c1"])
+        self.assertEqual(entries[0]["message_count"], 3)
+        self.assertEqual(entries[0]["preview"], "word")
+        self.assertEqual([entry["id"] for entry in self.store.list(sort_by="message_count", reverse=False)],
+                         ["c0", "c1", "c2"])
+
+    def test_search(self):
+        """Test ranked full-text search with snippets"""
+        self.store.save(self.conversation("c1", "How do I sort a list in Python?", "Use sorted() or list.sort()."))
+        self.store.save(self.conversation("c2", "Tell me about sorting algorithms in C", "Quicksort is common."))
+        hits = self.store.search("sort list")
+        self.assertEqual({hit["id"] for hit in hits}, {"c1"})
+        self.assertIn("[sort]", hits[0]["snippet"])
+        self.assertEqual({hit["id"] for hit in self.store.search("sort")}, {"c1", "c2"})
+        self.assertEqual(self.store.search("quicks")[0]["role"], "assistant")
+        # Operators and quotes in the search text are matched literally
+        self.assertEqual(self.store.search('"NOT" (list'), [])
+        self.assertEqual(fts_query('a "b'), '"a" """b"*')
+        self.assertEqual(self.store.search("   "), [])
+
+    def test_rebuild_index(self):
+        """Test recomputing the metadata and the full-text index"""
+        self.store.save(self.conversation("c1", "first prompt", "answer"))
+        self.store.connection.execute("UPDATE conversations SET message_count = 0, preview = ''")
+        self.store.connection.execute("INSERT INTO messages_fts (messages_fts) VALUES ('delete-all')")
+        self.store.rebuild_index()
+        self.assertEqual(self.store.list()[0]["message_count"], 2)
+        self.assertEqual(self.store.list()[0]["preview"], "first prompt")
+        self.assertEqual(len(self.store.search("answer")), 1)
+
+
+class TestSqliteBackend(unittest.TestCase):
+    def setUp(self):
+        self.save_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.save_dir)
+
+    def test_migration_from_json(self):
+        """Test the one-shot import of JSON conversations"""
+        json_manager = ConversationManager(self.save_dir, backend="json")
+        conversation = json_manager.start_new_conversation("anthropic", "claude-3-opus-20240229")
+        json_manager.add_message("user", "Migrate me")
+        json_manager.save_conversation()
+        json_manager.add_message("assistant", "Done")
+        json_manager.save_conversation()
+
+        manager = ConversationManager(self.save_dir, backend="sqlite")
+        self.assertTrue(manager.supports_search)
+        self.assertEqual(manager.load_conversation(conversation.id), conversation.to_dict())
+        self.assertEqual(manager.search_conversations("migrate")[0]["id"], conversation.id)
+        manager.close()
+
+        # Later JSON files are not imported again on the next start
+        json_manager.start_new_conversation("openai", "gpt-4")
+        json_manager.add_message("user", "JSON only")
+        json_manager.save_conversation()
+        manager = ConversationManager(self.save_dir, backend="sqlite")
+        self.assertEqual(len(manager.list_conversations()), 1)
+        manager.close()
+
+    def test_json_backend_has_no_search(self):
+        """Test that searching needs the SQLite backend"""
+        manager = ConversationManager(self.save_dir, backend="json")
+        self.assertFalse(manager.supports_search)
+        with self.assertRaises(RuntimeError):
+            manager.search_conversations("anything")
+        with self.assertRaises(ValueError):
+            ConversationManager(self.save_dir, backend="postgres")
+
+
+if __name__ == '__main__':
+    unittest.main()
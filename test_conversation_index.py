@@ -0,0 +1,103 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from conversation_index import INDEX_FILENAME, ConversationIndex, make_entry
+from conversation_journal import ConversationJournal
+from conversation_manager import ConversationManager
+
+def entry(conversation_id, timestamp, count=1):
+    return {"id": conversation_id, "timestamp": timestamp, "provider": "openai", "model": "gpt-4",
+            "message_count": count, "preview": "", "bytes": 10}
+
+class TestConversationIndex(unittest.TestCase):
+    def setUp(self):
+        self.save_dir = tempfile.mkdtemp()
+        self.index = ConversationIndex(self.save_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.save_dir)
+
+    def test_page_and_sort(self):
+        """Test sorting and paging the entries"""
+        for i in range(5):
+            self.index.update(entry(f"c{i}", f"2024-01-0{i + 1}T00:00:00", count=10 - i))
+        self.assertEqual([e["id"] for e in self.index.page(0, 2)], ["c4", "c3"])
+        self.assertEqual([e["id"] for e in self.index.page(2, 2)], ["c2", "c1"])
+        self.assertEqual([e["id"] for e in self.index.page(sort_by="message_count", reverse=False)],
+                         ["c4", "c3", "c2", "c1", "c0"])
+        with self.assertRaises(ValueError):
+            self.index.page(sort_by="content")
+
+    def test_persistence_and_compaction(self):
+        """Test that updates survive a reload and superseded lines are compacted away"""
+        for i in range(300):
+            self.index.update(entry("c0", "2024-01-01T00:00:00", count=i))
+        self.index.update(entry("c1", "2024-01-02T00:00:00"))
+        self.index.remove(["c1"])
+        with open(os.path.join(self.save_dir, INDEX_FILENAME), 'a', encoding='utf-8') as f:
+            f.write('{"id": "torn"')
+
+        reloaded = ConversationIndex(self.save_dir)
+        self.assertEqual([(e["id"], e["message_count"]) for e in reloaded.page()], [("c0", 299)])
+        with open(os.path.join(self.save_dir, INDEX_FILENAME), encoding='utf-8') as f:
+            self.assertLess(len(f.readlines()), 110)
+
+    def test_make_entry(self):
+        """Test the preview of the first prompt"""
+        data = {"id": "c", "timestamp": "t", "provider": "p", "model": "m",
+                "messages": [{"role": "user", "content": "Explain\n  " + "x" * 200}]}
+        made = make_entry(data, 42)
+        self.assertTrue(made["preview"].startswith("Explain xxx"))
+        self.assertEqual(len(made["preview"]), 80)
+        self.assertEqual(made["bytes"], 42)
+
+
+class TestListConversations(unittest.TestCase):
+    def setUp(self):
+        self.save_dir = tempfile.mkdtemp()
+        self.manager = ConversationManager(self.save_dir)
+        conversation = self.manager.start_new_conversation("openai", "gpt-4")
+        self.manager.add_message("user", "Hello there")
+        self.manager.save_conversation()
+        self.manager.add_message("assistant", "Hi")
+        self.manager.save_conversation()
+        self.conversation_id = conversation.id
+
+    def tearDown(self):
+        shutil.rmtree(self.save_dir)
+
+    def test_list_without_reading_messages(self):
+        """Test that listing is served from the index"""
+        with patch.object(ConversationJournal, '_read') as read:
+            conversations = ConversationManager(self.save_dir).list_conversations()
+        read.assert_not_called()
+        self.assertEqual(len(conversations), 1)
+        self.assertEqual(conversations[0]["message_count"], 2)
+        self.assertEqual(conversations[0]["preview"], "Hello there")
+        self.assertNotIn("messages", conversations[0])
+
+    def test_unindexed_and_deleted_files(self):
+        """Test that files from older versions are indexed and deleted files dropped"""
+        legacy = {"id": "legacy", "provider": "mistral", "model": "mistral-tiny",
+                  "timestamp": "2020-01-01T00:00:00", "messages": [], "metadata": {}}
+        with open(os.path.join(self.save_dir, "conversation_legacy.json"), 'w', encoding='utf-8') as f:
+            json.dump(legacy, f, indent=2)
+        self.assertEqual([c["id"] for c in self.manager.list_conversations()], [self.conversation_id, "legacy"])
+
+        os.remove(os.path.join(self.save_dir, f"conversation_{self.conversation_id}.conv"))
+        os.remove(os.path.join(self.save_dir, f"conversation_{self.conversation_id}.jsonl"))
+        self.assertEqual([c["id"] for c in self.manager.list_conversations()], ["legacy"])
+
+    def test_rebuild(self):
+        """Test rebuilding a lost index"""
+        os.remove(os.path.join(self.save_dir, INDEX_FILENAME))
+        manager = ConversationManager(self.save_dir)
+        manager.rebuild_index()
+        self.assertEqual(manager.list_conversations()[0]["message_count"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from conversation_journal import ConversationJournal
+from conversation_manager import Conversation
+
+class TestConversationJournal(unittest.TestCase):
+    def setUp(self):
+        self.save_dir = tempfile.mkdtemp()
+        self.journal = ConversationJournal(self.save_dir, compact_min_bytes=2000)
+        self.conversation = Conversation("openai", "gpt-4", "test")
+        self.conversation.add_message("user", "first")
+        self.journal.save(self.conversation)
+
+    def tearDown(self):
+        shutil.rmtree(self.save_dir)
+
+    def reload(self):
+        return ConversationJournal(self.save_dir).load("test")
+
+    def test_appends_only_new_messages(self):
+        """Test that a save appends the new messages and leaves the snapshot alone"""
+        snapshot = self.journal.snapshot_path("test")
+        mtime = os.stat(snapshot).st_mtime_ns
+        self.conversation.add_message("assistant", "answer")
+        self.conversation.record_served_by("openai", "gpt-4")
+        self.journal.save(self.conversation)
+        self.conversation.add_message("user", "second")
+        self.conversation.record_served_by("openai", "gpt-4", hedged=True)
+        self.journal.save(self.conversation)
+
+        self.assertEqual(os.stat(snapshot).st_mtime_ns, mtime)
+        with open(self.journal.journal_path("test"), encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([record["type"] for record in records], ["message", "metadata", "message", "extend"])
+        self.assertEqual(self.reload(), self.conversation.to_dict())
+
+    def test_torn_record_is_dropped(self):
+        """Test recovery from a crash in the middle of an append"""
+        self.conversation.add_message("assistant", "answer")
+        self.journal.save(self.conversation)
+        with open(self.journal.journal_path("test"), 'ab') as f:
+            f.write(b'{"type": "message", "seq": 3, "message": {"role": "us')
+
+        journal = ConversationJournal(self.save_dir)
+        data = journal.load("test")
+        self.assertEqual([m["content"] for m in data["messages"]], ["first", "answer"])
+
+        # Appends after the recovery start on a clean line
+        conversation = Conversation.from_dict(data)
+        conversation.add_message("user", "again")
+        journal.save(conversation)
+        self.assertEqual([m["content"] for m in self.reload()["messages"]], ["first", "answer", "again"])
+
+    def test_compaction(self):
+        """Test that the journal is folded into the snapshot once it outgrows it"""
+        for i in range(40):
+            self.conversation.add_message("user", f"message {i} " + "x" * 100)
+            self.journal.save(self.conversation)
+            journal_path = self.journal.journal_path("test")
+            journal_size = os.path.getsize(journal_path) if os.path.exists(journal_path) else 0
+            self.assertLessEqual(journal_size, max(2000, os.path.getsize(self.journal.snapshot_path("test"))))
+        self.assertEqual(self.reload(), self.conversation.to_dict())
+
+    def test_stale_journal_after_snapshot(self):
+        """Test that records already in the snapshot are skipped if removing the journal failed"""
+        self.conversation.add_message("assistant", "answer")
+        self.journal.save(self.conversation)
+        with open(self.journal.journal_path("test"), 'rb') as f:
+            stale = f.read()
+        self.journal._write_snapshot(self.conversation, 1)
+        with open(self.journal.journal_path("test"), 'wb') as f:
+            f.write(stale)
+        self.assertEqual(len(self.reload()["messages"]), 2)
+
+    def test_unloaded_conversation_is_not_replaced(self):
+        """Test that a different conversation with the same id cannot overwrite a stored one"""
+        self.conversation.add_message("assistant", "answer")
+        self.journal.save(self.conversation)
+        with self.assertRaises(FileExistsError):
+            ConversationJournal(self.save_dir).save(Conversation("openai", "gpt-4", "test"))
+        self.assertEqual(self.reload(), self.conversation.to_dict())
+
+
+if __name__ == '__main__':
+    unittest.main()
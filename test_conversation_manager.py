@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+import unittest
+from conversation_manager import ConversationManager
+
+class TestConversationManager(unittest.TestCase):
+    def setUp(self):
+        self.save_dir = tempfile.mkdtemp()
+        self.manager = ConversationManager(self.save_dir)
+        conversation = self.manager.start_new_conversation("openai", "gpt-4")
+        for i in range(5):
+            self.manager.add_message("user", f"message {i}")
+        self.manager.save_conversation()
+        self.conversation_id = conversation.id
+
+    def tearDown(self):
+        shutil.rmtree(self.save_dir)
+
+    def test_load_messages(self):
+        """Test paging through stored and in-memory messages"""
+        self.assertEqual(self.manager.count_messages(self.conversation_id), 5)
+        self.assertEqual([m["content"] for m in self.manager.load_messages(self.conversation_id, 1, 3)],
+                         ["message 1", "message 2"])
+
+        # Saved conversations are read from the store
+        other = ConversationManager(self.save_dir)
+        self.assertEqual(other.count_messages(self.conversation_id), 5)
+        self.assertEqual(other.load_messages(self.conversation_id, 4)[0]["content"], "message 4")
+
+    def test_resume_conversation(self):
+        """Test that a saved conversation can be continued"""
+        other = ConversationManager(self.save_dir)
+        conversation = other.resume_conversation(self.conversation_id)
+        self.assertIs(other.current_conversation, conversation)
+        other.add_message("assistant", "continued")
+        other.save_conversation()
+        self.assertEqual(self.manager.load_conversation(self.conversation_id)["messages"][-1]["content"],
+                         "continued")
+        self.assertTrue(os.path.exists(os.path.join(self.save_dir, f"conversation_{self.conversation_id}.conv")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import time
+import unittest
+from conversation_manager import Conversation
+from hedging import HedgePolicy, HedgedSender
+from providers import ProviderError
+from request_executor import RequestCancelled
+
+class FakePool:
+    def get(self, provider):
+        return None
+
+class FakeScheduler:
+    """Scheduler whose responses are scripted per model"""
+
+    def __init__(self, behaviours):
+        self.behaviours = behaviours
+        self.cancelled = []
+        self.calls = []
+        self.messages = {}
+
+    def send_chat(self, session, adapter, api_key, model, messages, stream=False,
+                  token=None, on_delta=None, on_retry=None, metrics=None):
+        self.calls.append(model)
+        self.messages[model] = messages
+        delay, result = self.behaviours[model]
+        if token.event.wait(delay):
+            self.cancelled.append(model)
+            raise RequestCancelled("cancelled")
+        if isinstance(result, Exception):
+            raise result
+        if stream and on_delta:
+            on_delta(result)
+        return result
+
+class TestHedging(unittest.TestCase):
+    def setUp(self):
+        self.conversation = Conversation('anthropic', 'claude')
+        for i in range(10):
+            self.conversation.add_message("user", f"Question {i} " + "x" * 400)
+            self.conversation.add_message("assistant", f"Answer {i} " + "y" * 400)
+        self.conversation.add_message("user", "Last question")
+        self.budgets = {('anthropic', 'claude'): 100000, ('openai', 'gpt-3.5-turbo'): 500}
+
+    def budget(self, provider, model):
+        return self.budgets[(provider, model)]
+
+    def make_sender(self, behaviours, hedge=True, deadline=0.1):
+        self.scheduler = FakeScheduler(behaviours)
+        policy = HedgePolicy([('openai', 'gpt-3.5-turbo')], hedge=hedge, default_deadline=deadline)
+        keys = {'anthropic': 'key', 'openai': 'key'}
+        return HedgedSender(policy, self.scheduler, FakePool(), keys)
+
+    def test_fast_primary_is_not_hedged(self):
+        """Test that a fast primary answers alone"""
+        sender = self.make_sender({'claude': (0.01, "primary")})
+        result = sender.send('anthropic', 'claude', self.conversation, self.budget, stream=True)
+        self.assertEqual(result['text'], "primary")
+        self.assertFalse(result['hedged'])
+        self.assertEqual(self.scheduler.calls, ['claude'])
+
+    def test_slow_primary_is_hedged(self):
+        """Test that the backup wins after the deadline and the primary is cancelled"""
+        deltas = []
+        sender = self.make_sender({'claude': (5, "primary"), 'gpt-3.5-turbo': (0.01, "backup")})
+        result = sender.send('anthropic', 'claude', self.conversation, self.budget, stream=True,
+                             on_delta=deltas.append)
+        self.assertEqual(result['text'], "backup")
+        self.assertEqual((result['provider'], result['model']), ('openai', 'gpt-3.5-turbo'))
+        self.assertTrue(result['hedged'])
+        self.assertEqual(deltas, ["backup"])
+        for _ in range(50):
+            if self.scheduler.cancelled:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.scheduler.cancelled, ['claude'])
+
+    def test_failover_on_error(self):
+        """Test that an error before any text switches to the backup"""
+        sender = self.make_sender({'claude': (0, ProviderError(500, {}, "down")),
+                                   'gpt-3.5-turbo': (0, "backup")}, hedge=False)
+        result = sender.send('anthropic', 'claude', self.conversation, self.budget)
+        self.assertEqual(result['text'], "backup")
+        self.assertTrue(result['failover'])
+        self.assertFalse(result['hedged'])
+
+    def test_error_without_backup(self):
+        """Test that the error is raised when every model failed"""
+        sender = self.make_sender({'claude': (0, ProviderError(500, {}, "down")),
+                                   'gpt-3.5-turbo': (0, ProviderError(503, {}, "down"))}, hedge=False)
+        with self.assertRaises(ProviderError):
+            sender.send('anthropic', 'claude', self.conversation, self.budget)
+
+    def test_backup_without_api_key_is_skipped(self):
+        """Test that backups of providers without a key are not used"""
+        sender = self.make_sender({'claude': (0, ProviderError(500, {}, "down"))})
+        sender.api_keys = {'anthropic': 'key'}
+        with self.assertRaises(ProviderError):
+            sender.send('anthropic', 'claude', self.conversation, self.budget)
+        self.assertEqual(self.scheduler.calls, ['claude'])
+
+    def test_backup_gets_its_own_context_window(self):
+        """Test that a backup with a smaller context window gets a shorter history than the primary"""
+        sender = self.make_sender({'claude': (0, ProviderError(500, {}, "down")),
+                                   'gpt-3.5-turbo': (0, "backup")}, hedge=False)
+        result = sender.send('anthropic', 'claude', self.conversation, self.budget)
+        self.assertEqual(result['text'], "backup")
+        primary, backup = self.scheduler.messages['claude'], self.scheduler.messages['gpt-3.5-turbo']
+        self.assertEqual(len(primary), len(self.conversation.messages))
+        self.assertLess(len(backup), len(primary))
+        self.assertEqual(backup[-1]["content"], "Last question")
+        self.assertLessEqual(sum(len(m["content"]) // 4 + 5 for m in backup), 500)
+
+    def test_first_token_deadline(self):
+        """Test that the deadline follows the observed percentile"""
+        policy = HedgePolicy([], percentile=0.5, default_deadline=3.0)
+        self.assertEqual(policy.first_token_deadline('openai', 'gpt-4'), 3.0)
+        for seconds in (1.0, 2.0, 3.0, 4.0, 5.0, 6.0):
+            policy.record_ttft('openai', 'gpt-4', seconds)
+        self.assertEqual(policy.first_token_deadline('openai', 'gpt-4'), 4.0)
+
+if __name__ == '__main__':
+    unittest.main()
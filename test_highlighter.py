@@ -0,0 +1,107 @@
+import random
+import time
+import tkinter as tk
+import unittest
+from tkinter import scrolledtext
+
+from highlighter import MarkdownHighlighter, MarkdownLexer, content_key, lex_markdown
+from transcript_view import TranscriptView
+
+SAMPLE = (
+    "# Title\n"
+    "Some **bold**, `code` and *italic* text.\n"
+    "- item\n"
+    "```python\n"
+    "def f(x):  # note\n"
+    "    return 'a' + 1\n"
+    "```\n"
+    "> quote\n"
+)
+
+
+def spans_by_tag(text, spans):
+    return {(tag, text[start:end]) for tag, start, end in spans}
+
+
+class TestMarkdownLexer(unittest.TestCase):
+    def test_markdown_and_code(self):
+        """Test the tags found in prose and in a fenced code block"""
+        found = spans_by_tag(SAMPLE, lex_markdown(SAMPLE))
+        for expected in [('md_heading', '# Title'), ('md_bold', '**bold**'), ('md_code', '`code`'),
+                         ('md_italic', '*italic*'), ('md_list', '- '), ('md_fence', '```python\n'),
+                         ('md_keyword', 'def'), ('md_keyword', 'return'), ('md_comment', '# note'),
+                         ('md_string', "'a'"), ('md_number', '1'), ('md_quote', '> quote')]:
+            self.assertIn(expected, found)
+        # Markdown syntax inside code blocks is not Markdown
+        self.assertNotIn(('md_heading', '# note'), found)
+
+    def test_comment_syntax_follows_language(self):
+        """Test that '#' is a comment in Python but not in C"""
+        c_code = "```c\n#include <stdio.h>\nint x = 1; // one\n```\n"
+        found = spans_by_tag(c_code, lex_markdown(c_code))
+        self.assertIn(('md_comment', '// one'), found)
+        self.assertNotIn(('md_comment', '#include <stdio.h>'), found)
+
+    def test_incremental_matches_full_lex(self):
+        """Test that lexing a stream chunk by chunk gives the same spans as lexing it at once"""
+        expected = lex_markdown(SAMPLE)
+        for seed in range(50):
+            chunks = random.Random(seed)
+            lexer = MarkdownLexer()
+            spans = []
+            position = 0
+            while position < len(SAMPLE):
+                size = chunks.randint(1, 8)
+                spans += lexer.feed(SAMPLE[position:position + size])
+                position += size
+            spans += lexer.finish()
+            self.assertEqual(spans, expected)
+
+
+class TestMarkdownHighlighter(unittest.TestCase):
+    def setUp(self):
+        try:
+            self.root = tk.Tk()
+        except tk.TclError as e:
+            self.skipTest(f"Tk needs a display: {e}")
+        self.root.withdraw()
+        self.widget = scrolledtext.ScrolledText(self.root)
+        self.highlighter = MarkdownHighlighter(self.widget, self.root)
+        self.view = TranscriptView(self.widget, self.root, highlighter=self.highlighter)
+
+    def tearDown(self):
+        self.root.destroy()
+
+    def wait_for(self, condition):
+        deadline = time.time() + 2
+        while not condition() and time.time() < deadline:
+            self.root.update()
+            time.sleep(0.01)
+
+    def tagged(self, tag):
+        ranges = self.widget.tag_ranges(tag)
+        return [self.widget.get(ranges[i], ranges[i + 1]) for i in range(0, len(ranges), 2)]
+
+    def test_stream_is_highlighted_and_cached(self):
+        """Test highlighting of a streamed answer and the cache used on reload"""
+        message = {"role": "assistant", "content": SAMPLE.rstrip("\n"), "timestamp": "2024-01-01T12:00:00"}
+        self.view.show(lambda start, end: [], 0)
+        self.view.begin_live()
+        self.view.write("[2024-01-01 12:00:00] Assistant:\n")
+        for position in range(0, len(SAMPLE), 5):
+            self.view.write(SAMPLE[position:position + 5])
+            self.view.renderer.flush()
+        self.view.end_live(message)
+
+        self.wait_for(lambda: self.highlighter.cached(content_key(message["content"])))
+        self.assertIn("def", self.tagged('md_keyword'))
+        self.assertIn("**bold**", self.tagged('md_bold'))
+
+        # Reloading applies the cached spans right away
+        self.view.show(lambda start, end: [message][start:end], 1)
+        self.assertIn("def", self.tagged('md_keyword'))
+        self.assertIn("# Title", self.tagged('md_heading'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from unittest.mock import patch
+from http_pool import SessionPool
+
+class TestSessionPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = SessionPool(pool_maxsize=4)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_session_reused_per_provider(self):
+        """Test that each provider keeps a single session"""
+        first = self.pool.get('anthropic')
+        self.assertIs(first, self.pool.get('anthropic'))
+        self.assertIsNot(first, self.pool.get('openai'))
+
+    def test_configure_pool_size(self):
+        """Test per-provider pool size overrides"""
+        self.pool.configure('openai', pool_maxsize=16)
+        adapter = self.pool.get('openai').get_adapter("https://api.openai.com")
+        self.assertEqual(adapter._pool_maxsize, 16)
+        adapter = self.pool.get('mistral').get_adapter("https://api.mistral.ai")
+        self.assertEqual(adapter._pool_maxsize, 4)
+
+    def test_prewarm(self):
+        """Test that pre-warming sends a HEAD request through the provider session"""
+        session = self.pool.get('anthropic')
+        with patch.object(session, 'head') as mock_head:
+            self.pool.prewarm('anthropic', "https://api.anthropic.com").join(2)
+            mock_head.assert_called_once()
+            self.assertEqual(mock_head.call_args[0][0], "https://api.anthropic.com")
+
+    def test_prewarm_ignores_errors(self):
+        """Test that a failing pre-warm does not raise"""
+        session = self.pool.get('openai')
+        with patch.object(session, 'head', side_effect=OSError("offline")):
+            self.pool.prewarm('openai', "https://api.openai.com").join(2)
+
+    def test_http2_falls_back_without_httpx(self):
+        """Test that HTTP/2 falls back to requests when httpx is missing"""
+        pool = SessionPool(http2=True)
+        with patch.object(SessionPool, '_load_httpx', return_value=None):
+            session = pool.get('google')
+        self.assertTrue(hasattr(session, 'mount'))
+        pool.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+import llm_cli
+from conversation_manager import ConversationManager
+from mock_provider import MockConfig, MockProviderServer, answer_words
+from providers import PROVIDERS
+
+class TestLLMCli(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.save_dir = os.path.join(self.temp_dir, "conversations")
+        self.server = MockProviderServer(MockConfig(chunks=3))
+        self.server.start()
+        self.answer = ''.join(answer_words(3))
+        self.env = patch.dict('os.environ', {'OPENAI_API_KEY': 'key'})
+        self.env.start()
+        self.base_url = patch.object(PROVIDERS['openai'], 'base_url', self.server.url)
+        self.base_url.start()
+
+    def tearDown(self):
+        self.base_url.stop()
+        self.env.stop()
+        self.server.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def chat(self, *args, stdin=""):
+        stdout = io.StringIO()
+        with patch('sys.stdout', stdout), patch('sys.stderr', io.StringIO()), \
+             patch('sys.stdin', io.StringIO(stdin)):
+            code = llm_cli.main(["chat", "--provider", "openai", "--save-dir", self.save_dir, *args])
+        return code, stdout.getvalue()
+
+    def test_chat_and_continue(self):
+        """Test a streamed chat that is saved and continued from stdin"""
+        code, output = self.chat("Hello")
+        self.assertEqual(code, 0)
+        self.assertEqual(output, self.answer + "\n")
+
+        conversation_id = ConversationManager(self.save_dir).list_conversations()[0]["id"]
+        code, output = self.chat("--conversation", conversation_id, "--no-cache", stdin="Again")
+        self.assertEqual(code, 0)
+
+        data = ConversationManager(self.save_dir).load_conversation(conversation_id)
+        self.assertEqual([m["role"] for m in data["messages"]], ["user", "assistant", "user", "assistant"])
+        self.assertEqual(data["messages"][1]["metrics"]["output_tokens"], 3)
+        self.assertEqual(self.server.requests['openai'], 2)
+
+    def test_continue_with_another_provider(self):
+        """Test that a conversation continued with another provider uses that provider's model and context window"""
+        manager = ConversationManager(self.save_dir)
+        conversation = manager.start_new_conversation("anthropic", "claude-model")
+        manager.add_message("user", "Hello")
+        manager.add_message("assistant", "Hi")
+        manager.save_conversation()
+        from model_catalog import shared_catalog
+        model = shared_catalog.models('openai')[0]
+        with patch.object(shared_catalog, 'context_budget', wraps=shared_catalog.context_budget) as budget:
+            code, _ = self.chat("--conversation", conversation.id, "--no-cache", "Again")
+        self.assertEqual(code, 0)
+        budget.assert_called_once_with('openai', model)
+
+    def test_runs_in_the_same_second(self):
+        """Test that chats started in the same second are saved as separate conversations"""
+        times = iter(datetime(2024, 1, 1, 12, 0, 0, microsecond) for microsecond in range(1, 1000))
+
+        class Clock(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return next(times)
+
+        with patch('conversation_manager.dt', Clock):
+            self.assertEqual(self.chat("First", "--no-cache")[0], 0)
+            self.assertEqual(self.chat("Second", "--no-cache")[0], 0)
+        conversations = ConversationManager(self.save_dir).list_conversations()
+        self.assertEqual(sorted(c["preview"] for c in conversations), ["First", "Second"])
+
+    def test_cached_answer(self):
+        """Test that a repeated prompt is answered from the response cache"""
+        self.chat("Hello", "--no-save")
+        code, output = self.chat("Hello", "--no-save", "--no-stream")
+        self.assertEqual(output, self.answer + "\n")
+        self.assertEqual(self.server.requests['openai'], 1)
+
+    def test_errors(self):
+        """Test the exit codes of failed requests and missing keys"""
+        self.server.config.error_rate = 1.0
+        with patch('scheduler.shared_scheduler.max_retries', 0):
+            code, _ = self.chat("Hello", "--no-cache")
+        self.assertEqual(code, 1)
+        del os.environ['OPENAI_API_KEY']
+        with self.assertRaises(SystemExit):
+            self.chat("Hello")
+
+    def test_startup_without_gui_modules(self):
+        """Test that the CLI starts quickly and never imports Tk or Aider"""
+        script = ("import sys, time; start = time.perf_counter(); import llm_cli; "
+                  "print(time.perf_counter() - start); "
+                  "print(any(m.split('.')[0] in ('tkinter', 'aider', 'winreg', 'requests') for m in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(llm_cli.__file__)))
+        elapsed, heavy = result.stdout.split()
+        self.assertEqual(heavy, "False")
+        self.assertLess(float(elapsed), 0.2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,6 +10,7 @@ from pathlib import Path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
 
+from conversation_manager import Conversation
 from llm_gui import LLMGUI, set_environment_variable
 
 class TestLLMGUI(unittest.TestCase):
@@ -38,8 +39,8 @@ class TestLLMGUI(unittest.TestCase):
         self.aider_patcher.start()
         
         # Set up mock model
-        self.mock_aider.get_available_models.return_value = ['claude-3-opus-20240229']
-        self.mock_aider.main_model = 'claude-3-opus-20240229'
+        self.mock_aider.get_available_models.return_value = ['claude-sonnet-4-5-20250929']
+        self.mock_aider.main_model = 'claude-sonnet-4-5-20250929'
         self.mock_aider.process_code_edit = MagicMock()
         
         # Create GUI instance
@@ -144,6 +145,66 @@ class TestLLMGUI(unittest.TestCase):
         self.gui._handle_aider_response(error_response)
         self.assertEqual(self.gui.edit_status.cget('text'), 'Edit failed!')
     
+    def test_run_comparison(self):
+        """Test sending one prompt to several models"""
+        self.gui.api_keys['openai'].set('openai-key')
+        self.gui.show_compare_dialog()
+        self.gui.compare_prompt.insert('1.0', 'Compare me')
+        self.gui.compare_listbox.selection_set(0, 1)
+
+        with patch('scheduler.send_chat', return_value='answer') as mock_send, \
+             patch.object(self.gui.conversation_manager, 'save_conversation') as mock_save:
+            self.gui.run_comparison()
+
+            # Process events until both results arrived
+            import time
+            deadline = time.time() + 2
+            while mock_save.call_count < 2 and time.time() < deadline:
+                self.root.update()
+                time.sleep(0.01)
+
+        self.assertEqual(mock_send.call_count, 2)
+        self.assertEqual(len(self.gui.compare_outputs), 2)
+        conversations = [call.args[0] for call in mock_save.call_args_list]
+        self.assertNotEqual(conversations[0].id, conversations[1].id)
+        for iid in self.gui.compare_table.get_children():
+            self.assertEqual(self.gui.compare_table.item(iid, "values")[5], "done")
+
+    def test_update_models_for_unknown_provider(self):
+        """Test that a typed provider name without an adapter falls back to a default model list"""
+        self.gui.provider_var.set('not-a-provider')
+        self.gui.update_models()
+        self.assertEqual(self.gui.model_var.get(), self.gui.model_catalog.models('openrouter')[0])
+
+    def test_compare_dialog_closed_while_running(self):
+        """Test that closing the Compare window cancels its requests and still saves finished answers"""
+        self.gui.show_compare_dialog()
+        token = MagicMock()
+        self.gui.compare_tokens.append(token)
+        self.gui.compare_table.winfo_toplevel().destroy()
+        token.cancel.assert_called_once()
+
+        conversation = Conversation('openai', 'gpt-4')
+        conversation.add_message('user', 'Compare me')
+        result = {'text': 'answer', 'ttft': 0.1, 'total': 0.2, 'provider': 'openai', 'model': 'gpt-4',
+                  'metrics': {}}
+        with patch.object(self.gui.conversation_manager, 'save_conversation') as mock_save:
+            self.gui.handle_compare_result(0, conversation, result)
+            self.gui.handle_compare_error(1, RuntimeError('failed'))
+        mock_save.assert_called_once_with(conversation)
+        self.assertEqual(conversation.messages[-1]['content'], 'answer')
+
+    def test_aider_starts_in_background(self):
+        """Test that Aider is not built during startup and becomes ready on demand"""
+        self.assertIsNone(self.gui.aider_manager)
+        self.assertEqual(self.gui.aider_state, "idle")
+
+        self.gui.show_aider_dialog()
+        self.assertIs(self.gui.get_aider_manager(), self.mock_aider)
+        self.assertEqual(self.gui.aider_state, "ready")
+        self.root.update()
+        self.assertEqual(self.gui.edit_status.cget('text'), "Aider ready")
+
     def test_add_files_to_edit(self):
         """Test adding files to edit list"""
         # Show dialog first
@@ -0,0 +1,31 @@
+import unittest
+from metrics import MetricsStore, percentile
+
+class TestMetrics(unittest.TestCase):
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        values = [5.0, 1.0, 4.0, 2.0, 3.0]
+        self.assertEqual(percentile(values, 0.5), 3.0)
+        self.assertEqual(percentile(values, 0.95), 5.0)
+        self.assertEqual(percentile(values, 0.0), 1.0)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_summary(self):
+        """Test the rolling summary per provider/model"""
+        store = MetricsStore(window=3)
+        for total in (1.0, 2.0, 3.0, 4.0):
+            store.record('openai', 'gpt-4', {"ttft": total / 2, "total": total, "tokens_per_sec": None,
+                                             "input_tokens": 10, "output_tokens": 5})
+        store.record('anthropic', 'claude', {"total": 1.0})
+
+        rows = {row["provider"]: row for row in store.summary()}
+        openai = rows['openai']
+        self.assertEqual(openai["requests"], 3)
+        self.assertEqual(openai["total_p50"], 3.0)
+        self.assertEqual(openai["total_p95"], 4.0)
+        self.assertIsNone(openai["tokens_per_sec_p50"])
+        self.assertEqual(openai["input_tokens"], 30)
+        self.assertEqual(rows['anthropic']["output_tokens"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import threading
+import time
+import unittest
+from benchmark import run_benchmark
+from http_pool import SessionPool
+from mock_provider import MockConfig, MockProviderServer, answer_words
+from providers import PROVIDERS, ProviderError, get_provider, send_chat
+from scheduler import RequestScheduler
+
+class TestMockProvider(unittest.TestCase):
+    def setUp(self):
+        self.config = MockConfig(chunks=5, seed=1)
+        self.server = MockProviderServer(self.config)
+        self.server.start()
+        self.pool = SessionPool()
+        self.expected = ''.join(answer_words(5))
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.stop()
+
+    def adapter(self, provider):
+        return type(get_provider(provider))(self.server.url)
+
+    def test_all_wire_formats(self):
+        """Test buffered and streamed requests in every provider format"""
+        for provider in PROVIDERS:
+            adapter = self.adapter(provider)
+            for stream in (False, True):
+                with self.subTest(provider=provider, stream=stream):
+                    metrics = {}
+                    deltas = []
+                    text = send_chat(self.pool.get(provider), adapter, 'key', adapter.models[0],
+                                     [{"role": "user", "content": "Hi"}], stream,
+                                     on_delta=deltas.append, metrics=metrics)
+                    self.assertEqual(text, self.expected)
+                    self.assertEqual(len(deltas), 5 if stream else 0)
+                    self.assertEqual(metrics["output_tokens"], 5)
+                    self.assertGreater(metrics["input_tokens"], 0)
+
+    def test_prompt_cache(self):
+        """Test that a repeated history prefix is reported as read from the prompt cache"""
+        history = [{"role": "user", "content": "x" * 8000}, {"role": "assistant", "content": "answer"}]
+        for provider in ('anthropic', 'openai'):
+            with self.subTest(provider=provider):
+                adapter = self.adapter(provider)
+                first, second = {}, {}
+                send_chat(self.pool.get(provider), adapter, 'key', adapter.models[0],
+                          history[:1], metrics=first)
+                send_chat(self.pool.get(provider), adapter, 'key', adapter.models[0],
+                          history + [{"role": "user", "content": "more"}], stream=True, metrics=second)
+                self.assertEqual(first["cache_read_tokens"], 0)
+                self.assertGreater(second["cache_read_tokens"], 0)
+                if provider == 'anthropic':
+                    self.assertEqual(second["cache_read_tokens"], first["cache_write_tokens"])
+                    self.assertGreater(second["cache_write_tokens"], 0)
+
+    def test_rate_limit_is_retried(self):
+        """Test that 429 responses carry Retry-After and are retried by the scheduler"""
+        self.config.rate_limit_rate = 1.0
+        self.config.retry_after = 0.01
+        adapter = self.adapter('openai')
+        with self.assertRaises(ProviderError) as context:
+            send_chat(self.pool.get('openai'), adapter, 'key', 'gpt-4', [])
+        self.assertEqual(context.exception.status_code, 429)
+        self.assertEqual(context.exception.headers["Retry-After"], "0.01")
+
+        scheduler = RequestScheduler(max_retries=3, base_delay=0.01)
+        retries = []
+        self.config.rate_limit_rate = 0.5
+        text = scheduler.send_chat(self.pool.get('openai'), adapter, 'key', 'gpt-4', [],
+                                   on_retry=lambda *args: retries.append(args))
+        self.assertEqual(text, self.expected)
+
+    def test_run_benchmark(self):
+        """Test a small benchmark run"""
+        row = run_benchmark(self.server.url, 'anthropic', concurrency=4, requests_count=12)
+        self.assertEqual(row["errors"], 0)
+        self.assertEqual(self.server.requests['anthropic'], 12)
+        self.assertLessEqual(row["latency_p50_ms"], row["latency_p99_ms"])
+        self.assertGreater(row["tokens_per_sec"], 0)
+        # Deadline timers of finished requests are stopped
+        deadline = time.monotonic() + 5
+        while any(isinstance(t, threading.Timer) for t in threading.enumerate()) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(any(isinstance(t, threading.Timer) for t in threading.enumerate()))
+
+if __name__ == '__main__':
+    unittest.main()
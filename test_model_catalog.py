@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from http_pool import SessionPool
+from mock_provider import MOCK_MODELS, MockProviderServer
+from model_catalog import ModelCatalog
+from providers import PROVIDERS
+
+class TestModelCatalog(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "catalog", "models.json")
+        self.catalog = ModelCatalog(self.path)
+        self.server = MockProviderServer()
+        self.server.start()
+        self.base_urls = [patch.object(adapter, 'base_url', self.server.url) for adapter in PROVIDERS.values()]
+        for base_url in self.base_urls:
+            base_url.start()
+        self.pool = SessionPool()
+
+    def tearDown(self):
+        self.pool.close()
+        for base_url in self.base_urls:
+            base_url.stop()
+        self.server.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def test_builtin_lists_without_cache(self):
+        """Test that lookups fall back to the adapters' lists without touching the network"""
+        self.assertEqual(self.catalog.models('anthropic'), PROVIDERS['anthropic'].models)
+        self.assertEqual(self.catalog.context_budget('openai', 'gpt-4o'), PROVIDERS['openai'].context_budget('gpt-4o'))
+        self.assertTrue(self.catalog.is_stale('openai'))
+        self.assertNotIn('models', self.server.requests)
+
+    def test_refresh_all_providers(self):
+        """Test fetching and parsing the model list of every wire format"""
+        for provider in PROVIDERS:
+            with self.subTest(provider=provider):
+                self.assertTrue(self.catalog.refresh(provider, self.pool.get(provider), 'key'))
+                self.assertEqual(self.catalog.models(provider), MOCK_MODELS)
+
+        # Context windows and prices from the list are used when known
+        self.assertEqual(self.catalog.info('mistral', 'gpt-mock-large')['context_window'], 32768)
+        self.assertEqual(self.catalog.context_budget('google', 'gpt-mock-small'),
+                         32768 - PROVIDERS['google'].response_reserve)
+        self.assertEqual(self.catalog.price('openrouter', 'gpt-mock-large'), (0.000001, 0.000002))
+        self.assertEqual(self.catalog.price('openai', 'gpt-mock-large'), (None, None))
+        # Explicit Aider lists still win
+        self.assertEqual(self.catalog.aider_models('mistral'), PROVIDERS['mistral'].aider_models)
+
+    def test_ttl_and_etag(self):
+        """Test that fresh lists are not fetched and stale ones are revalidated"""
+        session = self.pool.get('openai')
+        self.catalog.refresh('openai', session, 'key')
+        self.assertFalse(self.catalog.refresh('openai', session, 'key'))
+        self.assertEqual(self.server.requests['models'], 1)
+
+        # A stale list is revalidated with its ETag; the server answers 304
+        with patch('model_catalog.time.time', return_value=time.time() + self.catalog.ttl + 1):
+            self.assertTrue(self.catalog.is_stale('openai'))
+            self.assertFalse(self.catalog.refresh('openai', session, 'key'))
+            self.assertFalse(self.catalog.is_stale('openai'))
+        self.assertEqual(self.server.requests['models'], 2)
+
+        # The cache survives a restart
+        reloaded = ModelCatalog(self.path)
+        self.assertEqual(reloaded.models('openai'), MOCK_MODELS)
+        self.assertFalse(reloaded.is_stale('openai'))
+
+    def test_refresh_in_background(self):
+        """Test that only providers with an API key are refreshed and updates are reported"""
+        updated = []
+        thread = self.catalog.refresh_in_background(self.pool, {'openai': 'key', 'google': ''},
+                                                    on_update=updated.append)
+        thread.join(5)
+        self.assertEqual(updated, ['openai'])
+        self.assertEqual(self.catalog.models('google'), PROVIDERS['google'].models)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from conversation_manager import Conversation, ConversationManager
+from persistence_worker import DURABILITY_ALWAYS, DURABILITY_EXIT, DURABILITY_INTERVAL, PersistenceWorker
+
+class SlowStore:
+    """Records saves and syncs; saves block until released"""
+
+    def __init__(self):
+        self.saved = []
+        self.syncs = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.fail = False
+
+    def save(self, conversation):
+        self.release.wait()
+        if self.fail:
+            raise OSError("disk full")
+        self.saved.append((conversation.id, len(conversation.messages)))
+
+    def sync(self):
+        self.syncs += 1
+
+
+class TestPersistenceWorker(unittest.TestCase):
+    def setUp(self):
+        self.store = SlowStore()
+        self.conversation = Conversation("openai", "gpt-4", "c1")
+
+    def worker(self, durability=DURABILITY_EXIT, **kwargs):
+        worker = PersistenceWorker(self.store, durability, **kwargs)
+        self.addCleanup(worker.close)
+        return worker
+
+    def test_saves_are_coalesced(self):
+        """Test that saves queued while the worker is busy become one write of the newest state"""
+        worker = self.worker()
+        other = Conversation("openai", "gpt-4", "c2")
+        self.store.release.clear()
+        self.conversation.add_message("user", "first")
+        worker.submit(self.conversation)
+        time.sleep(0.05)  # The worker is now blocked in the first save
+        for i in range(10):
+            self.conversation.add_message("user", f"message {i}")
+            worker.submit(self.conversation)
+        worker.submit(other)
+        self.store.release.set()
+        self.assertTrue(worker.flush(timeout=5))
+        self.assertEqual(self.store.saved, [("c1", 1), ("c1", 11), ("c2", 0)])
+        self.assertEqual(worker.coalesced, 9)
+
+    def test_submit_does_not_block(self):
+        """Test that a stalled disk does not block the caller and flush waits for it"""
+        worker = self.worker()
+        self.store.release.clear()
+        start = time.perf_counter()
+        worker.submit(self.conversation)
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertFalse(worker.flush("c1", timeout=0.05))
+        self.assertTrue(worker.flush("c2", timeout=0.05))
+        self.store.release.set()
+        self.assertTrue(worker.flush("c1", timeout=5))
+
+    def test_snapshot_is_taken_on_submit(self):
+        """Test that messages added after a submit are not part of that save"""
+        worker = self.worker()
+        self.store.release.clear()
+        worker.submit(self.conversation)
+        self.conversation.add_message("user", "later")
+        self.store.release.set()
+        worker.flush(timeout=5)
+        self.assertEqual(self.store.saved, [("c1", 0)])
+
+    def test_durability_policies(self):
+        """Test when each policy forces the writes to disk"""
+        worker = self.worker(DURABILITY_ALWAYS)
+        for _ in range(3):
+            worker.submit(self.conversation)
+            worker.flush(timeout=5)
+        worker.close()
+        self.assertEqual(self.store.syncs, 3)
+
+        self.store.syncs = 0
+        worker = self.worker(DURABILITY_INTERVAL, sync_interval=0.05)
+        worker.submit(self.conversation)
+        deadline = time.monotonic() + 5
+        while self.store.syncs == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.store.syncs, 1)
+
+        self.store.syncs = 0
+        worker = self.worker(DURABILITY_EXIT)
+        for _ in range(3):
+            worker.submit(self.conversation)
+            worker.flush(timeout=5)
+        self.assertEqual(self.store.syncs, 0)
+        self.assertTrue(worker.close())
+        self.assertEqual(self.store.syncs, 1)
+        with self.assertRaises(RuntimeError):
+            worker.submit(self.conversation)
+        with self.assertRaises(ValueError):
+            PersistenceWorker(self.store, "never")
+
+    def test_errors_are_reported(self):
+        """Test that a failed save is reported and the worker keeps running"""
+        errors = []
+        worker = self.worker(on_error=lambda conversation_id, error: errors.append((conversation_id, error)))
+        self.store.fail = True
+        worker.submit(self.conversation)
+        worker.flush(timeout=5)
+        self.store.fail = False
+        worker.submit(self.conversation)
+        worker.flush(timeout=5)
+        self.assertEqual([conversation_id for conversation_id, _ in errors], ["c1"])
+        self.assertEqual(self.store.saved, [("c1", 0)])
+
+
+class TestBackgroundSaves(unittest.TestCase):
+    def setUp(self):
+        self.save_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.save_dir)
+
+    def test_manager_with_background_saves(self):
+        """Test that queued saves are visible to loads and written on close"""
+        manager = ConversationManager(self.save_dir, background_saves=True, durability=DURABILITY_EXIT)
+        first = manager.start_new_conversation("openai", "gpt-4")
+        first.id = "first"
+        manager.add_message("user", "Hello")
+        manager.save_conversation()
+        second = manager.start_new_conversation("openai", "gpt-4")
+        second.id = "second"
+        self.assertEqual(manager.load_conversation("first")["messages"][0]["content"], "Hello")
+
+        manager.add_message("user", "Unsaved")
+        manager.close()
+        reopened = ConversationManager(self.save_dir)
+        self.assertEqual({c["id"] for c in reopened.list_conversations()}, {"first", "second"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+import unittest
+from unittest.mock import MagicMock
+from providers import PROVIDERS, get_provider, send_chat
+from request_executor import CancelToken, RequestCancelled, RequestTimeout
+
+class TestProviders(unittest.TestCase):
+    def test_registry(self):
+        """Test that all providers are registered"""
+        self.assertEqual(set(PROVIDERS), {'anthropic', 'openai', 'google', 'mistral', 'openrouter'})
+        with self.assertRaises(ValueError):
+            get_provider('unknown')
+
+    def test_headers_are_cached(self):
+        """Test that headers are built once per API key"""
+        adapter = get_provider('openrouter')
+        headers = adapter.headers('key-1')
+        self.assertIs(headers, adapter.headers('key-1'))
+        self.assertEqual(headers["Authorization"], "Bearer key-1")
+        self.assertEqual(headers["X-Title"], "LLM GUI")
+        self.assertEqual(adapter.headers('key-2')["Authorization"], "Bearer key-2")
+
+    def test_google_payload(self):
+        """Test that Google maps assistant turns to the model role"""
+        adapter = get_provider('google')
+        payload = adapter.encode_payload('gemini-pro', [
+            {"role": "user", "content": "Hi"},
+            {"role": "assistant", "content": "Hello"},
+        ])
+        self.assertEqual([c["role"] for c in payload["contents"]], ["user", "model"])
+        self.assertIn(":streamGenerateContent?alt=sse", adapter.url('gemini-pro', stream=True))
+
+    def test_decode_response(self):
+        """Test decoding complete responses for every provider"""
+        chat = {"choices": [{"message": {"content": "text"}}]}
+        cases = {
+            'anthropic': {"content": [{"text": "text"}]},
+            'google': {"candidates": [{"content": {"parts": [{"text": "text"}]}}]},
+            'openai': chat,
+            'mistral': chat,
+            'openrouter': chat,
+        }
+        for provider, result in cases.items():
+            with self.subTest(provider=provider):
+                self.assertEqual(get_provider(provider).decode_response(result), "text")
+
+    def test_anthropic_stream(self):
+        """Test extracting text deltas from an Anthropic stream"""
+        lines = [
+            'event: message_start',
+            'data: {"type": "message_start", "message": {}}',
+            '',
+            'data: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "Hello"}}',
+            '',
+            'data: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": " world"}}',
+            '',
+            'data: {"type": "message_stop"}',
+            '',
+        ]
+        self.assertEqual(''.join(get_provider('anthropic').iter_deltas(lines)), "Hello world")
+
+    def test_openai_stream(self):
+        """Test extracting text deltas from an OpenAI-compatible stream"""
+        lines = [
+            'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+            '',
+            'data: {"choices": [{"delta": {"content": "Hi"}}]}',
+            '',
+            'data: [DONE]',
+            '',
+        ]
+        for provider in ['openai', 'mistral', 'openrouter']:
+            with self.subTest(provider=provider):
+                self.assertEqual(list(get_provider(provider).iter_deltas(lines)), ["Hi"])
+
+    def test_google_stream(self):
+        """Test extracting text deltas from a Google stream"""
+        lines = [
+            'data: {"candidates": [{"content": {"parts": [{"text": "Guten"}]}}]}',
+            '',
+            'data: {"candidates": [{"content": {"parts": [{"text": " Tag"}]}}]}',
+            '',
+        ]
+        self.assertEqual(''.join(get_provider('google').iter_deltas(lines)), "Guten Tag")
+
+    def test_stream_error(self):
+        """Test that error events raise"""
+        with self.assertRaises(RuntimeError):
+            get_provider('anthropic').parse_stream_event({"type": "error", "error": {"message": "overloaded"}})
+        with self.assertRaises(RuntimeError):
+            get_provider('openai').parse_stream_event({"error": {"message": "bad request"}})
+
+    def test_send_chat(self):
+        """Test a buffered and a streamed request through a session"""
+        session = MagicMock()
+        response = session.post.return_value
+        response.status_code = 200
+        response.json.return_value = {"choices": [{"message": {"content": "answer"}}]}
+        adapter = get_provider('openai')
+        messages = [{"role": "user", "content": "question"}]
+
+        self.assertEqual(send_chat(session, adapter, 'key', 'gpt-4', messages), "answer")
+        self.assertEqual(session.post.call_args.kwargs["json"]["messages"], messages)
+        response.close.assert_called()
+
+        response.iter_lines.return_value = [
+            'data: {"choices": [{"delta": {"content": "an"}}]}', '',
+            'data: {"choices": [{"delta": {"content": "swer"}}]}', '',
+        ]
+        deltas = []
+        self.assertEqual(send_chat(session, adapter, 'key', 'gpt-4', messages,
+                                   stream=True, on_delta=deltas.append), "answer")
+        self.assertEqual(deltas, ["an", "swer"])
+
+    def test_usage(self):
+        """Test reading token usage from every wire format"""
+        self.assertEqual(get_provider('anthropic').parse_usage(
+            {"type": "message_start", "message": {"usage": {"input_tokens": 12, "output_tokens": 1}}}),
+            {"input_tokens": 12, "output_tokens": 1})
+        self.assertEqual(get_provider('openai').parse_usage(
+            {"choices": [], "usage": {"prompt_tokens": 5, "completion_tokens": 7}}),
+            {"input_tokens": 5, "output_tokens": 7})
+        self.assertEqual(get_provider('google').parse_usage(
+            {"usageMetadata": {"promptTokenCount": 3, "candidatesTokenCount": 4}}),
+            {"input_tokens": 3, "output_tokens": 4})
+        self.assertIn("stream_options", get_provider('openai').encode_payload('gpt-4', [], stream=True))
+        self.assertNotIn("stream_options", get_provider('mistral').encode_payload('mistral-tiny', [], stream=True))
+
+    def test_prompt_cache(self):
+        """Test cache breakpoints on long histories and the reported cache token counts"""
+        adapter = get_provider('anthropic')
+        short = [{"role": "user", "content": "Hi"}]
+        self.assertEqual(adapter.encode_payload('claude', short)["messages"], short)
+
+        messages = [{"role": "user", "content": "x" * 8000}, {"role": "assistant", "content": "a"},
+                    {"role": "user", "content": "q"}]
+        marked = adapter.encode_payload('claude', messages)["messages"]
+        self.assertEqual(marked[1], messages[1])
+        for index in (0, 2):
+            self.assertEqual(marked[index]["content"], [
+                {"type": "text", "text": messages[index]["content"], "cache_control": {"type": "ephemeral"}}])
+        self.assertEqual(messages[2]["content"], "q")
+
+        self.assertEqual(adapter.parse_usage({"usage": {
+            "input_tokens": 5, "output_tokens": 1, "cache_read_input_tokens": 900,
+            "cache_creation_input_tokens": 100}}),
+            {"input_tokens": 5, "output_tokens": 1, "cache_read_tokens": 900, "cache_write_tokens": 100})
+        self.assertEqual(get_provider('openai').parse_usage({"usage": {
+            "prompt_tokens": 1200, "completion_tokens": 3, "prompt_tokens_details": {"cached_tokens": 1024}}}),
+            {"input_tokens": 1200, "output_tokens": 3, "cache_read_tokens": 1024})
+        self.assertEqual(get_provider('google').parse_usage({"usageMetadata": {
+            "promptTokenCount": 3, "candidatesTokenCount": 4, "cachedContentTokenCount": 2}})["cache_read_tokens"], 2)
+
+    def test_send_chat_metrics(self):
+        """Test that timings and token counts are reported for a streamed request"""
+        session = MagicMock()
+        response = session.post.return_value
+        response.status_code = 200
+        response.iter_lines.return_value = [
+            'data: {"choices": [{"delta": {"content": "hi"}}]}', '',
+            'data: {"choices": [], "usage": {"prompt_tokens": 5, "completion_tokens": 2}}', '',
+        ]
+        metrics = {}
+        send_chat(session, get_provider('openai'), 'key', 'gpt-4', [], stream=True, metrics=metrics)
+        self.assertEqual(metrics["input_tokens"], 5)
+        self.assertEqual(metrics["output_tokens"], 2)
+        self.assertLessEqual(metrics["connect"], metrics["ttft"])
+        self.assertLessEqual(metrics["ttft"], metrics["total"])
+
+    def test_send_chat_errors(self):
+        """Test HTTP errors and cancellation"""
+        session = MagicMock()
+        response = session.post.return_value
+        response.status_code = 429
+        response.text = "rate limited"
+        with self.assertRaises(RuntimeError):
+            send_chat(session, get_provider('mistral'), 'key', 'mistral-tiny', [])
+
+        response.status_code = 200
+        response.iter_lines.return_value = ['data: {"choices": [{"delta": {"content": "x"}}]}', '']
+        token = CancelToken()
+        token.cancel()
+        with self.assertRaises(RequestCancelled):
+            send_chat(session, get_provider('mistral'), 'key', 'mistral-tiny', [], stream=True, token=token)
+
+        # A read timeout in the middle of a stream surfaces as ConnectionError
+        import requests
+
+        def broken_stream():
+            yield 'data: {"choices": [{"delta": {"content": "x"}}]}'
+            raise requests.ConnectionError("Read timed out")
+        response.iter_lines.return_value = broken_stream()
+        with self.assertRaises(RequestTimeout):
+            send_chat(session, get_provider('mistral'), 'key', 'mistral-tiny', [], stream=True)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+from request_executor import RequestExecutor, CancelToken, RequestCancelled, RequestTimeout
+
+class TestRequestExecutor(unittest.TestCase):
+    def setUp(self):
+        """Run dispatched callbacks inline and record them"""
+        self.done = threading.Event()
+        self.results = []
+
+        def dispatch(callback, *args):
+            callback(*args)
+            self.done.set()
+
+        self.executor = RequestExecutor(dispatch, workers=2)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_success(self):
+        """Test that results are dispatched to on_success"""
+        self.executor.submit(lambda token: "result", on_success=self.results.append)
+        self.assertTrue(self.done.wait(2))
+        self.assertEqual(self.results, ["result"])
+
+    def test_error(self):
+        """Test that exceptions are dispatched to on_error"""
+        def job(token):
+            raise ValueError("boom")
+        self.executor.submit(job, on_error=self.results.append)
+        self.assertTrue(self.done.wait(2))
+        self.assertIsInstance(self.results[0], ValueError)
+
+    def test_cancel_aborts_response(self):
+        """Test that cancelling closes the attached response"""
+        response = MagicMock()
+        started = threading.Event()
+
+        def job(token):
+            token.attach(response)
+            started.set()
+            while True:
+                token.check()
+                time.sleep(0.01)
+
+        token = self.executor.submit(job, on_error=self.results.append)
+        self.assertTrue(started.wait(2))
+        token.cancel()
+        self.assertTrue(self.done.wait(2))
+        response.close.assert_called()
+        self.assertIsInstance(self.results[0], RequestCancelled)
+
+    def test_deadline(self):
+        """Test that a request past its deadline fails with RequestTimeout"""
+        def job(token):
+            while True:
+                token.check()
+                time.sleep(0.01)
+
+        self.executor.submit(job, on_error=self.results.append, timeout=0.05)
+        self.assertTrue(self.done.wait(2))
+        self.assertIsInstance(self.results[0], RequestTimeout)
+
+    def test_attach_after_cancel(self):
+        """Test that a response attached after cancel is closed immediately"""
+        token = CancelToken()
+        token.cancel()
+        response = MagicMock()
+        token.attach(response)
+        response.close.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
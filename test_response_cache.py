@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from response_cache import ResponseCache
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = ResponseCache(self.cache_dir, max_entries=2)
+        self.messages = [{"role": "user", "content": "Hello"}]
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_make_key(self):
+        """Test that keys ignore whitespace noise but not parameters"""
+        key = ResponseCache.make_key('openai', 'gpt-4', self.messages)
+        same = ResponseCache.make_key('openai', 'gpt-4', [{"role": "user", "content": " Hello\r\n"}])
+        self.assertEqual(key, same)
+        self.assertNotEqual(key, ResponseCache.make_key('openai', 'gpt-3.5-turbo', self.messages))
+        self.assertNotEqual(key, ResponseCache.make_key('openai', 'gpt-4', self.messages, {"max_tokens": 10}))
+
+    def test_hit_and_miss(self):
+        """Test lookups and statistics"""
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.put('key', 'answer')
+        self.assertEqual(self.cache.get('key'), 'answer')
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_memory_lru_and_disk_tier(self):
+        """Test that evicted memory entries are still served from disk"""
+        for key in ['a', 'b', 'c']:
+            self.cache.put(key, key.upper())
+        self.assertEqual(list(self.cache.memory), ['b', 'c'])
+        self.assertEqual(self.cache.get('a'), 'A')
+        self.assertEqual(list(self.cache.memory), ['c', 'a'])
+
+        # A new cache instance reads the persisted entries
+        self.assertEqual(ResponseCache(self.cache_dir).get('b'), 'B')
+
+    def test_ttl(self):
+        """Test that expired entries are dropped"""
+        self.cache.put('key', 'answer')
+        with patch('response_cache.time.time', return_value=self.cache.memory['key'][0] + self.cache.ttl + 1):
+            self.assertIsNone(self.cache.get('key'))
+        self.assertFalse(os.path.exists(self.cache._path('key')))
+
+    def test_disk_size_limit(self):
+        """Test that the oldest files are evicted when the disk tier is full"""
+        cache = ResponseCache(self.cache_dir, max_disk_bytes=400)
+        for i in range(10):
+            key = f"{i:02d}" + "0" * 62
+            cache.put(key, "x" * 50)
+            os.utime(cache._path(key), (i, i))
+        total = sum(size for _, size, _ in cache._disk_entries())
+        self.assertLessEqual(total, 400)
+        self.assertTrue(os.path.exists(cache._path("09" + "0" * 62)))
+
+if __name__ == '__main__':
+    unittest.main()
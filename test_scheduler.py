@@ -0,0 +1,172 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from providers import ProviderError
+from request_executor import CancelToken, RequestCancelled
+from scheduler import RequestScheduler, parse_reset
+
+class TestRequestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = RequestScheduler(max_in_flight=2, max_retries=3, base_delay=0.01, max_delay=0.05)
+
+    def test_parse_reset(self):
+        """Test the reset formats of the different providers"""
+        now = 1_700_000_000.0
+        self.assertEqual(parse_reset("6m0s", now), 360)
+        self.assertEqual(parse_reset("250ms", now), 0.25)
+        self.assertEqual(parse_reset("2", now), 2)
+        self.assertEqual(parse_reset(str(int((now + 5) * 1000)), now), 5)
+        self.assertAlmostEqual(parse_reset("2023-11-14T22:13:25Z", now), 5, delta=1)
+        self.assertIsNone(parse_reset("soon", now))
+
+    def test_retries_then_succeeds(self):
+        """Test that 429 and 5xx responses are retried"""
+        calls = []
+
+        def func():
+            calls.append(1)
+            if len(calls) < 3:
+                raise ProviderError(503 if len(calls) == 1 else 429, {}, "busy")
+            return "ok"
+
+        retries = []
+        result = self.scheduler.run('openai', func, on_retry=lambda *args: retries.append(args[0]))
+        self.assertEqual(result, "ok")
+        self.assertEqual(retries, [1, 2])
+
+    def test_non_retryable_error(self):
+        """Test that client errors are raised immediately"""
+        def func():
+            raise ProviderError(401, {}, "unauthorized")
+        with self.assertRaises(ProviderError):
+            self.scheduler.run('openai', func)
+
+    def test_gives_up_after_max_retries(self):
+        """Test that retries stop after max_retries"""
+        calls = []
+
+        def func():
+            calls.append(1)
+            raise ProviderError(500, {}, "error")
+        with self.assertRaises(ProviderError):
+            self.scheduler.run('openai', func)
+        self.assertEqual(len(calls), 4)
+
+    def test_retry_after_blocks_provider(self):
+        """Test that Retry-After pauses further requests to the provider"""
+        self.scheduler.observe('anthropic', {'Retry-After': '0.2'}, 429)
+        start = time.monotonic()
+        with self.scheduler.slot('anthropic'):
+            pass
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+        # Other providers are not affected
+        start = time.monotonic()
+        with self.scheduler.slot('openai'):
+            pass
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_exhausted_quota_headers(self):
+        """Test that a zero remaining count blocks until the reset"""
+        self.scheduler.observe('openai', {'x-ratelimit-remaining-requests': '0',
+                                          'x-ratelimit-reset-requests': '30s'})
+        self.assertGreater(self.scheduler.blocked_until['openai'] - time.monotonic(), 25)
+
+    def test_global_in_flight_cap(self):
+        """Test that no more than max_in_flight requests run at once"""
+        peak = []
+        lock = threading.Lock()
+        running = [0]
+
+        def func():
+            with lock:
+                running[0] += 1
+                peak.append(running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+        threads = [threading.Thread(target=self.scheduler.run, args=(p, func))
+                   for p in ['openai', 'anthropic', 'google', 'mistral', 'openrouter']]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(max(peak), 2)
+
+    def test_cancel_during_backoff(self):
+        """Test that a cancelled request stops waiting for its retry"""
+        scheduler = RequestScheduler(base_delay=5, max_delay=5)
+        token = CancelToken()
+
+        def func():
+            threading.Timer(0.05, token.cancel).start()
+            raise ProviderError(429, {'retry-after': '5'}, "rate limited")
+
+        start = time.monotonic()
+        with self.assertRaises(RequestCancelled):
+            scheduler.run('openai', func, token)
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_send_chat_observes_headers(self):
+        """Test that successful responses update the provider limits"""
+        from providers import get_provider
+
+        def fake_send(*args, on_response=None, **kwargs):
+            on_response(type('Response', (), {'headers': {'anthropic-ratelimit-requests-remaining': '0',
+                                                          'anthropic-ratelimit-requests-reset': '10s'}})())
+            return "answer"
+
+        with patch('scheduler.send_chat', side_effect=fake_send):
+            result = self.scheduler.send_chat(None, get_provider('anthropic'), 'key', 'model', [])
+        self.assertEqual(result, "answer")
+        self.assertIn('anthropic', self.scheduler.blocked_until)
+
+    def test_chat_and_aider_share_a_bucket(self):
+        """Test that chat requests and Aider edits to one provider draw from the same token bucket"""
+        from providers import get_provider
+        scheduler = RequestScheduler(requests_per_minute=600, burst=2)
+        with patch('scheduler.send_chat', return_value="answer"):
+            for _ in range(2):
+                scheduler.send_chat(None, get_provider('anthropic'), 'key', 'model', [])
+        # Aider edits hold a slot of the provider, see AiderManager.process_code_edit
+        start = time.monotonic()
+        with scheduler.slot('anthropic'):
+            pass
+        self.assertGreaterEqual(time.monotonic() - start, 0.08)
+        self.assertIs(scheduler.limiter('anthropic'), scheduler.limiters['anthropic'])
+        self.assertIsNone(RequestScheduler().limiter('anthropic'))
+
+    def test_headers_tighten_the_rate(self):
+        """Test that the remaining requests are spread until the reported reset"""
+        scheduler = RequestScheduler(requests_per_minute=600)
+        scheduler.observe('openai', {'x-ratelimit-remaining-requests': '10', 'x-ratelimit-reset-requests': '60s'})
+        self.assertAlmostEqual(scheduler.limiter('openai').rate, 10 / 60)
+        self.assertEqual(scheduler.limiter('openai').capacity, 1.0)
+        scheduler.observe('openai', {'x-ratelimit-remaining-requests': '5000', 'x-ratelimit-reset-requests': '1s'})
+        self.assertAlmostEqual(scheduler.limiter('openai').rate, 10)
+        with scheduler.rate_limit('openai', 60):
+            self.assertAlmostEqual(scheduler.limiter('openai').rate, 1)
+        self.assertAlmostEqual(scheduler.limiter('openai').rate, 10)
+
+    def test_no_retry_after_streamed_text(self):
+        """Test that a failure after text was shown is not retried, which would show it twice"""
+        import requests
+        from providers import get_provider
+        shown = []
+
+        def fake_send(*args, **kwargs):
+            on_delta = args[7]
+            on_delta("partial ")
+            raise requests.ConnectionError("connection reset")
+
+        with patch('scheduler.send_chat', side_effect=fake_send) as send:
+            with self.assertRaises(requests.ConnectionError):
+                self.scheduler.send_chat(None, get_provider('openai'), 'key', 'model', [], stream=True,
+                                         on_delta=shown.append)
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual(shown, ["partial "])
+
+if __name__ == '__main__':
+    unittest.main()
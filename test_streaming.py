@@ -0,0 +1,34 @@
+import unittest
+from streaming import iter_sse_data, iter_sse_json
+
+class TestStreaming(unittest.TestCase):
+    def test_iter_sse_data(self):
+        """Test splitting a line stream into event payloads"""
+        lines = [
+            b"event: message",
+            b"data: first",
+            b"",
+            b": keep-alive",
+            b"data: second",
+            b"data: line",
+            b"",
+            b"data: trailing",
+        ]
+        self.assertEqual(list(iter_sse_data(lines)), ["first", "second\nline", "trailing"])
+
+    def test_iter_sse_json(self):
+        """Test decoding events up to the [DONE] marker"""
+        lines = [
+            'data: {"n": 1}',
+            '',
+            'data: not json',
+            '',
+            'data: [DONE]',
+            '',
+            'data: {"n": 2}',
+            '',
+        ]
+        self.assertEqual(list(iter_sse_json(lines)), [{"n": 1}])
+
+if __name__ == '__main__':
+    unittest.main()
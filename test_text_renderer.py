@@ -0,0 +1,117 @@
+import threading
+import tkinter as tk
+import unittest
+
+from text_renderer import BufferedRenderer
+
+
+class FakeText:
+    """Records the calls a renderer makes on a Tk text widget"""
+
+    def __init__(self, bottom=1.0, reject_astral=False):
+        self.inserts = []
+        self.scrolls = 0
+        self.bottom = bottom
+        self.reject_astral = reject_astral
+
+    def winfo_exists(self):
+        return True
+
+    def yview(self):
+        return (0.0, self.bottom)
+
+    def insert(self, index, text):
+        if self.reject_astral and any(ord(char) >= 0x10000 for char in text):
+            raise tk.TclError("character U+1f600 is above the range allowed by Tcl")
+        self.inserts.append(text)
+
+    def see(self, index):
+        self.scrolls += 1
+
+    def delete(self, start, end):
+        self.inserts.clear()
+
+
+class FakeRoot:
+    """Collects root.after callbacks so tests run the frames by hand"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, callback):
+        self.scheduled.append((ms, callback))
+
+    def run_frames(self):
+        scheduled, self.scheduled = self.scheduled, []
+        for _, callback in scheduled:
+            callback()
+
+
+class TestBufferedRenderer(unittest.TestCase):
+    def setUp(self):
+        self.widget = FakeText()
+        self.root = FakeRoot()
+        self.renderer = BufferedRenderer(self.widget, self.root, fps=20)
+
+    def test_batches_writes_into_one_insert(self):
+        """Test that many deltas are rendered with a single insert per frame"""
+        for i in range(500):
+            self.renderer.write(f"t{i} ")
+        self.assertEqual(len(self.root.scheduled), 1)
+        self.root.run_frames()
+        self.assertEqual(self.widget.inserts, ["".join(f"t{i} " for i in range(500))])
+        self.assertEqual(self.widget.scrolls, 1)
+
+    def test_frame_rate_is_capped(self):
+        """Test that the next frame waits for the frame interval"""
+        self.renderer.write("a")
+        self.assertEqual(self.root.scheduled[0][0], 0)
+        self.root.run_frames()
+        self.renderer.write("b")
+        self.assertGreater(self.root.scheduled[0][0], 0)
+        self.assertLessEqual(self.root.scheduled[0][0], 50)
+
+    def test_no_autoscroll_when_scrolled_up(self):
+        """Test that the view stays put while the user reads earlier text"""
+        self.widget.bottom = 0.5
+        self.renderer.write("text")
+        self.root.run_frames()
+        self.assertEqual(self.widget.inserts, ["text"])
+        self.assertEqual(self.widget.scrolls, 0)
+
+    def test_cancelled_text_is_dropped(self):
+        """Test that deltas arriving after cancellation are not rendered"""
+        cancelled = threading.Event()
+        self.renderer.write("kept", cancelled)
+        cancelled.set()
+        self.renderer.write("late", cancelled)
+        self.root.run_frames()
+        self.assertEqual(self.widget.inserts, ["kept"])
+
+    def test_writes_from_threads(self):
+        """Test that concurrent writers lose no text"""
+        threads = [threading.Thread(target=lambda: [self.renderer.write("x") for _ in range(1000)])
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.root.run_frames()
+        self.assertEqual(len("".join(self.widget.inserts)), 4000)
+
+    def test_clear_and_unsupported_characters(self):
+        """Test clearing pending text and the fallback for characters Tk rejects"""
+        self.renderer.write("pending")
+        self.renderer.clear()
+        self.root.run_frames()
+        self.assertEqual(self.widget.inserts, [])
+
+        widget = FakeText(reject_astral=True)
+        renderer = BufferedRenderer(widget, self.root)
+        renderer.write("smile \U0001F600")
+        renderer.flush()
+        self.assertEqual(widget.inserts, ["smile \ufffd"])
+
+
+if __name__ == '__main__':
+    unittest.main()
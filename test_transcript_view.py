@@ -0,0 +1,76 @@
+import tkinter as tk
+import unittest
+from tkinter import scrolledtext
+
+from transcript_view import TranscriptView, format_turn
+
+
+def make_messages(count):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}",
+             "timestamp": "2024-01-01T12:00:00"} for i in range(count)]
+
+
+class TestTranscriptView(unittest.TestCase):
+    def setUp(self):
+        try:
+            self.root = tk.Tk()
+        except tk.TclError as e:
+            self.skipTest(f"Tk needs a display: {e}")
+        self.root.withdraw()
+        self.widget = scrolledtext.ScrolledText(self.root, height=10)
+        self.widget.pack()
+        self.messages = make_messages(1000)
+        self.view = TranscriptView(self.widget, self.root, page_size=10, max_turns=20)
+        self.view.show(lambda start, end: self.messages[start:end], len(self.messages))
+
+    def tearDown(self):
+        self.root.destroy()
+
+    def turn_text(self, index):
+        start, end = self.widget.tag_ranges(f"turn{index}")
+        return self.widget.get(start, end)
+
+    def test_show_renders_newest_page(self):
+        """Test that only the newest page of a long conversation is rendered"""
+        self.assertEqual((self.view.start, self.view.end), (990, 1000))
+        text = self.widget.get("1.0", "end-1c")
+        self.assertTrue(text.startswith(format_turn(self.messages[990])))
+        self.assertTrue(text.endswith(format_turn(self.messages[999])))
+
+    def test_paging_keeps_window_bounded(self):
+        """Test that paging older turns in drops turns at the far end"""
+        for _ in range(5):
+            self.view.page_older()
+        self.assertEqual((self.view.start, self.view.end), (940, 960))
+        self.view.page_newer()
+        self.assertEqual((self.view.start, self.view.end), (950, 970))
+        for index in range(950, 970):
+            self.assertEqual(self.turn_text(index), format_turn(self.messages[index]))
+
+    def test_live_session(self):
+        """Test that appended and streamed turns stay within the window"""
+        for i in range(30):
+            self.messages.append({"role": "user", "content": f"live {i}", "timestamp": "2024-01-01T12:00:00"})
+            self.view.append_message(self.messages[-1])
+        self.assertEqual((self.view.start, self.view.end), (1010, 1030))
+
+        self.view.begin_live()
+        self.view.write("[2024-01-01 12:00:00] Assistant:\n")
+        self.view.write("streamed")
+        self.messages.append({"role": "assistant", "content": "streamed", "timestamp": "2024-01-01T12:00:00"})
+        self.view.write("\n\n")
+        self.view.end_live(self.messages[-1])
+        self.assertEqual(self.view.end, 1031)
+        self.assertEqual(self.turn_text(1030), format_turn(self.messages[-1]))
+
+    def test_append_after_paging_jumps_to_newest(self):
+        """Test that a new message brings the view back to the newest turns"""
+        self.view.page_older()
+        self.view.page_older()
+        self.messages.append({"role": "user", "content": "new", "timestamp": "2024-01-01T12:00:00"})
+        self.view.append_message(self.messages[-1])
+        self.assertEqual((self.view.start, self.view.end), (991, 1001))
+
+
+if __name__ == '__main__':
+    unittest.main()
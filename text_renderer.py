@@ -0,0 +1,93 @@
+"""
+Throttled text rendering for the LLM GUI application.
+Collects text from any thread and writes it into a Tk text widget at a
+capped frame rate with a single insert per frame, so fast token streams do
+not flood the event loop with inserts and scrolls and input stays responsive.
+"""
+
+import threading
+import time
+import tkinter as tk
+from typing import Callable
+
+DEFAULT_FPS = 30
+# Share of the text that may lie below the view while the user still counts as "at the bottom"
+BOTTOM_TOLERANCE = 0.001
+
+
+class BufferedRenderer:
+    """Buffers text for a Tk text widget and flushes it at a capped frame rate"""
+
+    def __init__(self, widget, root, fps: int = DEFAULT_FPS, on_flush: Callable[[str], None] = None):
+        """
+        Args:
+            widget (tk.Text): Text widget the text is written to
+            root (tk.Tk): Window whose event loop runs the flushes
+            fps (int): Maximum number of flushes per second
+            on_flush (Callable, optional): Called on the Tk thread with the text of every flush
+        """
+        self.widget = widget
+        self.root = root
+        self.on_flush = on_flush
+        self.interval = 1.0 / fps
+        self._buffer = []
+        self._scheduled = False
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+
+    def write(self, text: str, cancelled: threading.Event = None):
+        """
+        Queue text for the next frame; safe to call from worker threads.
+
+        Args:
+            text (str): Text to append
+            cancelled (threading.Event, optional): Text is dropped once this is set,
+                so late deltas of a cancelled request never reach the widget
+        """
+        if not text:
+            return
+        with self._lock:
+            if cancelled is not None and cancelled.is_set():
+                return
+            self._buffer.append(text)
+            if self._scheduled:
+                return
+            self._scheduled = True
+            delay = max(0.0, self._last_flush + self.interval - time.monotonic())
+        self.root.after(int(delay * 1000), self._on_frame)
+
+    def flush(self):
+        """Insert all queued text at once; must run on the Tk thread"""
+        with self._lock:
+            text = ''.join(self._buffer)
+            self._buffer.clear()
+            self._last_flush = time.monotonic()
+        if not text or not self.widget.winfo_exists():
+            return
+
+        # Only follow the text if the user has not scrolled up to read
+        at_bottom = self.widget.yview()[1] >= 1.0 - BOTTOM_TOLERANCE
+        try:
+            self.widget.insert(tk.END, text)
+        except tk.TclError:
+            # Some Tk builds reject characters outside the Basic Multilingual Plane
+            self.widget.insert(tk.END, ''.join(char if ord(char) < 0x10000 else '\ufffd' for char in text))
+        if at_bottom:
+            self.widget.see(tk.END)
+        if self.on_flush:
+            self.on_flush(text)
+
+    def discard(self):
+        """Drop text that has not been rendered yet"""
+        with self._lock:
+            self._buffer.clear()
+
+    def clear(self):
+        """Drop queued text and empty the widget"""
+        self.discard()
+        self.widget.delete("1.0", tk.END)
+
+    def _on_frame(self):
+        with self._lock:
+            self._scheduled = False
+        self.flush()
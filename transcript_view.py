@@ -0,0 +1,219 @@
+"""
+Windowed transcript view for the LLM GUI application.
+Renders only a window of a conversation's turns into a Tk text widget and
+pages older or newer turns in from the conversation store when the user
+scrolls to an edge, so long conversations load and scroll quickly and the
+widget holds a bounded number of turns during a live session.
+"""
+
+import tkinter as tk
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from text_renderer import BOTTOM_TOLERANCE, BufferedRenderer
+
+PAGE_SIZE = 50
+MAX_TURNS = 200
+LIVE_MARK = "transcript_live"
+VIEW_MARK = "transcript_view"
+
+
+def turn_header(role: str, timestamp: str = None) -> str:
+    """First line of a turn"""
+    moment = datetime.fromisoformat(timestamp) if timestamp else datetime.now()
+    return f"[{moment.strftime('%Y-%m-%d %H:%M:%S')}] {role.title()}:\n"
+
+
+def format_turn(message: Dict) -> str:
+    """Transcript text of one message"""
+    return turn_header(message["role"], message["timestamp"]) + f"{message['content']}\n\n"
+
+
+class TranscriptView:
+    """Shows a sliding window of a conversation's turns in a text widget"""
+
+    def __init__(self, widget, root, scrollbar=None, page_size: int = PAGE_SIZE,
+                 max_turns: int = MAX_TURNS, highlighter=None):
+        """
+        Args:
+            widget (tk.Text): Text widget the transcript is shown in
+            root (tk.Tk): Window whose event loop runs rendering and paging
+            scrollbar (ttk.Scrollbar, optional): Scrollbar of the widget, defaults to a ScrolledText's
+            page_size (int): Turns rendered when the window moves
+            max_turns (int): Turns kept in the widget before the far end is dropped
+            highlighter (MarkdownHighlighter, optional): Applies Markdown and code tags to the turns
+        """
+        self.widget = widget
+        self.root = root
+        self.scrollbar = scrollbar or getattr(widget, "vbar", None)
+        self.page_size = page_size
+        self.max_turns = max(max_turns, 2 * page_size)
+        self.highlighter = highlighter
+        self.renderer = BufferedRenderer(widget, root, on_flush=self._on_flush)
+        self.fetch: Optional[Callable[[int, int], List[Dict]]] = None
+        self.total = 0
+        self.start = 0
+        self.end = 0
+        self.live = False
+        self._paging = False
+        widget.configure(yscrollcommand=self._on_yscroll)
+
+    def show(self, fetch: Optional[Callable[[int, int], List[Dict]]], total: int):
+        """
+        Display the newest turns of a conversation.
+
+        Args:
+            fetch (Callable): Returns the messages from a start to an end index
+            total (int): Number of messages in the conversation
+        """
+        self.fetch = fetch
+        self.total = total if fetch else 0
+        self.live = False
+        if self.highlighter:
+            self.highlighter.reset()
+        self._render_tail()
+
+    def append_message(self, message: Dict):
+        """Show a message that was just added to the conversation"""
+        self.total += 1
+        if self.end < self.total - 1:
+            # The user paged away from the newest turns; jump back to them
+            self._render_tail()
+            return
+        self.renderer.flush()
+        self.widget.insert(tk.END, format_turn(message), self._tag(self.end))
+        self._highlight(self.end, message)
+        self.end += 1
+        self._trim_top(follow=False)
+        self.widget.see(tk.END)
+
+    def begin_live(self):
+        """Mark where a streamed answer starts; its text arrives through write()"""
+        self.renderer.flush()
+        if self.end < self.total:
+            self._render_tail()
+        self.widget.mark_set(LIVE_MARK, "end-1c")
+        self.widget.mark_gravity(LIVE_MARK, tk.LEFT)
+        self.live = True
+        if self.highlighter:
+            self.highlighter.begin_stream(LIVE_MARK)
+
+    def write(self, text: str, cancelled=None):
+        """Queue text at the end of the transcript; safe to call from worker threads"""
+        self.renderer.write(text, cancelled)
+
+    def end_live(self, message: Dict = None):
+        """Finish the live answer; with a stored message its text becomes a regular turn"""
+        self.renderer.flush()
+        if not self.live:
+            return
+        self.live = False
+        if message is None:
+            if self.highlighter:
+                self.highlighter.end_stream()
+            return
+        self.total += 1
+        self.widget.tag_add(self._tag(self.end), LIVE_MARK, "end-1c")
+        if self.highlighter:
+            self.highlighter.end_stream(f"{self._tag(self.end)}.first", message["content"])
+        self.end += 1
+        self._trim_top()
+
+    def page_older(self):
+        """Render the page of turns before the window"""
+        self._paging = False
+        if self.start == 0 or self.fetch is None:
+            return
+        start = max(0, self.start - self.page_size)
+        self._keep_view(lambda: self._insert_turns("1.0", start, self.start), follow=False)
+        self.start = start
+        self._trim_bottom()
+
+    def page_newer(self):
+        """Render the page of turns after the window"""
+        self._paging = False
+        if self.end >= self.total or self.fetch is None:
+            return
+        end = min(self.total, self.end + self.page_size)
+        self.renderer.flush()
+        self._insert_turns(tk.END, self.end, end)
+        self.end = end
+        self._trim_top(follow=False)
+
+    def _on_yscroll(self, first, last):
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        if self._paging or self.fetch is None:
+            return
+        # Page while the event loop is idle, never from inside Tk's scroll update
+        if float(first) <= 0.0 and self.start > 0:
+            self._paging = True
+            self.root.after_idle(self.page_older)
+        elif float(last) >= 1.0 and self.end < self.total and not self.live:
+            self._paging = True
+            self.root.after_idle(self.page_newer)
+
+    def _on_flush(self, text: str):
+        if self.live and self.highlighter:
+            self.highlighter.feed(text)
+
+    def _render_tail(self):
+        self.renderer.clear()
+        self._delete_tags(self.start, self.end)
+        self.start = self.end = max(0, self.total - self.page_size)
+        if self.total > self.start:
+            self._insert_turns(tk.END, self.start, self.total)
+        self.end = self.total
+        self.widget.see(tk.END)
+
+    def _trim_top(self, follow: bool = True):
+        excess = self.end - self.start - self.max_turns
+        if excess <= 0:
+            return
+        cut = self.widget.tag_ranges(self._tag(self.start + excess))[0]
+        self._keep_view(lambda: self.widget.delete("1.0", cut), follow)
+        self._delete_tags(self.start, self.start + excess)
+        self.start += excess
+
+    def _trim_bottom(self):
+        # Never cut below the window while an answer is streamed into it
+        excess = self.end - self.start - self.max_turns
+        if excess <= 0 or self.live:
+            return
+        cut = self.widget.tag_ranges(self._tag(self.end - excess))[0]
+        self.widget.delete(cut, tk.END)
+        self._delete_tags(self.end - excess, self.end)
+        self.end -= excess
+
+    def _keep_view(self, change: Callable, follow: bool = True):
+        """Apply a change above the visible text without moving what the user sees"""
+        at_bottom = follow and self.widget.yview()[1] >= 1.0 - BOTTOM_TOLERANCE
+        self.widget.mark_set(VIEW_MARK, "@0,0")
+        change()
+        if at_bottom:
+            self.widget.see(tk.END)
+        else:
+            self.widget.yview(VIEW_MARK)
+
+    def _insert_turns(self, index: str, start: int, end: int):
+        """Render stored turns with a single Text.insert call"""
+        messages = self.fetch(start, end)
+        chunks = []
+        for number, message in enumerate(messages, start):
+            chunks.extend((format_turn(message), self._tag(number)))
+        self.widget.insert(index, *chunks)
+        for number, message in enumerate(messages, start):
+            self._highlight(number, message)
+
+    def _highlight(self, number: int, message: Dict):
+        if self.highlighter:
+            header = len(turn_header(message["role"], message["timestamp"]))
+            self.highlighter.highlight_turn(f"{self._tag(number)}.first + {header} chars", message["content"])
+
+    def _delete_tags(self, start: int, end: int):
+        if end > start:
+            self.widget.tag_delete(*(self._tag(index) for index in range(start, end)))
+
+    @staticmethod
+    def _tag(index: int) -> str:
+        return f"turn{index}"